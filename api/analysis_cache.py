@@ -0,0 +1,202 @@
+# api/analysis_cache.py
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .embedding_batcher import embedding_version
+from .metrics import metrics
+
+MISS = object()
+
+requests_total = metrics.counter('analysis_cache_requests_total', 'Analysis cache lookups, by stage and result (hit or miss).')
+
+
+def content_hash(*parts):
+    """sha256 over the given parts (bytes or str), separated so ('ab', 'c') != ('a', 'bc')."""
+    h = hashlib.sha256()
+    for part in parts:
+        if part is None: part = b''
+        if isinstance(part, str): part = part.encode('utf-8')
+        h.update(len(part).to_bytes(8, 'big'))
+        h.update(part)
+    return h.hexdigest()
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    """Same digest as content_hash(<file bytes>), streamed from disk."""
+    h = hashlib.sha256()
+    h.update(os.path.getsize(path).to_bytes(8, 'big'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# --- Backends ---
+class LocMemBackend:
+    """Per-process LRU with a TTL per entry."""
+
+    def __init__(self, max_entries=1024, **kwargs):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None: return MISS
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl if ttl else None, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock: self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+
+class FileBackend:
+    """One pickle per key under LOCATION; shared between processes on the same box.
+
+    Reads bump the file's mtime, so evicting the oldest mtimes gives LRU order.
+    """
+
+    def __init__(self, location, max_entries=1024, **kwargs):
+        self.location = str(location)
+        self.max_entries = max_entries
+        os.makedirs(self.location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISS
+        if expires_at is not None and expires_at < time.time():
+            try: os.remove(path)
+            except OSError: pass
+            return MISS
+        try: os.utime(path)
+        except OSError: pass
+        return value
+
+    def set(self, key, value, ttl):
+        fd, tmp = tempfile.mkstemp(dir=self.location, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((time.time() + ttl if ttl else None, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        try:
+            entries = [e for e in os.scandir(self.location) if e.name.endswith('.pkl')]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries: return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try: os.remove(entry.path)
+            except OSError: pass
+
+    def clear(self):
+        for entry in os.scandir(self.location):
+            if entry.name.endswith('.pkl'): os.remove(entry.path)
+
+
+class DjangoCacheBackend:
+    """Delegates to a configured Django cache alias (eviction is the alias' own policy)."""
+
+    def __init__(self, location='default', **kwargs):
+        from django.core.cache import caches
+        self.cache = caches[location]
+
+    def get(self, key):
+        return self.cache.get(key, MISS)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+
+BACKENDS = {
+    'locmem': LocMemBackend,
+    'file': FileBackend,
+    'django': DjangoCacheBackend,
+}
+
+
+# --- Stage cache ---
+class AnalysisCache:
+    """Stores each analysis stage under its own key so partial hits only recompute what changed.
+    A stage with an entry in stage_versions has it in its keys, so changing it retires old entries."""
+
+    def __init__(self, backend, ttl=86400, stage_ttls=None, stage_versions=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.stage_ttls = stage_ttls or {}
+        self.stage_versions = stage_versions or {}
+
+    def _key(self, stage, key):
+        version = self.stage_versions.get(stage)
+        return f"analysis:{stage}:{version}:{key}" if version else f"analysis:{stage}:{key}"
+
+    def get_or_compute(self, stage, key, compute, hits=None):
+        full_key = self._key(stage, key)
+        value = self.backend.get(full_key)
+        requests_total.inc(stage=stage, result='hit' if value is not MISS else 'miss')
+        if hits is not None: hits[stage] = value is not MISS
+        if value is not MISS:
+            return value
+        value = compute()
+        if value is not None:
+            self.backend.set(full_key, value, self.stage_ttls.get(stage, self.ttl))
+        return value
+
+    def get(self, stage, key):
+        value = self.backend.get(self._key(stage, key))
+        requests_total.inc(stage=stage, result='hit' if value is not MISS else 'miss')
+        return None if value is MISS else value
+
+    def set(self, stage, key, value):
+        self.backend.set(self._key(stage, key), value, self.stage_ttls.get(stage, self.ttl))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = dict(getattr(settings, 'ANALYSIS_CACHE', {}))
+                backend_cls = BACKENDS[config.pop('BACKEND', 'locmem')]
+                backend = backend_cls(**{k.lower(): v for k, v in config.items() if k in ('LOCATION', 'MAX_ENTRIES')})
+                version = embedding_version()
+                _cache = AnalysisCache(backend, ttl=config.get('TTL', 86400), stage_ttls=config.get('STAGE_TTLS'),
+                                       stage_versions={'embedding': version, 'jd_embedding': version,
+                                                       'section_embedding': version})
+    return _cache
@@ -1,6 +1,25 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Keeps the reference counts of stored resume files in step with the rows using them
+        from .file_store import connect_signals
+        connect_signals()
+        # Drops cached token users when they are saved (password change, deactivation) or deleted
+        from .authentication import connect_signals as connect_auth_signals
+        connect_auth_signals()
+        # Every worker's metrics on whichever worker serves a scrape (see api/metrics.py)
+        if getattr(settings, 'METRICS_MULTIPROC_DIR', ''):
+            from .metrics import share_snapshots
+            share_snapshots(settings.METRICS_MULTIPROC_DIR, getattr(settings, 'METRICS_PUBLISH_INTERVAL', 10))
+        # Opt-in warm-up so management commands and migrations never pay for model loading
+        if getattr(settings, 'AI_MODELS_WARM_ON_STARTUP', False):
+            from .model_registry import registry
+            threading.Thread(target=registry.warm, name='model-warmup', daemon=True).start()
@@ -0,0 +1,131 @@
+# api/authentication.py
+"""JWT authentication that resolves the token's user from a short-lived per-process cache.
+
+simplejwt's JWTAuthentication loads the User row on every request. Here a validated token's
+user id is looked up in an LRU first (AUTH_USER_CACHE_TTL seconds, 0 to disable); the
+active and password-changed checks still run against the cached user on every request.
+
+Each user has a version in the AUTH_USER_VERSION_CACHE Django cache, bumped whenever they are
+saved or deleted (a password change, a deactivation). A cached user only counts while it
+carries the current version, and a user loaded while the version moved is not cached, so with
+a cache shared by the workers (a directory, Redis, Memcached) every worker drops the old user
+at once. With a per-process version cache the other workers would never see the bump, so users
+are then loaded from the database on every request. Queryset update()s send no signals; they
+are only picked up when the entry expires.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .analysis_cache import MISS, LocMemBackend
+from .metrics import metrics
+
+auth_seconds = metrics.histogram('auth_seconds', 'Time spent authenticating a request, by result.',
+                                 buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+user_lookups_total = metrics.counter('auth_user_lookups_total', 'Token users resolved, by where they came from (cache or db).')
+
+_users = None
+_users_lock = threading.Lock()
+
+def _user_cache():
+    global _users
+    if _users is None:
+        with _users_lock:
+            if _users is None:
+                _users = LocMemBackend(max_entries=getattr(settings, 'AUTH_USER_CACHE_ENTRIES', 10000))
+    return _users
+
+
+def _versions():
+    return caches[getattr(settings, 'AUTH_USER_VERSION_CACHE', 'auth')]
+
+_warned_local = False
+
+def versions_shared():
+    """Whether a version bump in one worker reaches the others; see AUTH_USER_VERSION_CACHE."""
+    global _warned_local
+    shared = not isinstance(_versions(), (LocMemCache, DummyCache))
+    if not shared and not _warned_local:
+        _warned_local = True
+        print("AUTH_USER_VERSION_CACHE is a per-process cache; token users are not cached.")
+    return shared
+
+def user_version(user_id):
+    return _versions().get(f"auth_user_version:{user_id}", 0)
+
+def bump_user_version(user_id):
+    key = f"auth_user_version:{user_id}"
+    versions = _versions()
+    versions.add(key, 0, timeout=None)
+    try:
+        versions.incr(key)
+    except ValueError:  # evicted between the add and the incr
+        versions.set(key, 1, timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        started = time.perf_counter()
+        result = 'failed'
+        try:
+            authenticated = super().authenticate(request)
+            result = 'ok' if authenticated is not None else 'anonymous'
+            return authenticated
+        finally:
+            auth_seconds.observe(time.perf_counter() - started, result=result)
+
+    def get_user(self, validated_token):
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+        if not ttl or api_settings.USER_ID_CLAIM not in validated_token or not versions_shared():
+            user_lookups_total.inc(source='db')
+            return super().get_user(validated_token)
+        key = str(validated_token[api_settings.USER_ID_CLAIM])
+        cache = _user_cache()
+        version = user_version(key)
+        cached = cache.get(key)
+        if cached is MISS or cached[0] != version:
+            user_lookups_total.inc(source='db')
+            # The parent runs the lookup and every check; only users that pass are cached, and
+            # only if no save or delete bumped the version while they were being loaded
+            user = super().get_user(validated_token)
+            if user_version(key) == version: cache.set(key, (version, user), ttl)
+        else:
+            user = cached[1]
+            user_lookups_total.inc(source='cache')
+            self.check_user(user, validated_token)
+        # Each request gets its own instance, so nothing a view sets on request.user is shared
+        return copy.copy(user)
+
+    def check_user(self, user, validated_token):
+        """The checks JWTAuthentication.get_user applies after loading the user."""
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+
+def evict_user(sender, instance, **kwargs):
+    user_id = str(getattr(instance, api_settings.USER_ID_FIELD))
+    _user_cache().delete(user_id)
+    bump_user_version(user_id)
+    # Again once the change is visible: a lookup between the two bumps may have read the old row
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+def connect_signals():
+    user_model = get_user_model()
+    post_save.connect(evict_user, sender=user_model, dispatch_uid='auth_user_cache_evict_save')
+    post_delete.connect(evict_user, sender=user_model, dispatch_uid='auth_user_cache_evict_delete')
@@ -0,0 +1,283 @@
+# api/batch.py
+import json
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+
+from .analysis_cache import content_hash, get_analysis_cache
+from .embedding_batcher import get_embedding_batcher
+from .embedding_store import get_embedding_store
+from .model_registry import registry
+from .models import EmbeddingRecord
+from .pipeline import (
+    AnalysisError,
+    build_report,
+    check_grammar,
+    encode_text,
+    extract_contact_info,
+    extract_jd_keywords,
+    extract_text,
+    generate_role_keywords,
+    quality_score_for,
+    skills_from_doc,
+    source_hash,
+    stage_executors,
+)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+def get_extract_pool():
+    # PyPDF2/python-docx are pure Python, so extraction only scales across processes
+    global _extract_pool
+    if _extract_pool is None:
+        with _extract_pool_lock:
+            if _extract_pool is None:
+                _extract_pool = ProcessPoolExecutor(max_workers=getattr(settings, 'BATCH_EXTRACT_WORKERS', 4))
+    return _extract_pool
+
+
+class BatchFiles(list):
+    """[(name, path)] of a batch's resumes, spooled to a temporary directory so neither the
+    request nor the extract pool's task queue holds every file in memory; close() removes them,
+    as does garbage collection of a batch whose stream was never started."""
+
+    def __init__(self):
+        super().__init__()
+        self.directory = tempfile.mkdtemp(prefix='batch-')
+        self._remove = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    def add(self, name, chunks, max_bytes):
+        path = os.path.join(self.directory, f"{len(self)}{os.path.splitext(name)[1].lower()}")
+        written = 0
+        with open(path, 'wb') as out:
+            for chunk in chunks:
+                written += len(chunk)
+                # A zip entry can inflate past the size it declares
+                if written > max_bytes:
+                    raise AnalysisError(f"{name} is larger than {max_bytes} bytes.", 400)
+                out.write(chunk)
+        self.append((name, path))
+
+    def close(self):
+        self._remove()
+
+
+def _read_chunks(f, size=1024 * 1024):
+    return iter(lambda: f.read(size), b'')
+
+
+def collect_batch_files(files, zip_file=None):
+    """Spools the uploaded files and/or a zip of resumes to disk, with size/count limits; the
+    caller owns the returned BatchFiles (run_batch_analysis closes it when it is done)."""
+    max_files = getattr(settings, 'BATCH_MAX_FILES', 500)
+    max_file_bytes = getattr(settings, 'BATCH_MAX_FILE_BYTES', 10 * 1024 * 1024)
+    files = [f for f in files if f.name.lower().endswith(SUPPORTED_EXTENSIONS)]
+    if len(files) > max_files:
+        raise AnalysisError(f"At most {max_files} resumes per batch.", 400)
+    for f in files:
+        if f.size > max_file_bytes:
+            raise AnalysisError(f"{f.name} is larger than {max_file_bytes} bytes.", 400)
+    collected = BatchFiles()
+    try:
+        for f in files:
+            collected.add(f.name, f.chunks(), max_file_bytes)
+        if zip_file is not None:
+            try:
+                with zipfile.ZipFile(zip_file) as archive:
+                    for info in archive.infolist():
+                        name = info.filename
+                        if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                            continue
+                        # Checked against the declared size before decompressing anything
+                        if info.file_size > max_file_bytes:
+                            raise AnalysisError(f"{name} is larger than {max_file_bytes} bytes.", 400)
+                        if len(collected) >= max_files:
+                            raise AnalysisError(f"At most {max_files} resumes per batch.", 400)
+                        with archive.open(info) as member:
+                            collected.add(name, _read_chunks(member), max_file_bytes)
+            except zipfile.BadZipFile:
+                raise AnalysisError("Invalid zip file", 400)
+        if not collected:
+            raise AnalysisError("No PDF or DOCX resumes in the upload.", 400)
+    except BaseException:
+        collected.close()
+        raise
+    return collected
+
+
+def _extract_or_error(path, file_name):
+    try:
+        # Already running in a pool worker, so pages are not fanned out again
+        return extract_text(path, file_name, parallel=False), None
+    except AnalysisError as e:
+        return None, e.message
+
+
+def run_batch_analysis(files, job_role, job_description=''):
+    """Scores many resumes (a BatchFiles, closed once the results are out) against one role/JD,
+    yielding one result per resume as it finishes and a final ranked list.
+
+    The JD is parsed, embedded and the role keywords generated once. Resumes move through
+    in chunks of up to BATCH_ENCODE_SIZE, taken in the order their text extraction finishes:
+    each chunk gets one batched encode and one nlp.pipe call, and its results are emitted
+    before the next chunk is encoded.
+    """
+    nlp = registry.get("nlp")
+    similarity_model = registry.get("similarity")
+    if not nlp or not similarity_model:
+        files.close()
+        raise AnalysisError("AI models failed to load.", 503)
+    # Validation happens above, before the response starts streaming
+    return _iter_batch(nlp, similarity_model, registry.get("grammar"), files, job_role, job_description)
+
+
+def _iter_batch(nlp, similarity_model, grammar, files, job_role, job_description):
+    try:
+        yield from _score_batch(nlp, similarity_model, grammar, files, job_role, job_description)
+    finally:
+        # Also runs when the client disconnects and the response closes the generator
+        files.close()
+
+
+def _extracted(entries, pending, size):
+    """The entries with their text in chunks of up to size, in the order extraction finishes;
+    a chunk goes out with whatever is ready rather than waiting to fill up."""
+    ready = [e for e in entries if e["text"] is not None]
+    not_done = set(pending)
+    while ready or not_done:
+        if not_done:
+            done, not_done = wait(not_done, timeout=0 if ready else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = pending[future]
+                try:
+                    entry["text"], entry["error"] = future.result()
+                except Exception as e:
+                    entry["text"], entry["error"] = None, f"File error: {e}"
+                ready.append(entry)
+        chunk, ready = ready[:size], ready[size:]
+        if chunk: yield chunk
+
+
+def _score_batch(nlp, similarity_model, grammar, files, job_role, job_description):
+    cache = get_analysis_cache()
+    store = get_embedding_store()
+    job_description = (job_description or '').strip()
+    chunk_size = max(1, getattr(settings, 'BATCH_ENCODE_SIZE', 32))
+    nlp_batch_size = getattr(settings, 'BATCH_NLP_BATCH_SIZE', 16)
+    nlp_processes = getattr(settings, 'BATCH_NLP_PROCESSES', 1)
+
+    # 1. JD / role features, once for the whole batch
+    role_keywords = generate_role_keywords(job_role)
+    jd_keywords = jd_embedding = None
+    if job_description:
+        jd_key = content_hash(job_description)
+        jd_keywords = cache.get_or_compute("jd_entities", jd_key, lambda: extract_jd_keywords(nlp, job_description))
+        jd_embedding = cache.get_or_compute("jd_embedding", jd_key, lambda: store.get_or_encode(
+            jd_key, lambda: encode_text(similarity_model, job_description), kind=EmbeddingRecord.KIND_JD))
+
+    # 2. Parallel text extraction from the spooled files (cache hits skip the pool entirely)
+    entries = [{"file_name": name, "file_key": source_hash(path)} for name, path in files]
+    pending = {}
+    for entry, (name, path) in zip(entries, files):
+        entry["text"] = cache.get("text", entry["file_key"])
+        if entry["text"] is None:
+            pending[get_extract_pool().submit(_extract_or_error, path, name)] = entry
+
+    _, io_pool = stage_executors()
+    results = []
+    for chunk in _extracted(entries, pending, chunk_size):
+        scored = []
+        for entry in chunk:
+            if entry["text"]:
+                cache.set("text", entry["file_key"], entry["text"])
+                scored.append(entry)
+                continue
+            result = {"file_name": entry["file_name"], "success": False, "error": entry.get("error") or "Empty file"}
+            results.append(result)
+            yield {"type": "result", **result}
+        if not scored: continue
+
+        # 3. Grammar on the analysis io pool, running while the chunk's encode and NER below do
+        grammar_checks = {}
+        if grammar:
+            for e in scored:
+                if e["file_key"] not in grammar_checks:
+                    grammar_checks[e["file_key"]] = io_pool.submit(cache.get_or_compute, "grammar", e["file_key"],
+                                                                   partial(check_grammar, grammar, e["text"]))
+
+        # 4. One batched encode for the chunk's resumes missing a cached or stored embedding
+        semantic = [None] * len(scored)
+        if jd_embedding is not None:
+            for e in scored: e["text_key"] = content_hash(e["text"])
+            embeddings = [cache.get("embedding", e["file_key"]) for e in scored]
+            embeddings = [emb if emb is not None else store.get(e["text_key"]) for emb, e in zip(embeddings, scored)]
+            missing = [i for i, emb in enumerate(embeddings) if emb is None]
+            if missing:
+                encoded = get_embedding_batcher(similarity_model).encode_many([scored[i]["text"] for i in missing],
+                                                                              batch_size=chunk_size)
+                for i, emb in zip(missing, encoded):
+                    embeddings[i] = store.put(scored[i]["text_key"], emb)
+                    cache.set("embedding", scored[i]["file_key"], emb)
+            matrix = np.vstack(embeddings)
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(jd_embedding)
+            sims = np.divide(matrix @ jd_embedding, norms, out=np.zeros(len(scored), dtype=np.float32), where=norms > 0)
+            semantic = (sims * 100).tolist()
+
+        # 5. NER through nlp.pipe; each resume is scored and emitted as soon as its doc is ready
+        skills = [cache.get("entities", e["file_key"]) for e in scored]
+        to_parse = [i for i, s in enumerate(skills) if s is None]
+        # Starting parser processes costs more than a chunk smaller than their batches saves
+        processes = nlp_processes if len(to_parse) >= nlp_processes * nlp_batch_size else 1
+        docs = iter(nlp.pipe((scored[i]["text"] for i in to_parse), batch_size=nlp_batch_size, n_process=processes))
+        # to_parse is in ascending order, so pulling the next doc lazily keeps results streaming
+        for i, entry in enumerate(scored):
+            if skills[i] is None:
+                skills[i] = skills_from_doc(next(docs))
+                cache.set("entities", entry["file_key"], skills[i])
+            resume_text = entry["text"]
+            contact = extract_contact_info(resume_text)
+            grammar_errors = _grammar_result(grammar_checks.get(entry["file_key"]))
+            quality_score, quality_feedback = quality_score_for(resume_text, contact, skills[i], grammar_errors)
+            report = build_report(job_role, contact, skills[i], quality_score, quality_feedback,
+                                  role_keywords, jd_keywords, semantic[i])
+            result = {"file_name": entry["file_name"], **report}
+            results.append(result)
+            yield {"type": "result", **result}
+
+    ranked = sorted((r for r in results if r["success"]),
+                    key=lambda r: (r["ats_score_jd"] if r["ats_score_jd"] is not None else -1, r["ats_score_role"]),
+                    reverse=True)
+    for rank, r in enumerate(ranked, start=1): r["rank"] = rank
+    failed = [r for r in results if not r["success"]]
+    yield {"type": "ranking", "job_role": job_role,
+           "results": [{k: r.get(k) for k in ("rank", "file_name", "name", "ats_score_role", "ats_score_jd")} for r in ranked] + failed}
+
+
+def _grammar_result(future):
+    # None scores the resume without grammar, as a timed-out check does
+    if future is None: return None
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Grammar check error: {e}")
+        return None
+
+
+def stream_ndjson(events):
+    try:
+        for event in events:
+            yield json.dumps(event) + "\n"
+    finally:
+        # A client that goes away closes the response, and with it the source (a batch removes its files)
+        if hasattr(events, 'close'): events.close()
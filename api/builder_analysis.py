@@ -0,0 +1,151 @@
+# api/builder_analysis.py
+"""Live analysis of a builder Resume straight from resume_data, re-running only what changed.
+
+resume_data is split into sections (api/resume_data.py). Each section's entities, grammar
+matches and embedding are cached under the hash of that section's text, and the section
+hashes of the last analyzed version of each resume are kept, so editing one bullet re-runs
+NER, grammar and the encoder on that one section and merges the others from the cache.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync
+
+from .analysis_cache import content_hash, get_analysis_cache
+from .embedding_batcher import embedding_version, get_embedding_batcher, pool_chunks
+from .model_registry import registry
+from .pipeline import (
+    JD_SCORE_WEIGHTS,
+    AnalysisError,
+    assemble_report,
+    context_stages,
+    entity_groups,
+    skills_from_groups,
+    stage_executors,
+    stage_timeouts,
+)
+from .resume_data import resume_data_sections
+from .stage_graph import Stage, StageGraph, StageTimeout
+
+# Sections whose text is contact details rather than content with a heading
+UNTITLED_SECTIONS = ('personalInfo',)
+
+
+def scoring_text(sections):
+    """The sections as one document, with their names as headings so the section checks in
+    quality_score_for see them the way they would in an uploaded file."""
+    parts = []
+    for name, text in sections.items():
+        parts.append(text if name in UNTITLED_SECTIONS else f"{name}\n{text}")
+    return "\n".join(parts)
+
+
+def _per_section(cache, stage, hashes, texts, compute, hits, recomputed):
+    """{section: result} from the cache, computing the misses in one call of compute(texts)."""
+    results, missing = {}, []
+    for name, section_hash in hashes.items():
+        value = cache.get(stage, section_hash)
+        if value is None: missing.append(name)
+        else: results[name] = value
+    hits[stage] = not missing
+    recomputed[stage] = missing
+    if missing:
+        for name, value in zip(missing, compute([texts[n] for n in missing])):
+            results[name] = value
+            if value is not None: cache.set(stage, hashes[name], value)
+    return results
+
+
+async def analyze_resume_data_async(resume_key, resume_data, job_role, job_description='', cache=None, timings=None):
+    """Analyzes builder content; returns (report, sections) where sections lists what changed
+    since the last analysis of resume_key and which sections each stage had to recompute.
+
+    Per-section results are content-addressed, so an unchanged section is only recomputed
+    when its cache entry has been evicted.
+    """
+    cache = cache or get_analysis_cache()
+    cpu, io_pool = stage_executors()
+    loop = asyncio.get_running_loop()
+    hits, recomputed = {}, {}
+    job_description = job_description or ''
+
+    texts = resume_data_sections(resume_data)
+    if not texts:
+        raise AnalysisError("Resume has no content to analyze.", 400)
+    hashes = {name: content_hash(text) for name, text in texts.items()}
+    jd_key = content_hash(job_description.strip()) if job_description.strip() else None
+
+    previous = await loop.run_in_executor(io_pool, cache.get, "builder_sections", resume_key) or {}
+    sections = {
+        "changed": [name for name, h in hashes.items() if previous.get(name) != h],
+        "removed": [name for name in previous if name not in hashes],
+        "recomputed": recomputed,
+    }
+    await loop.run_in_executor(io_pool, cache.set, "builder_sections", resume_key, hashes)
+
+    report_key = content_hash("builder", *(f"{name}:{h}" for name, h in hashes.items()), job_role, jd_key,
+                              embedding_version(), repr(JD_SCORE_WEIGHTS))
+    report = await loop.run_in_executor(io_pool, cache.get, "report", report_key)
+    hits["report"] = report is not None
+    if report is not None:
+        return report, {**sections, "cache": hits}
+
+    nlp, similarity_model, grammar = await loop.run_in_executor(
+        io_pool, lambda: (registry.get("nlp"), registry.get("similarity"), registry.get("grammar")))
+    if not nlp or not similarity_model:
+        raise AnalysisError("AI models failed to load.", 503)
+    timeouts = stage_timeouts()
+
+    def section_entities(batch):
+        return [tuple(sorted(group) for group in entity_groups(doc)) for doc in nlp.pipe(batch)]
+
+    def entities():
+        parts = _per_section(cache, "section_entities", hashes, texts, section_entities, hits, recomputed)
+        skills, others = set(), set()
+        for section_skills, section_others in parts.values():
+            skills.update(section_skills)
+            others.update(section_others)
+        return skills_from_groups(skills, others)
+
+    def section_grammar(batch):
+        # Every changed section goes to the checker's pool at once, then they are collected
+        return [pending.result() for pending in [grammar.submit(text) for text in batch]]
+
+    def grammar_errors():
+        parts = _per_section(cache, "section_grammar", hashes, texts, section_grammar, hits, recomputed)
+        # A section that missed its deadline leaves the whole resume scored without grammar
+        if any(parts.get(name) is None for name in hashes): return None
+        return [error for name in hashes for error in parts[name]]
+
+    def section_embeddings(batch):
+        # Submitted together, so the batcher encodes the changed sections in one forward pass
+        batcher = get_embedding_batcher(similarity_model)
+        return [future.result() for future in [batcher.submit(text) for text in batch]]
+
+    def embedding():
+        parts = _per_section(cache, "section_embedding", hashes, texts, section_embeddings, hits, recomputed)
+        return pool_chunks([parts[name] for name in hashes], [max(len(texts[name].split()), 1) for name in hashes])
+
+    stages = [
+        Stage("entities", entities, executor=cpu, timeout=timeouts["entities"]),
+        Stage("grammar", lambda: grammar_errors() if grammar else None,
+              executor=io_pool, timeout=timeouts["grammar"], required=False),
+    ]
+    if jd_key:
+        stages.append(Stage("embedding", embedding, executor=cpu, timeout=timeouts["embedding"], required=False))
+    stages += context_stages(job_role, job_description, jd_key, nlp, similarity_model, cache, hits)
+
+    try:
+        results = await StageGraph(stages).run(timings)
+    except StageTimeout as e:
+        raise AnalysisError(f"Analysis timed out ({e.stage}).", 504)
+
+    report, degraded = assemble_report(job_role, scoring_text(texts), results, grammar is not None, jd_key)
+    # A report missing a stage would be served after the stage recovers, so only complete ones are kept
+    if not degraded:
+        await loop.run_in_executor(io_pool, cache.set, "report", report_key, report)
+    return report, {**sections, "cache": hits}
+
+
+def analyze_resume_data(resume_key, resume_data, job_role, job_description='', cache=None, timings=None):
+    """Blocking entry point for views; see analyze_resume_data_async."""
+    return async_to_sync(analyze_resume_data_async)(resume_key, resume_data, job_role, job_description, cache, timings)
@@ -0,0 +1,107 @@
+# api/contact.py
+"""Name / email / phone extraction for resume text.
+
+Every pattern is compiled once and only ever run over bounded windows, so the whole
+extraction is linear in the size of the text: emails are located by scanning for '@'
+and matching inside a window of at most MAX_LOCAL_LEN + MAX_DOMAIN_LEN characters, and
+phone numbers found in the whitespace-free copy of the text are mapped back to the
+original through an offset map instead of a backtracking search.
+"""
+import bisect
+import re
+
+# RFC 5321 limits; also what keeps the email search linear
+MAX_LOCAL_LEN = 64
+MAX_DOMAIN_LEN = 255
+
+LOCAL_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-')
+DOMAIN_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-')
+
+EMAIL_CLEAN_RE = re.compile(r'(?<=[^a-zA-Z0-9])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', re.IGNORECASE)
+EMAIL_MERGED_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', re.IGNORECASE)
+EMAIL_FULL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', re.IGNORECASE)
+PHONE_STRICT_RE = re.compile(r'\+?\d{9,15}\b')
+LONG_NUMBER_RE = re.compile(r'\d{5,}')
+SECTION_HEADING_RE = re.compile(r'(experience|education|skills|projects|summary|profile)', re.IGNORECASE)
+NON_SPACE_RE = re.compile(r'\S+')
+
+
+class StrippedText:
+    """The text with whitespace removed, plus a map from stripped offsets back to the original."""
+
+    def __init__(self, text):
+        chunks, starts, origins, pos = [], [], [], 0
+        for m in NON_SPACE_RE.finditer(text):
+            starts.append(pos)
+            origins.append(m.start())
+            chunks.append(m.group(0))
+            pos += m.end() - m.start()
+        self.text = ''.join(chunks)
+        self._starts = starts
+        self._origins = origins
+
+    def to_original(self, i):
+        k = bisect.bisect_right(self._starts, i) - 1
+        return self._origins[k] + (i - self._starts[k])
+
+
+def first_email(text, pattern):
+    """First match of an email pattern, searched only in a bounded window around each '@'."""
+    n = len(text)
+    at = text.find('@')
+    while at != -1:
+        lo = at
+        while lo > 0 and at - lo < MAX_LOCAL_LEN and text[lo - 1] in LOCAL_CHARS: lo -= 1
+        hi = at + 1
+        while hi < n and hi - at <= MAX_DOMAIN_LEN and text[hi] in DOMAIN_CHARS: hi += 1
+        # One extra character of right context so \b sees what really follows the domain
+        m = pattern.search(text, lo, min(hi + 1, n))
+        if m: return m.group(0)
+        at = text.find('@', hi)
+    return None
+
+
+def find_name(text):
+    for line in text.split('\n'):
+        line = line.strip()
+        if line and '@' not in line and not LONG_NUMBER_RE.search(line) and len(line.split()) < 5:
+            if not SECTION_HEADING_RE.search(line):
+                return line
+    return None
+
+
+def find_email(text, name=None, stripped=None):
+    email = first_email(text, EMAIL_CLEAN_RE)
+    if email: return email
+
+    # PDF extraction often splits an address across spaces/columns, so retry on the merged text
+    merged = (stripped.text if stripped is not None else StrippedText(text).text).replace('|', '')
+    email = first_email(merged, EMAIL_MERGED_RE)
+    if email and name:
+        # The name line tends to run straight into the address once whitespace is gone
+        name_no_space = ''.join(name.split()).lower()
+        if email.lower().startswith(name_no_space):
+            email_part = email[len(name_no_space):]
+            if EMAIL_FULL_RE.fullmatch(email_part):
+                return email_part
+    return email
+
+
+def find_phone(text, stripped=None):
+    stripped = stripped if stripped is not None else StrippedText(text)
+    m = PHONE_STRICT_RE.search(stripped.text)
+    if not m: return None
+    # Last 10 digits of the match, reported with whatever formatting they had in the original
+    end = m.end()
+    start = max(m.start() + (1 if m.group(0).startswith('+') else 0), end - 10)
+    return text[stripped.to_original(start):stripped.to_original(end - 1) + 1].strip()
+
+
+def extract_contact_info(text):
+    stripped = StrippedText(text)
+    name = find_name(text)
+    return {
+        "name": name,
+        "email": find_email(text, name, stripped),
+        "phone": find_phone(text, stripped),
+    }
@@ -0,0 +1,194 @@
+# api/embedding_batcher.py
+"""Sentence embeddings for concurrent analyses, encoded together.
+
+encode() requests that arrive within max_wait of each other are queued and run by one
+thread as a single batched forward pass, sorted by length so each batch pads to similar
+sizes. Texts longer than the encoder's window are split into overlapping word chunks whose
+embeddings are averaged, instead of being cut off at the model's token limit. Chunking
+changes the vector a long text gets, so stored and cached embeddings are keyed on
+embedding_version() (model, pooling mode and chunk size) rather than the model alone.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+from .metrics import metrics
+from .model_registry import SIMILARITY_MODEL_NAME
+
+batch_texts = metrics.histogram('embedding_batch_texts', 'Chunks encoded per batched encoder call.',
+                                buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+queue_seconds = metrics.histogram('embedding_queue_seconds', 'Time an embedding request waited for its batch to start.')
+chunked_total = metrics.counter('embedding_chunked_texts_total', 'Texts longer than the encoder window, embedded as pooled chunks.')
+
+# Words per chunk as a share of the encoder's token window; English runs ~1.3 word pieces a word
+WORDS_PER_TOKEN = 0.6
+DEFAULT_MAX_TOKENS = 256
+# Bump when chunking or pooling changes so vectors made the old way are not reused
+POOLING_MODE = 'chunk-mean-v1'
+
+
+def embedding_version():
+    words = getattr(settings, 'EMBEDDING_CHUNK_WORDS', 0) or 'auto'
+    return f"{SIMILARITY_MODEL_NAME}+{POOLING_MODE}-{words}"
+
+
+def chunk_words(text, window, overlap):
+    """[(chunk, word count)]: text itself when it fits the window, overlapping word windows otherwise."""
+    words = (text or '').split()
+    if len(words) <= window:
+        return [(text, max(len(words), 1))]
+    step = max(1, window - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        part = words[start:start + window]
+        chunks.append((' '.join(part), len(part)))
+        if start + window >= len(words): break
+    return chunks
+
+
+def pool_chunks(vectors, weights):
+    """Word-weighted mean of chunk embeddings, scaled back to their average norm."""
+    if len(vectors) == 1: return vectors[0]
+    pooled = np.average(vectors, axis=0, weights=weights)
+    norm = float(np.linalg.norm(pooled))
+    target = float(np.linalg.norm(vectors, axis=1).mean())
+    return (pooled * (target / norm) if norm else pooled).astype(np.float32)
+
+
+class _Request:
+    __slots__ = ('chunks', 'weights', 'future', 'queued')
+
+    def __init__(self, chunks, weights):
+        self.chunks, self.weights = chunks, weights
+        self.future = Future()
+        self.queued = time.monotonic()
+
+
+class EmbeddingBatcher:
+    """Micro-batches encode() calls from concurrent requests onto one encoder thread.
+
+    The thread takes the first queued request, then keeps collecting for up to max_wait
+    seconds or until max_batch chunks are waiting, and encodes them in one call.
+    Requests queued while a batch runs go into the next one.
+    """
+
+    def __init__(self, model, max_batch=32, max_wait=0.005, window_words=None, overlap_words=None):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        tokens = getattr(model, 'max_seq_length', None) or DEFAULT_MAX_TOKENS
+        self.window_words = window_words or max(16, int(tokens * WORDS_PER_TOKEN))
+        self.overlap_words = overlap_words if overlap_words is not None else self.window_words // 5
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _split(self, text):
+        chunks = chunk_words(text, self.window_words, self.overlap_words)
+        if len(chunks) > 1: chunked_total.inc()
+        return [c for c, _ in chunks], [n for _, n in chunks]
+
+    def _encode_sorted(self, texts, batch_size=None):
+        # Similar lengths side by side so each forward pass pads as little as possible
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        encoded = np.asarray(self.model.encode([texts[i] for i in order], batch_size=batch_size or self.max_batch), dtype=np.float32)
+        batch_texts.observe(len(texts))
+        vectors = np.empty_like(encoded)
+        vectors[order] = encoded
+        return vectors
+
+    def _pooled(self, vectors, splits):
+        out, offset = [], 0
+        for chunks, weights in splits:
+            out.append(pool_chunks(vectors[offset:offset + len(chunks)], weights))
+            offset += len(chunks)
+        return out
+
+    # --- Interactive path: one text per caller, batched across callers ---
+    def submit(self, text):
+        request = _Request(*self._split(text))
+        self._ensure_thread()
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, text, timeout=None):
+        return self.submit(text).result(timeout)
+
+    def _ensure_thread(self):
+        if self._thread is not None: return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+                self._thread.start()
+
+    def close(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None: return
+            batch, size = [first], len(first.chunks)
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                size += len(request.chunks)
+            self._run_batch(batch)
+            if stop: return
+
+    def _run_batch(self, batch):
+        now = time.monotonic()
+        for request in batch: queue_seconds.observe(now - request.queued)
+        try:
+            vectors = self._encode_sorted([c for request in batch for c in request.chunks])
+        except Exception as e:
+            for request in batch: request.future.set_exception(e)
+            return
+        for request, vector in zip(batch, self._pooled(vectors, [(r.chunks, r.weights) for r in batch])):
+            request.future.set_result(vector)
+
+    # --- Bulk path: the caller already holds a batch, so it encodes in its own thread ---
+    def encode_many(self, texts, batch_size=None):
+        if not texts: return np.zeros((0, 0), dtype=np.float32)
+        splits = [self._split(text) for text in texts]
+        vectors = self._encode_sorted([c for chunks, _ in splits for c in chunks], batch_size)
+        return np.vstack(self._pooled(vectors, splits))
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_embedding_batcher(model):
+    """The batcher for model; a new one replaces it when the registry hands out a different model."""
+    global _batcher
+    if _batcher is None or _batcher.model is not model:
+        with _batcher_lock:
+            if _batcher is None or _batcher.model is not model:
+                if _batcher is not None: _batcher.close()
+                _batcher = EmbeddingBatcher(model,
+                                            max_batch=getattr(settings, 'EMBEDDING_BATCH_MAX_SIZE', 32),
+                                            max_wait=getattr(settings, 'EMBEDDING_BATCH_MAX_WAIT_MS', 5) / 1000,
+                                            window_words=getattr(settings, 'EMBEDDING_CHUNK_WORDS', 0) or None)
+    return _batcher
+
+def _forget_batcher():
+    # The encoder thread doesn't survive a fork; a forked worker starts its own on first use
+    global _batcher, _batcher_lock
+    _batcher, _batcher_lock = None, threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_batcher)
@@ -0,0 +1,190 @@
+# api/embedding_store.py
+import os
+import re
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError
+
+from .embedding_batcher import embedding_version
+from .model_registry import SIMILARITY_MODEL_DIM
+from .models import EmbeddingRecord
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+
+class _ArrayFile:
+    """Fixed-width rows appended to a flat binary file and read back through np.memmap.
+
+    int8 files keep one float32 scale per row in a sidecar file so rows can be
+    dequantized in bulk. Appends hold one lock (the thread lock plus flock on the data file)
+    across both files; a row only counts once it and its scale are complete, and the next
+    append truncates whatever a crashed writer left past that.
+    """
+
+    def __init__(self, path, dim, quantized):
+        self.path = path
+        self.dim = dim
+        self.quantized = quantized
+        self.dtype = np.int8 if quantized else np.float32
+        self.row_bytes = dim * np.dtype(self.dtype).itemsize
+        self.scales_path = path + '.scales' if quantized else None
+        self._map = None
+        self._scales = None
+        self._mapped_rows = 0
+        self._lock = threading.Lock()
+
+    def rows(self):
+        rows = self._size(self.path) // self.row_bytes
+        if self.quantized: rows = min(rows, self._size(self.scales_path) // 4)
+        return rows
+
+    @staticmethod
+    def _size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def append(self, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        scale = None
+        if self.quantized:
+            peak = float(np.abs(vector).max())
+            scale = peak / 127 if peak else 1.0
+            data = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+        else:
+            data = vector
+        with self._lock, open(self.path, 'ab') as f:
+            if fcntl: fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                row = self.rows()
+                # Drop a partial row, or a row without its scale, left by a writer that died mid-append
+                if self._size(self.path) != row * self.row_bytes: f.truncate(row * self.row_bytes)
+                f.write(data.tobytes())
+                f.flush()
+                if self.quantized:
+                    with open(self.scales_path, 'ab') as sf:
+                        if self._size(self.scales_path) != row * 4: sf.truncate(row * 4)
+                        sf.write(np.float32(scale).tobytes())
+            finally:
+                if fcntl: fcntl.flock(f, fcntl.LOCK_UN)
+        return row
+
+    def _mapped(self):
+        # Remap only when the file has grown since the last read; rows() only counts rows whose
+        # scale is written too, so the data and scale maps always line up
+        rows = self.rows()
+        if self._map is None or rows != self._mapped_rows:
+            with self._lock:
+                if rows == 0:
+                    return None, None
+                self._map = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(rows, self.dim))
+                if self.quantized:
+                    self._scales = np.memmap(self.scales_path, dtype=np.float32, mode='r', shape=(rows,))
+                    if len(self._scales) != len(self._map):
+                        raise ValueError(f"{self.scales_path} holds {len(self._scales)} scales for {len(self._map)} rows.")
+                self._mapped_rows = rows
+        return self._map, self._scales
+
+    def read(self, row):
+        data, scales = self._mapped()
+        if data is None or row >= len(data): return None
+        if self.quantized:
+            return data[row].astype(np.float32) * scales[row]
+        return np.array(data[row])
+
+    def matrix(self, rows=None):
+        """All rows (or the given row indices) as float32, without a Python-level loop."""
+        data, scales = self._mapped()
+        if data is None: return np.zeros((0, self.dim), dtype=np.float32)
+        if rows is not None:
+            data = data[rows]
+            scales = scales[rows] if scales is not None else None
+        if self.quantized:
+            return data.astype(np.float32) * scales[:, None]
+        return np.asarray(data)
+
+
+class EmbeddingStore:
+    """Embeddings keyed on (text hash, model name, kind), with vectors in per-kind array files.
+
+    The model name and vector width are part of the file name, so switching models starts
+    a new file instead of mixing incompatible vectors. The name defaults to embedding_version(),
+    so a change of pooling or chunk size does the same.
+    """
+
+    def __init__(self, location, model_name=None, dim=SIMILARITY_MODEL_DIM, quantize=False):
+        self.location = str(location)
+        self.model_name = model_name or embedding_version()
+        self.dim = dim
+        self.quantize = quantize
+        self._files = {}
+        os.makedirs(self.location, exist_ok=True)
+
+    def _file(self, kind):
+        f = self._files.get(kind)
+        if f is None:
+            slug = re.sub(r'[^a-zA-Z0-9_.-]+', '_', self.model_name)
+            name = f"{slug}-{self.dim}d-{kind}.{'int8' if self.quantize else 'f32'}"
+            f = self._files[kind] = _ArrayFile(os.path.join(self.location, name), self.dim, self.quantize)
+        return f
+
+    def _records(self, kind):
+        return EmbeddingRecord.objects.filter(model_name=self.model_name, kind=kind, quantized=self.quantize)
+
+    def get(self, text_hash, kind=EmbeddingRecord.KIND_RESUME):
+        record = self._records(kind).filter(text_hash=text_hash).only('row').first()
+        return self._file(kind).read(record.row) if record else None
+
+    def put(self, text_hash, vector, kind=EmbeddingRecord.KIND_RESUME, resume=None, analysis=None):
+        row = self._file(kind).append(vector)
+        try:
+            EmbeddingRecord.objects.create(text_hash=text_hash, model_name=self.model_name, kind=kind, row=row,
+                                           quantized=self.quantize, resume=resume, analysis=analysis)
+        except IntegrityError:
+            # Another worker stored the same text first; its row wins and ours is left unused
+            pass
+        return vector
+
+    def get_or_encode(self, text_hash, encode, kind=EmbeddingRecord.KIND_RESUME):
+        vector = self.get(text_hash, kind)
+        if vector is None:
+            vector = self.put(text_hash, np.asarray(encode(), dtype=np.float32), kind)
+        return vector
+
+    def link(self, text_hash, kind=EmbeddingRecord.KIND_RESUME, resume=None, analysis=None):
+        fields = {}
+        if resume is not None: fields['resume'] = resume
+        if analysis is not None: fields['analysis'] = analysis
+        if fields: self._records(kind).filter(text_hash=text_hash).update(**fields)
+
+    def matrix(self, kind=EmbeddingRecord.KIND_RESUME):
+        """(record ids, float32 matrix) for every stored vector of one kind."""
+        pairs = np.array(list(self._records(kind).order_by('row').values_list('id', 'row')), dtype=np.int64).reshape(-1, 2)
+        return pairs[:, 0], self._file(kind).matrix(pairs[:, 1])
+
+    def similarities(self, query, kind=EmbeddingRecord.KIND_RESUME):
+        """Cosine similarity of query against every stored vector, as (record ids, scores)."""
+        ids, matrix = self.matrix(kind)
+        query = np.asarray(query, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(ids), dtype=np.float32), where=norms > 0)
+        return ids, scores
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_embedding_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EmbeddingStore(getattr(settings, 'EMBEDDING_STORE_LOCATION', os.path.join(settings.BASE_DIR, 'embeddings')),
+                                        quantize=getattr(settings, 'EMBEDDING_STORE_QUANTIZE', False))
+    return _store
@@ -0,0 +1,201 @@
+# api/enhancement.py
+"""AI rewriting of resume bullets, batched, cached and streamed.
+
+A request's bullets are looked up in the analysis cache under their normalized form
+(whitespace and bullet glyphs, line by line) and the instruction; equal bullets are rewritten once.
+Only the misses go upstream, as written (line breaks and all), packed several to a call
+(ENHANCE_BATCH_SIZE bullets, ENHANCE_BATCH_MAX_CHARS characters) as a JSON array, and a
+JSON array is asked for back. Calls run concurrently and each bullet is yielded as soon as
+its call returns. A batch whose answer doesn't line up with its bullets is retried one
+bullet per call.
+"""
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .analysis_cache import content_hash, get_analysis_cache
+from .metrics import metrics
+from .role_keywords import GeminiBackend as RoleKeywordsGemini
+
+DEFAULT_INSTRUCTION = "Rewrite this resume bullet point to be professional."
+SINGLE_PROMPT = "{instruction} Return ONLY the rewritten text.\n\n\"{text}\""
+BATCH_PROMPT = ("{instruction} Rewrite each item of the JSON array below separately. Return ONLY a JSON array "
+                "of strings: one rewritten item per input item, in the same order.\n\n{items}")
+
+_BULLET_RE = re.compile(r'^\s*(?:[-*•▪◦‣]|\d+[.)])\s+')
+_WHITESPACE_RE = re.compile(r'[^\S\n]+')
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+bullets_total = metrics.counter('enhance_bullets_total', 'Bullets enhanced, by where the answer came from (cache, upstream) or error.')
+upstream_calls_total = metrics.counter('enhance_upstream_calls_total', 'Upstream enhancement calls, by backend and result.')
+upstream_seconds = metrics.histogram('enhance_upstream_seconds', 'Time spent in one upstream enhancement call.')
+batch_bullets = metrics.histogram('enhance_batch_bullets', 'Bullets packed into one upstream enhancement call.',
+                                  buckets=(1, 2, 4, 8, 16, 32))
+
+
+def normalize_bullet(text):
+    """The cache and dedupe key of a bullet: each line without its bullet glyph and extra
+    whitespace, blank lines dropped. What goes upstream is the bullet as written."""
+    lines = (_WHITESPACE_RE.sub(' ', _BULLET_RE.sub('', line)).strip() for line in (text or '').splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def parse_batch_answer(text, expected):
+    """The rewritten items of a batch answer, or None when it isn't a JSON array of expected strings."""
+    try:
+        items = json.loads(_FENCE_RE.sub('', (text or '').strip()))
+    except ValueError:
+        return None
+    if not isinstance(items, list) or len(items) != expected or not all(isinstance(i, str) and i.strip() for i in items):
+        return None
+    return [i.strip() for i in items]
+
+
+# --- Backends ---
+class GeminiBackend(RoleKeywordsGemini):
+    """Rewrites through Gemini, one generate_content call per list of texts: a single text with
+    SINGLE_PROMPT, several as a JSON array with BATCH_PROMPT. The lazily created client comes from
+    the role keyword backend it extends; each instance has its own, reused across calls."""
+
+    def rewrite(self, texts, instruction):
+        """One rewritten string per text, or None for each when the answer couldn't be read."""
+        if len(texts) == 1:
+            prompt = SINGLE_PROMPT.format(instruction=instruction, text=texts[0])
+        else:
+            prompt = BATCH_PROMPT.format(instruction=instruction, items=json.dumps(texts, ensure_ascii=False, indent=1))
+        resp = self._client().generate_content(prompt, request_options={"timeout": self.timeout})
+        if len(texts) == 1:
+            return [resp.text.strip().strip('"') or None]
+        return parse_batch_answer(resp.text, len(texts)) or [None] * len(texts)
+
+
+class StubBackend:
+    """Offline stand-in for Gemini (local development, benchmarks): tidies each text deterministically."""
+    name = 'stub'
+
+    def __init__(self, delay=0.0, **kwargs):
+        self.api_key = 'stub'
+        self.delay = delay
+        self.calls = 0
+
+    def rewrite(self, texts, instruction):
+        self.calls += 1
+        if self.delay: time.sleep(self.delay)
+        return [(t[:1].upper() + t[1:]).rstrip('.') + '.' for t in texts]
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+# --- Service ---
+class BulletEnhancer:
+    def __init__(self, backend, batch_size=10, batch_max_chars=6000, max_workers=4, cache=None):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.batch_max_chars = batch_max_chars
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enhance')
+
+    @property
+    def available(self):
+        return bool(self.backend.api_key)
+
+    def _pack(self, texts, size_of=len):
+        batch, size = [], 0
+        for text in texts:
+            if batch and (len(batch) >= self.batch_size or size + size_of(text) > self.batch_max_chars):
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += size_of(text)
+        if batch: yield batch
+
+    def _call(self, keys, texts, instruction):
+        started = time.perf_counter()
+        try:
+            answers = self.backend.rewrite(texts, instruction)
+        except Exception as e:
+            print(f"Enhancement error ({len(texts)} bullets): {e}")
+            upstream_calls_total.inc(backend=self.backend.name, result='error')
+            return keys, [None] * len(keys), str(e)
+        finally:
+            upstream_seconds.observe(time.perf_counter() - started, backend=self.backend.name)
+            batch_bullets.observe(len(texts))
+        upstream_calls_total.inc(backend=self.backend.name, result='ok' if all(answers) else 'unparsed')
+        return keys, answers, None
+
+    def enhance(self, bullets, instruction=None):
+        """Yields {"type": "bullet", "index", "text", "enhanced_text", "cached"} per bullet (or
+        "error" in place of enhanced_text) as each is ready, then one {"type": "done"} summary."""
+        instruction = (instruction or DEFAULT_INSTRUCTION).strip()
+        cache = self.cache or get_analysis_cache()
+        positions, sources = {}, {}
+        for index, bullet in enumerate(bullets):
+            key = normalize_bullet(bullet)
+            if not key:
+                yield {"type": "bullet", "index": index, "text": bullet, "error": "Empty bullet."}
+                continue
+            positions.setdefault(key, []).append(index)
+            # Upstream gets the first spelling as written, so multi-line descriptions keep their lines
+            sources.setdefault(key, bullet.strip())
+
+        def emit(key, enhanced, cached, error=None):
+            for index in positions[key]:
+                bullets_total.inc(source=('cache' if cached else 'upstream') if enhanced else 'error')
+                event = {"type": "bullet", "index": index, "text": bullets[index]}
+                if enhanced: event.update(enhanced_text=enhanced, cached=cached)
+                else: event["error"] = error or "Enhancement failed."
+                yield event
+
+        missing, calls = [], 0
+        for key in positions:
+            enhanced = cache.get("enhance", content_hash(key, instruction))
+            if enhanced is None: missing.append(key)
+            else: yield from emit(key, enhanced, True)
+
+        def submit(keys):
+            return self._executor.submit(self._call, keys, [sources[k] for k in keys], instruction)
+
+        pending = {submit(batch) for batch in self._pack(missing, lambda k: len(sources[k]))}
+        calls += len(pending)
+        while pending:
+            done = next(as_completed(pending))
+            pending.discard(done)
+            keys, answers, error = done.result()
+            for key, enhanced in zip(keys, answers):
+                if enhanced:
+                    cache.set("enhance", content_hash(key, instruction), enhanced)
+                    yield from emit(key, enhanced, False)
+                elif len(keys) > 1 and error is None:
+                    # The batch answer didn't line up; ask for this bullet on its own
+                    pending.add(submit([key]))
+                    calls += 1
+                else:
+                    yield from emit(key, None, False, error)
+        yield {"type": "done", "bullets": len(bullets), "distinct": len(positions),
+               "cached": len(positions) - len(missing), "upstream_calls": calls}
+
+
+_enhancer = None
+_enhancer_lock = threading.Lock()
+
+def get_bullet_enhancer():
+    global _enhancer
+    if _enhancer is None:
+        with _enhancer_lock:
+            if _enhancer is None:
+                backend = BACKENDS[getattr(settings, 'ENHANCE_BACKEND', 'gemini')](
+                    api_key=getattr(settings, 'GEMINI_API_KEY', None),
+                    timeout=getattr(settings, 'ENHANCE_TIMEOUT', 30))
+                _enhancer = BulletEnhancer(backend,
+                                           batch_size=getattr(settings, 'ENHANCE_BATCH_SIZE', 10),
+                                           batch_max_chars=getattr(settings, 'ENHANCE_BATCH_MAX_CHARS', 6000),
+                                           max_workers=getattr(settings, 'ENHANCE_MAX_CONCURRENCY', 4))
+    return _enhancer
@@ -0,0 +1,229 @@
+# api/file_store.py
+"""Content-addressed storage for uploaded resumes.
+
+A file is stored under the SHA-256 of its bytes (uploads/resumes/ab/ab12....pdf), so
+analyzing the same file again writes nothing. StoredFile counts the Analysis and
+AnalysisJob rows pointing at each stored file; deleting the last of them deletes the file.
+With RESUME_STORAGE_COMPRESS, new files are gzipped on disk (as <name>.gz) and inflated
+on open(); PDF and DOCX are mostly compressed already, so it is off by default.
+"""
+import gzip
+import hashlib
+import os
+import re
+import struct
+import threading
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .metrics import metrics
+
+writes_total = metrics.counter('resume_storage_writes_total', 'Resume uploads stored, by whether the content was new or a duplicate.')
+
+CONTENT_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[A-Za-z0-9]+)?$')
+
+
+def content_digest(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(): digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def content_name(name, digest):
+    """Keeps the upload_to directory and the extension (the pipeline dispatches on it)."""
+    directory = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    return os.path.join(directory, digest[:2], digest + extension).replace(os.sep, '/')
+
+
+def is_content_name(name):
+    return bool(name and CONTENT_NAME.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """A FileSystemStorage that names files by their content and writes each distinct file once."""
+
+    def __init__(self, compress=False, **kwargs):
+        super().__init__(**kwargs)
+        self.compress = compress
+
+    # --- Naming ---
+    def save(self, name, content, max_length=None):
+        """Stores content under its hash and takes a reference to it for the row being saved.
+        The reference is taken under the StoredFile row lock before deciding to skip the write,
+        so a release of the last reference can't delete the file in between."""
+        if name is None: name = content.name
+        if not hasattr(content, 'chunks'): content = File(content, name)
+        name = content_name(name, content_digest(content))
+        with transaction.atomic():
+            row = _locked_row(name)
+            if self.exists(name):
+                writes_total.inc(result='duplicate')
+            else:
+                writes_total.inc(result='new')
+                name = super().save(name, content, max_length)
+            row.refcount += 1
+            row.size, row.compressed = self.size(name), self.is_compressed(name)
+            row.save(update_fields=['refcount', 'size', 'compressed'])
+        _pending_add(name)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Same name means same bytes, so an existing file is never a clash to rename around
+        return name
+
+    def _save(self, name, content):
+        plain = super().path(name)
+        target = plain + '.gz' if self.compress else plain
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Written aside and renamed into place: a concurrent upload of the same file writes
+        # the same bytes, and readers never see a partial file
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as out:
+                sink = gzip.GzipFile(fileobj=out, mode='wb', mtime=0) if self.compress else out
+                for chunk in content.chunks(): sink.write(chunk)
+                if self.compress: sink.close()
+            if self.file_permissions_mode is not None: os.chmod(tmp, self.file_permissions_mode)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp): os.remove(tmp)
+        return name
+
+    # --- Files that may be stored gzipped ---
+    def _disk_path(self, name):
+        plain = super().path(name)
+        if not os.path.lexists(plain) and os.path.lexists(plain + '.gz'): return plain + '.gz'
+        return plain
+
+    def is_compressed(self, name):
+        return self._disk_path(name).endswith('.gz') and not name.endswith('.gz')
+
+    def path(self, name):
+        if self.is_compressed(name):
+            # Callers holding a path would read gzip bytes; they fall back to open()
+            raise NotImplementedError(f"{name} is stored compressed; open() it instead.")
+        return super().path(name)
+
+    def exists(self, name):
+        plain = super().path(name)
+        return os.path.lexists(plain) or os.path.lexists(plain + '.gz')
+
+    def _open(self, name, mode='rb'):
+        if self.is_compressed(name):
+            return File(gzip.open(self._disk_path(name), 'rb'), name=name)
+        return super()._open(name, mode)
+
+    def size(self, name):
+        disk_path = self._disk_path(name)
+        if self.is_compressed(name):
+            # gzip's trailer holds the uncompressed size (mod 2**32, far above any upload limit)
+            with open(disk_path, 'rb') as f:
+                f.seek(-4, os.SEEK_END)
+                return struct.unpack('<I', f.read(4))[0]
+        return os.path.getsize(disk_path)
+
+    def delete(self, name):
+        if not name: raise ValueError("The name must be given to delete().")
+        plain = super().path(name)
+        for disk_path in (plain, plain + '.gz'):
+            try: os.remove(disk_path)
+            except FileNotFoundError: pass
+
+
+_storage = None
+
+def get_resume_storage():
+    """The storage behind the resume_file fields (a callable, so settings are read at runtime)."""
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage(compress=getattr(settings, 'RESUME_STORAGE_COMPRESS', False))
+    return _storage
+
+
+# --- Reference counts ---
+# A StoredFile row is locked whenever its count changes or its file is written or deleted. A
+# row at refcount 0 stays until the deleting transaction has committed and _collect() has
+# re-checked it under the lock, so a save racing a release either keeps the file or rewrites it.
+_pending = threading.local()
+
+def _pending_add(name):
+    # References storage.save() took for a row about to be inserted; its post_save consumes them
+    counts = getattr(_pending, 'counts', None)
+    if counts is None: counts = _pending.counts = {}
+    counts[name] = counts.get(name, 0) + 1
+
+def _pending_take(name):
+    counts = getattr(_pending, 'counts', None) or {}
+    if not counts.get(name): return False
+    counts[name] -= 1
+    if not counts[name]: del counts[name]
+    return True
+
+def _locked_row(name):
+    """The StoredFile row for name, created at refcount 0 if missing, locked until the transaction ends."""
+    from .models import StoredFile
+    for _ in range(2):
+        row = StoredFile.objects.select_for_update().filter(name=name).first()
+        if row is not None: return row
+        try:
+            with transaction.atomic():
+                return StoredFile.objects.create(name=name, refcount=0)
+        except IntegrityError:
+            continue  # created concurrently; the locking read now finds it
+    return StoredFile.objects.select_for_update().get(name=name)
+
+def acquire(name):
+    """Takes a reference for a row pointing at an already stored file."""
+    if not is_content_name(name): return
+    storage = get_resume_storage()
+    with transaction.atomic():
+        row = _locked_row(name)
+        row.refcount += 1
+        if not row.size: row.size, row.compressed = _size_or_zero(name), storage.is_compressed(name)
+        row.save(update_fields=['refcount', 'size', 'compressed'])
+
+def release(name):
+    """Drops one reference; the file goes once the transaction that dropped the last one commits."""
+    from .models import StoredFile
+    if not is_content_name(name): return
+    with transaction.atomic():
+        row = StoredFile.objects.select_for_update().filter(name=name).first()
+        if row is None: return
+        row.refcount = max(0, row.refcount - 1)
+        row.save(update_fields=['refcount'])
+        if not row.refcount: transaction.on_commit(lambda: _collect(name))
+
+def _collect(name):
+    from .models import StoredFile
+    with transaction.atomic():
+        row = StoredFile.objects.select_for_update().filter(name=name).first()
+        if row is None or row.refcount: return  # referenced again since the release
+        row.delete()
+        get_resume_storage().delete(name)
+
+def _size_or_zero(name):
+    try:
+        return get_resume_storage().size(name)
+    except OSError:
+        return 0
+
+
+def _on_save(sender, instance, created, **kwargs):
+    if created and instance.resume_file and not _pending_take(instance.resume_file.name):
+        acquire(instance.resume_file.name)
+
+def _on_delete(sender, instance, **kwargs):
+    if instance.resume_file: release(instance.resume_file.name)
+
+def connect_signals():
+    from .models import Analysis, AnalysisJob
+    for model in (Analysis, AnalysisJob):
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'resume_file_acquire_{model.__name__}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'resume_file_release_{model.__name__}')
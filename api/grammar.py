@@ -0,0 +1,229 @@
+# api/grammar.py
+import bisect
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from .analysis_cache import MISS, LocMemBackend, content_hash
+from .metrics import metrics
+
+checks_total = metrics.counter('grammar_checks_total', 'Grammar checks, by outcome (ok, timeout, error).')
+check_seconds = metrics.histogram('grammar_check_seconds', 'Time from submitting a grammar check to its result.')
+tools_abandoned_total = metrics.counter('grammar_tools_abandoned_total', 'LanguageTool instances given up on after running past the deadline.')
+sentences_total = metrics.counter('grammar_sentences_total', 'Sentences seen by the grammar checker, by whether they were cached.')
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+DISALLOWED_CHARS = re.compile(r'[^a-zA-Z0-9\s.,!?\'"-]')
+WHITESPACE = re.compile(r'\s+')
+
+
+def split_sentences(text):
+    """Cleaned, non-empty sentences in order (lines are never merged into one sentence)."""
+    out = []
+    for part in SENTENCE_SPLIT.split(text or ''):
+        clean = WHITESPACE.sub(' ', DISALLOWED_CHARS.sub('', part)).strip()
+        if clean: out.append(clean)
+    return out
+
+
+def _keep(match):
+    # Spelling hits on two-word fragments are almost always names or tech terms
+    return not (match.ruleId == 'MORFOLOGIK_RULE_EN_US' and len(match.context.split()) < 3)
+
+
+def _new_lang_tool(remote_server=None):
+    import language_tool_python
+    if remote_server:
+        return language_tool_python.LanguageTool('en-US', remote_server=remote_server)
+    return language_tool_python.LanguageTool('en-US')
+
+
+class _ToolPool:
+    """LanguageTool instances handed out to one thread at a time; created lazily up to size.
+
+    Checked-out tools are tracked with the deadline of the check they serve, so one stuck past
+    it can be abandoned: its slot goes to a fresh instance and it is closed (which stops a local
+    server and unblocks the thread waiting on it) instead of ever being handed out again.
+    """
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.Queue()
+        self._busy = {}
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None, due=None):
+        try:
+            tool = self._idle.get_nowait()
+        except queue.Empty:
+            tool = self._create_or_wait(timeout)
+        with self._lock: self._busy[id(tool)] = (tool, due)
+        return tool
+
+    def _create_or_wait(self, timeout):
+        with self._lock:
+            create = self._created < self.size
+            if create: self._created += 1
+        if not create:
+            try:
+                return self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("No LanguageTool worker became free in time.")
+        try:
+            return self.factory()
+        except Exception:
+            with self._lock: self._created -= 1
+            raise
+
+    def release(self, tool):
+        with self._lock: checked_out = self._busy.pop(id(tool), None) is not None
+        if checked_out: self._idle.put(tool)
+        else: self._close(tool)  # abandoned while it was running
+
+    def discard(self, tool):
+        # A tool that raised or ran late may have a dead or hung server behind it; the next acquire replaces it
+        with self._lock:
+            if self._busy.pop(id(tool), None) is not None: self._created -= 1
+        self._close(tool)
+
+    def abandon_overdue(self):
+        """Gives up on tools still busy with a check whose deadline has passed; returns how many."""
+        now = time.monotonic()
+        with self._lock:
+            overdue = [tool for tool, due in self._busy.values() if due is not None and due <= now]
+            for tool in overdue: del self._busy[id(tool)]
+            self._created -= len(overdue)
+        for tool in overdue: self._close(tool)
+        return len(overdue)
+
+    def _close(self, tool):
+        try: tool.close()
+        except Exception: pass
+
+
+class PendingCheck:
+    def __init__(self, checker, sentences, known, futures, started):
+        self.checker = checker
+        self.sentences = sentences
+        self.known = known
+        self.futures = futures
+        self.started = started
+        self.deadline_at = started + checker.deadline
+
+    def result(self):
+        """[{rule, message, context}] for the whole text, or None when the deadline passed or a
+        worker failed. Chunks still running keep going and fill the sentence cache."""
+        done, not_done = wait(self.futures, timeout=max(0.0, self.deadline_at - time.monotonic()))
+        outcome = 'ok'
+        if not_done:
+            for f in not_done: f.cancel()
+            outcome = 'timeout'
+            abandoned = self.checker._pool.abandon_overdue()
+            if abandoned: tools_abandoned_total.inc(abandoned)
+        elif any(f.exception() is not None for f in done):
+            print(f"Grammar check error: {next(f.exception() for f in done if f.exception() is not None)}")
+            outcome = 'error'
+        checks_total.inc(outcome=outcome)
+        check_seconds.observe(time.monotonic() - self.started)
+        if outcome != 'ok': return None
+
+        results = dict(self.known)
+        for f in done: results.update(f.result())
+        errors = []
+        for sentence_hash in self.sentences:
+            errors.extend(results.get(sentence_hash, []))
+        return errors
+
+
+class GrammarChecker:
+    """Grammar checking spread over a pool of LanguageTool workers.
+
+    Text is split into sentences; each sentence's matches are cached by its hash, so
+    boilerplate lines seen before cost nothing. The rest are packed into chunks of about
+    chunk_chars and checked in parallel. A check that misses its deadline returns None and
+    the caller scores without grammar.
+    """
+
+    def __init__(self, factory, workers=2, deadline=3.0, chunk_chars=1500, max_chars=20000, cache_entries=20000):
+        self.deadline = deadline
+        self.chunk_chars = chunk_chars
+        self.max_chars = max_chars
+        self._pool = _ToolPool(factory, workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='grammar')
+        self._cache = LocMemBackend(max_entries=cache_entries)
+        # Start one worker now so a broken LanguageTool install fails at load, not per request
+        self._pool.release(self._pool.acquire())
+
+    def submit(self, text):
+        started = time.monotonic()
+        sentences, known, todo = [], {}, {}
+        for sentence in split_sentences((text or '')[:self.max_chars]):
+            sentence_hash = content_hash(sentence)
+            sentences.append(sentence_hash)
+            if sentence_hash in known or sentence_hash in todo: continue
+            cached = self._cache.get(sentence_hash)
+            if cached is MISS:
+                todo[sentence_hash] = sentence
+            else:
+                known[sentence_hash] = cached
+        sentences_total.inc(len(known), cached='true')
+        sentences_total.inc(len(todo), cached='false')
+        due = started + self.deadline
+        futures = [self._executor.submit(self._check_chunk, chunk, due) for chunk in self._chunks(todo)]
+        return PendingCheck(self, sentences, known, futures, started)
+
+    def check(self, text):
+        return self.submit(text).result()
+
+    def _chunks(self, todo):
+        chunk, size = [], 0
+        for item in todo.items():
+            if chunk and size + len(item[1]) > self.chunk_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(item)
+            size += len(item[1]) + 2
+        if chunk: yield chunk
+
+    def _check_chunk(self, chunk, due):
+        # Sentences are separated by blank lines so LanguageTool never joins two of them
+        starts, offset = [], 0
+        for _, sentence in chunk:
+            starts.append(offset)
+            offset += len(sentence) + 2
+        tool = self._pool.acquire(timeout=max(0.0, due - time.monotonic()), due=due)
+        try:
+            matches = tool.check("\n\n".join(sentence for _, sentence in chunk))
+        except Exception:
+            self._pool.discard(tool)
+            raise
+        if time.monotonic() > due:
+            # Its answer is still worth caching, but an instance that missed the deadline is replaced
+            self._pool.discard(tool)
+        else:
+            self._pool.release(tool)
+
+        results = {sentence_hash: [] for sentence_hash, _ in chunk}
+        for m in matches:
+            if not _keep(m): continue
+            sentence_hash = chunk[bisect.bisect_right(starts, m.offset) - 1][0]
+            results[sentence_hash].append({"rule": m.ruleId, "message": m.message, "context": m.context})
+        for sentence_hash, errors in results.items():
+            self._cache.set(sentence_hash, errors, None)
+        return results
+
+
+def load_grammar_checker():
+    remote_server = getattr(settings, 'GRAMMAR_REMOTE_SERVER', None)
+    return GrammarChecker(lambda: _new_lang_tool(remote_server),
+                          workers=getattr(settings, 'GRAMMAR_WORKERS', 2),
+                          deadline=getattr(settings, 'GRAMMAR_DEADLINE', 3.0),
+                          chunk_chars=getattr(settings, 'GRAMMAR_CHUNK_CHARS', 1500),
+                          max_chars=getattr(settings, 'GRAMMAR_MAX_CHARS', 20000),
+                          cache_entries=getattr(settings, 'GRAMMAR_SENTENCE_CACHE_ENTRIES', 20000))
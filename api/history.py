@@ -0,0 +1,73 @@
+# api/history.py
+"""A user's past analyses: keyset-paginated listings, bulk report lookups and score trends.
+
+Listings never load analysis_result (the full report JSON); they read the score columns
+along the (user, created_at, id) index and continue from a cursor instead of an OFFSET,
+so a page costs the same on the first screen as on the thousandth. Trends are GROUP BY
+queries the database answers from the (user, job_role, created_at) index.
+"""
+import base64
+import binascii
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max, Min, Q
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Analysis
+
+LIST_FIELDS = ('id', 'job_role', 'ats_score_general', 'ats_score_jd_match', 'created_at', 'resume_file')
+BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(f"{row['created_at'].isoformat()}|{row['id']}".encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        if created_at is None: raise ValueError
+        return created_at, int(pk)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def history_page(user, limit, cursor=None, job_role=None):
+    """(rows, next_cursor): up to limit analyses, newest first, as dicts of LIST_FIELDS."""
+    queryset = Analysis.objects.filter(user=user)
+    if job_role: queryset = queryset.filter(job_role=job_role)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(queryset.order_by('-created_at', '-id').values(*LIST_FIELDS)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def analyses_by_id(user, ids):
+    """{id: full row including the report} for the user's analyses among ids."""
+    rows = Analysis.objects.filter(user=user, id__in=ids).values(*LIST_FIELDS, 'analysis_result')
+    return {row['id']: row for row in rows}
+
+
+def score_trends(user, bucket='week', job_role=None, days=None):
+    """Per role: totals over the range, and score statistics for each day/week/month bucket."""
+    queryset = Analysis.objects.filter(user=user)
+    if job_role: queryset = queryset.filter(job_role=job_role)
+    if days: queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
+
+    stats = dict(count=Count('id'), avg_score=Avg('ats_score_general'), best_score=Max('ats_score_general'),
+                 worst_score=Min('ats_score_general'), avg_jd_score=Avg('ats_score_jd_match'))
+    roles = {row['job_role']: {**row, "series": []}
+             for row in queryset.values('job_role').annotate(**stats, last_analyzed=Max('created_at')).order_by('job_role')}
+    series = (queryset.annotate(period=BUCKETS[bucket]('created_at'))
+              .values('job_role', 'period').annotate(**stats).order_by('job_role', 'period'))
+    for row in series:
+        roles[row.pop('job_role')]["series"].append(row)
+    return list(roles.values())
@@ -0,0 +1,172 @@
+# api/jobs.py
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .embedding_store import get_embedding_store
+from .metrics import metrics
+from .models import Analysis, AnalysisJob
+from .pipeline import AnalysisError, run_analysis
+
+jobs_enqueued = metrics.counter('analysis_jobs_enqueued_total', 'Analysis jobs accepted into the queue.')
+jobs_rejected = metrics.counter('analysis_jobs_rejected_total', 'Analysis jobs rejected because the queue was full.')
+jobs_finished = metrics.counter('analysis_jobs_finished_total', 'Analysis jobs finished, by status.')
+job_wait_seconds = metrics.histogram('analysis_job_wait_seconds', 'Time jobs spent queued before a worker picked them up.')
+job_run_seconds = metrics.histogram('analysis_job_run_seconds', 'Time workers spent running a job.')
+
+
+def queue_depth():
+    return AnalysisJob.objects.filter(status=AnalysisJob.STATUS_QUEUED).count()
+
+metrics.gauge('analysis_job_queue_depth', 'Jobs waiting in the queue.', function=queue_depth)
+
+
+class QueueFull(Exception):
+    pass
+
+
+def expire_stale_jobs():
+    """Fails running jobs whose lease (ANALYSIS_JOB_LEASE_SECONDS since started_at) ran out: their
+    worker died or hung, and nothing else would ever finish them. Returns how many were failed."""
+    lease = getattr(settings, 'ANALYSIS_JOB_LEASE_SECONDS', 600)
+    if not lease: return 0
+    now = timezone.now()
+    expired = AnalysisJob.objects.filter(status=AnalysisJob.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=lease)).update(
+        status=AnalysisJob.STATUS_FAILED, error="Analysis job did not finish in time (worker lost).", finished_at=now)
+    if expired: jobs_finished.inc(expired, status='expired')
+    return expired
+
+
+def claim_next_job():
+    """Atomically moves the oldest queued job to running; safe across threads and processes."""
+    expire_stale_jobs()
+    while True:
+        job = AnalysisJob.objects.filter(status=AnalysisJob.STATUS_QUEUED).order_by('created_at', 'pk').first()
+        if job is None:
+            return None
+        started_at = timezone.now()
+        claimed = AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_QUEUED).update(
+            status=AnalysisJob.STATUS_RUNNING, started_at=started_at)
+        if claimed:
+            job.status, job.started_at = AnalysisJob.STATUS_RUNNING, started_at
+            return job
+
+
+def _finish(job, status, error='', analysis=None):
+    """Records a job's outcome if it still holds its lease; once expire_stale_jobs has failed it,
+    a late result is dropped rather than flipping it back. Returns whether it was recorded."""
+    finished_at = timezone.now()
+    recorded = AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_RUNNING).update(
+        status=status, error=error, analysis=analysis, finished_at=finished_at)
+    if not recorded:
+        print(f"Analysis job {job.pk} finished after its lease ran out; result dropped.")
+        return False
+    job.status, job.error, job.analysis, job.finished_at = status, error, analysis, finished_at
+    job_run_seconds.observe((finished_at - job.started_at).total_seconds())
+    jobs_finished.inc(status=status)
+    return True
+
+
+def run_job(job):
+    job_wait_seconds.observe((job.started_at - job.created_at).total_seconds())
+    try:
+        try:
+            source = job.resume_file.path
+        except NotImplementedError:
+            # Storage without local paths: fall back to reading the bytes
+            with job.resume_file.open('rb') as f:
+                source = f.read()
+        report, _, keys = run_analysis(source, job.resume_file.name, job.job_role, job.job_description)
+        with transaction.atomic():
+            # Point the Analysis row at the file the job already stored instead of writing a second copy
+            analysis = Analysis.objects.create(user_id=job.user_id, job_role=job.job_role, resume_file=job.resume_file.name,
+                                               ats_score_general=report["ats_score_role"], ats_score_jd_match=report["ats_score_jd"],
+                                               analysis_result=report)
+            if not _finish(job, AnalysisJob.STATUS_DONE, analysis=analysis):
+                transaction.set_rollback(True)
+                return
+    except AnalysisError as e:
+        _finish(job, AnalysisJob.STATUS_FAILED, e.message)
+        return
+    except Exception as e:
+        print(f"Analysis job {job.pk} failed: {e}")
+        _finish(job, AnalysisJob.STATUS_FAILED, str(e))
+        return
+    if keys["text"]: get_embedding_store().link(keys["text"], analysis=analysis)
+
+
+class JobWorkerPool:
+    """A fixed number of worker threads draining the AnalysisJob table.
+
+    Workers are woken when a job is enqueued in this process and otherwise poll, so
+    jobs queued by other processes (or left over from a restart) are picked up too.
+    """
+
+    def __init__(self, workers=2, poll_interval=2.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads: return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f'analysis-worker-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = claim_next_job()
+                if job is not None:
+                    run_job(job)
+                    continue
+            except Exception as e:
+                print(f"Analysis worker error: {e}")
+            finally:
+                close_old_connections()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_worker_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = JobWorkerPool(workers=getattr(settings, 'ANALYSIS_JOB_WORKERS', 2),
+                                      poll_interval=getattr(settings, 'ANALYSIS_JOB_POLL_INTERVAL', 2.0))
+    return _pool
+
+
+def enqueue_analysis(user, resume_file, job_role, job_description=''):
+    # A soft limit: the count and the insert are separate queries, so requests racing each
+    # other can each see room and overshoot ANALYSIS_JOB_MAX_QUEUE by up to their number
+    max_depth = getattr(settings, 'ANALYSIS_JOB_MAX_QUEUE', 100)
+    if max_depth and queue_depth() >= max_depth:
+        jobs_rejected.inc()
+        raise QueueFull(f"Analysis queue is full ({max_depth} jobs waiting).")
+    job = AnalysisJob.objects.create(user=user, job_role=job_role, job_description=job_description or '', resume_file=resume_file)
+    jobs_enqueued.inc()
+    if getattr(settings, 'ANALYSIS_JOB_RUN_IN_PROCESS', True):
+        pool = get_worker_pool()
+        pool.start()
+        pool.notify()
+    return job
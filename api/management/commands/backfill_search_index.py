@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.model_registry import registry
+from api.models import Analysis, Resume
+from api.semantic_search import index_analysis, index_resume
+
+
+class Command(BaseCommand):
+    help = ("Embed and index the builder resumes and analyses that semantic search doesn't know about yet "
+            "(rows saved before uploads were indexed, or while the similarity model was unavailable).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes-only', action='store_true', help="Skip analyses.")
+        parser.add_argument('--analyses-only', action='store_true', help="Skip builder resumes.")
+        parser.add_argument('--limit', type=int, default=0, help="Index at most this many rows of each kind (0: all).")
+
+    def handle(self, *args, **options):
+        if not registry.get("similarity"):
+            raise CommandError("The similarity model failed to load.")
+        limit = options['limit'] or None
+
+        if not options['analyses_only']:
+            resumes = Resume.objects.filter(embeddings__isnull=True).order_by('pk').values_list('pk', flat=True)[:limit]
+            indexed = 0
+            for pk in resumes:
+                index_resume(pk)
+                indexed += 1
+            self.stdout.write(self.style.SUCCESS(f"{indexed} builder resumes indexed"))
+
+        if not options['resumes_only']:
+            analyses = Analysis.objects.filter(embeddings__isnull=True).exclude(resume_file='').order_by('pk')[:limit]
+            indexed = failed = 0
+            for analysis in analyses.iterator():
+                if index_analysis(analysis): indexed += 1
+                else: failed += 1
+            self.stdout.write(self.style.SUCCESS(f"{indexed} analyses indexed"))
+            if failed: self.stdout.write(self.style.WARNING(f"{failed} analyses skipped (file missing or unreadable)"))
@@ -0,0 +1,83 @@
+import os
+from collections import Counter
+
+from django.core.files.base import File
+from django.core.management.base import BaseCommand
+
+from api.file_store import content_digest, content_name, get_resume_storage, is_content_name
+from api.models import Analysis, AnalysisJob, StoredFile
+
+UPLOAD_DIR = 'uploads/resumes/'
+
+
+class Command(BaseCommand):
+    help = ("Move uploaded resumes into content-addressed storage: one file per distinct content, "
+            "rows repointed at it, reference counts rebuilt.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without touching files or rows.")
+        parser.add_argument('--delete-orphans', action='store_true', help="Also delete files no row refers to.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = get_resume_storage()
+        models = (Analysis, AnalysisJob)
+        referenced = set()
+        for model in models:
+            referenced.update(n for n in model.objects.exclude(resume_file='').values_list('resume_file', flat=True).distinct())
+
+        # 1. Every file still stored under its upload name gets its content name
+        moved, missing, freed = {}, [], 0
+        for old in sorted(n for n in referenced if not is_content_name(n)):
+            if not storage.exists(old):
+                missing.append(old)
+                continue
+            with storage.open(old, 'rb') as f:
+                new = content_name(old, content_digest(File(f))) if dry_run else storage.save(old, f)
+            moved[old] = new
+        duplicates = len(moved) - len(set(moved.values()))
+
+        if not dry_run:
+            for old, new in moved.items():
+                for model in models:
+                    # update() skips the save/delete signals; the counts are rebuilt below
+                    model.objects.filter(resume_file=old).update(resume_file=new)
+                freed += storage.size(old)
+                storage.delete(old)
+
+        # 2. Reference counts from the rows as they are now
+        counts = Counter()
+        for model in models:
+            counts.update(model.objects.exclude(resume_file='').values_list('resume_file', flat=True))
+        if dry_run:
+            renamed = Counter()
+            for name, n in counts.items(): renamed[moved.get(name, name)] += n
+            counts = renamed
+        else:
+            StoredFile.objects.exclude(name__in=list(counts)).delete()
+            for name, refcount in counts.items():
+                if not is_content_name(name) or not storage.exists(name): continue
+                StoredFile.objects.update_or_create(name=name, defaults={
+                    "refcount": refcount, "size": storage.size(name),
+                    "compressed": storage.is_compressed(name)})
+
+        # 3. Files nothing points at
+        orphans = []
+        root = os.path.join(storage.location, UPLOAD_DIR)
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                name = os.path.relpath(os.path.join(directory, file_name), storage.location).replace(os.sep, '/')
+                logical = name[:-3] if name.endswith('.gz') and is_content_name(name[:-3]) else name
+                if logical not in counts and logical not in moved: orphans.append(name)
+        if options['delete_orphans'] and not dry_run:
+            for name in orphans:
+                freed += os.path.getsize(os.path.join(storage.location, name))
+                os.remove(os.path.join(storage.location, name))
+
+        prefix = "[dry run] " if dry_run else ""
+        self.stdout.write(f"{prefix}{len(moved)} files moved to content names, {duplicates} of them duplicates")
+        self.stdout.write(f"{prefix}{len(counts)} distinct files referenced by {sum(counts.values())} rows")
+        self.stdout.write(f"{prefix}{len(orphans)} orphaned files{' deleted' if options['delete_orphans'] and not dry_run else ''}")
+        if freed: self.stdout.write(self.style.SUCCESS(f"{freed} bytes freed"))
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f"missing on disk: {name}"))
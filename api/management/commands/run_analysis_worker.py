@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.jobs import JobWorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run a standalone pool of workers that drain the queued analysis jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'ANALYSIS_JOB_WORKERS', 2),
+                            help="Worker threads (default: ANALYSIS_JOB_WORKERS).")
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'ANALYSIS_JOB_POLL_INTERVAL', 2.0),
+                            help="Seconds between polls for jobs queued elsewhere (default: ANALYSIS_JOB_POLL_INTERVAL).")
+
+    def handle(self, *args, **options):
+        pool = JobWorkerPool(workers=options['workers'], poll_interval=options['poll_interval'])
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(f"Analysis worker running with {options['workers']} threads."))
+        try:
+            while True: time.sleep(60)
+        except KeyboardInterrupt:
+            pool.stop()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.model_registry import registry
+
+
+class Command(BaseCommand):
+    help = "Load the analyzer's AI models and report load time and memory for each."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help=f"Subset of models to load (default: all of {', '.join(registry.names())}).")
+
+    def handle(self, *args, **options):
+        status = registry.warm(options['models'] or None)
+        for name, info in status.items():
+            if info['state'] == 'not_loaded': continue
+            memory = f"{info['memory_bytes'] / (1024 * 1024):.0f} MB" if info['memory_bytes'] is not None else "n/a"
+            line = f"{name}: {info['state']} in {info['load_seconds']}s, {memory}"
+            if info['error']:
+                self.stderr.write(self.style.ERROR(f"{line} ({info['error']})"))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
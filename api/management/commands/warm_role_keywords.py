@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Analysis
+from api.role_keywords import FALLBACK_ROLE_SKILLS, get_role_keyword_service, normalize_role
+
+
+class Command(BaseCommand):
+    help = "Generate and cache role keywords for every known role (built-in roles plus roles seen in past analyses)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('roles', nargs='*', help="Roles to warm (default: all known roles).")
+        parser.add_argument('--refresh', action='store_true', help="Call the backend even if a fresh row is cached.")
+
+    def handle(self, *args, **options):
+        roles = options['roles']
+        if not roles:
+            roles = list(FALLBACK_ROLE_SKILLS) + list(Analysis.objects.values_list('job_role', flat=True).distinct())
+        seen = set()
+        service = get_role_keyword_service()
+        for role in roles:
+            if normalize_role(role) in seen or not role.strip(): continue
+            seen.add(normalize_role(role))
+            keywords = service.get(role, refresh=options['refresh'])
+            self.stdout.write(self.style.SUCCESS(f"{role}: {len(keywords)} keywords"))
@@ -0,0 +1,255 @@
+# api/metrics.py
+import bisect
+import json
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text=''):
+        self.name, self.help = name, help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(dict(k), v) for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text='', function=None):
+        super().__init__(name, help_text)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        # function returns either one value or a list of (labels, value) pairs
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                return []
+            return value if isinstance(value, list) else [({}, value)]
+        return super().samples()
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def samples(self):
+        # Buckets are cumulative and keyed by their upper bound, as in the Prometheus format
+        with self._lock:
+            out = []
+            for k, v in self._values.items():
+                running, buckets = 0, {}
+                for bound, count in zip([f"{b:g}" for b in self.buckets] + ["+Inf"], v["counts"]):
+                    running += count
+                    buckets[bound] = running
+                out.append((dict(k), {"buckets": buckets, "sum": v["sum"], "count": v["count"]}))
+            return out
+
+
+class MetricsRegistry:
+    """Process-local metrics; get-or-create so modules can declare the same metric independently."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text=''):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text='', function=None):
+        return self._get_or_create(Gauge, name, help_text, function=function)
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self):
+        return {m.name: {"type": m.kind, "help": m.help, "samples": [{"labels": l, "value": v} for l, v in m.samples()]}
+                for m in self.metrics()}
+
+
+metrics = MetricsRegistry()
+
+
+# --- Exposition ---
+def _labels_text(labels):
+    if not labels: return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    if isinstance(value, bool): return str(int(value))
+    if isinstance(value, int): return str(value)
+    value = float(value)
+    if value != value: return 'NaN'
+    if value in (float('inf'), float('-inf')): return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def render_prometheus(snapshots=None):
+    """{worker: registry snapshot} (by default every worker's, see worker_snapshots()) in the
+    Prometheus text exposition format (version 0.0.4), each sample labelled with its worker."""
+    merged = {}
+    for worker, snapshot in (snapshots if snapshots is not None else worker_snapshots()).items():
+        for name, m in snapshot.items():
+            _, _, samples = merged.setdefault(name, (m["type"], m["help"], []))
+            samples += [({"worker": worker, **s["labels"]}, s["value"]) for s in m["samples"]]
+    lines = []
+    for name, (kind, help_text, samples) in merged.items():
+        if help_text: lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if kind == 'histogram':
+                for bound, count in value["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels_text({**labels, 'le': bound})} {count}")
+                lines.append(f"{name}_sum{_labels_text(labels)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels_text(labels)} {value['count']}")
+            elif value is not None:
+                lines.append(f"{name}{_labels_text(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Several worker processes ---
+class SnapshotDirectory:
+    """Shares the registries of the worker processes on one host through a directory.
+
+    Each process rewrites <location>/<pid>.json with its snapshot every interval seconds (and
+    whenever it serves a scrape), so whichever worker a scrape lands on reports all of them.
+    Files of processes that have exited are removed; their counters drop out, which
+    Prometheus reads as a reset.
+    """
+
+    def __init__(self, location, registry=metrics, interval=10):
+        self.location = str(location)
+        self.registry = registry
+        self.interval = interval
+        self._thread = None
+        os.makedirs(self.location, exist_ok=True)
+
+    def _path(self, pid):
+        return os.path.join(self.location, f"{pid}.json")
+
+    def publish(self):
+        path = self._path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f: json.dump(self.registry.snapshot(), f)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """{pid: snapshot} for every live process that has published, this one freshly."""
+        self.publish()
+        snapshots = {}
+        for entry in sorted(os.listdir(self.location)):
+            pid, ext = os.path.splitext(entry)
+            if ext != '.json' or not pid.isdigit(): continue
+            if not _alive(int(pid)):
+                try: os.remove(os.path.join(self.location, entry))
+                except OSError: pass
+                continue
+            try:
+                with open(os.path.join(self.location, entry)) as f: snapshots[pid] = json.load(f)
+            except (OSError, ValueError):
+                continue  # removed since the listing
+        return snapshots
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='metrics-publisher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"Metrics publish error: {e}")
+            time.sleep(self.interval)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_directory = None
+
+def share_snapshots(location, interval=10):
+    """Starts publishing this process's (and its forked children's) metrics to location."""
+    global _directory
+    _directory = SnapshotDirectory(location, interval=interval)
+    _directory.start()
+    return _directory
+
+def restart_after_fork():
+    # The publishing thread doesn't survive a fork; gunicorn.conf.py calls this in each worker
+    if _directory is not None: _directory.start()
+
+def worker_snapshots():
+    """{pid: snapshot}: every worker's when share_snapshots() was called, this process's otherwise."""
+    if _directory is not None: return _directory.collect()
+    return {str(os.getpid()): metrics.snapshot()}
+
+
+def server_timing_header(timings):
+    """Server-Timing value for {stage: {"ms", "status"}} timings, e.g. 'text;dur=12.5, grammar;desc="timeout";dur=3000'."""
+    parts = []
+    for name, t in timings.items():
+        desc = f';desc="{t["status"]}"' if t.get("status", "ok") != "ok" else ''
+        parts.append(f"{name}{desc};dur={t['ms']}")
+    return ", ".join(parts)
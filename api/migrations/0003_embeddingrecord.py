@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_analysisjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64)),
+                ('model_name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('resume', 'Resume'), ('jd', 'Job Description')], default='resume', max_length=10)),
+                ('row', models.IntegerField()),
+                ('quantized', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('analysis', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='embeddings', to='api.analysis')),
+                ('resume', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='embeddings', to='api.resume')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model_name', 'kind', 'row'], name='api_embeddi_model_n_3f5d4c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('text_hash', 'model_name', 'kind'), name='unique_embedding_per_model')],
+            },
+        ),
+    ]
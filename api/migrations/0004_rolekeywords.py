@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_embeddingrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleKeywords',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role_key', models.CharField(max_length=255, unique=True)),
+                ('job_role', models.CharField(max_length=255)),
+                ('keywords', models.JSONField()),
+                ('source', models.CharField(max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_rolekeywords'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='analysis_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['user', 'job_role', 'created_at'], name='analysis_user_role_idx'),
+        ),
+    ]
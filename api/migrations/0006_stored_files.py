@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:37
+
+import api.file_store
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_analysis_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('compressed', models.BooleanField(default=False)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='analysis',
+            name='resume_file',
+            field=models.FileField(storage=api.file_store.get_resume_storage, upload_to='uploads/resumes/'),
+        ),
+        migrations.AlterField(
+            model_name='analysisjob',
+            name='resume_file',
+            field=models.FileField(storage=api.file_store.get_resume_storage, upload_to='uploads/resumes/'),
+        ),
+    ]
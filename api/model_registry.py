@@ -0,0 +1,172 @@
+# api/model_registry.py
+import json
+import os
+import threading
+import time
+
+from .metrics import metrics
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, memory figures are reported as None without it
+    psutil = None
+
+
+def _rss_bytes():
+    if psutil is None: return None
+    try:
+        return psutil.Process(os.getpid()).memory_info().rss
+    except Exception:
+        return None
+
+
+def _uss_bytes():
+    # Memory only this process holds; pages still shared with a preloading parent don't count
+    if psutil is None: return None
+    try:
+        return psutil.Process(os.getpid()).memory_full_info().uss
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Loads heavy models on first use (or on an explicit warm-up) exactly once per process.
+
+    Loads are serialized behind a single lock so the RSS delta recorded for each model
+    is not polluted by a concurrent load; lookups of already-loaded models take no lock.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.RLock()
+        if hasattr(os, 'register_at_fork'):
+            # A worker forked while another thread held the lock would otherwise never get it back
+            os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.RLock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._stats.setdefault(name, {"state": "not_loaded", "load_seconds": None, "memory_bytes": None, "error": None})
+
+    def names(self):
+        return list(self._loaders)
+
+    def get(self, name):
+        if name in self._models:
+            return self._models[name]
+        with self._lock:
+            if name in self._models:
+                return self._models[name]
+            loader = self._loaders[name]
+            self._stats[name]["state"] = "loading"
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            try:
+                model = loader()
+                error = None
+            except Exception as e:
+                print(f"Error loading model '{name}': {e}")
+                model, error = None, str(e)
+            rss_after = _rss_bytes()
+            self._stats[name].update({
+                "state": "ready" if model is not None else "failed",
+                "load_seconds": round(time.perf_counter() - started, 3),
+                "memory_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+                "error": error,
+            })
+            # Failures are remembered too, so a broken model doesn't cost a reload attempt per request.
+            self._models[name] = model
+            return model
+
+    def is_ready(self, name):
+        return self._models.get(name) is not None
+
+    def warm(self, names=None):
+        """Loads names (every registered model when None; an empty list loads nothing)."""
+        for name in (self.names() if names is None else names):
+            self.get(name)
+        return self.status()
+
+    def reset(self, name=None):
+        with self._lock:
+            for n in ([name] if name else self.names()):
+                self._models.pop(n, None)
+                self._stats[n].update({"state": "not_loaded", "load_seconds": None, "memory_bytes": None, "error": None})
+
+    def status(self):
+        return {name: dict(self._stats[name]) for name in self.names()}
+
+
+# --- Skills vocabulary (cheap, loaded at import) ---
+def load_skill_keywords():
+    skills_file_path = os.path.join(os.path.dirname(__file__), 'skills.json')
+    if not os.path.exists(skills_file_path): return []
+    try:
+        with open(skills_file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading skills.json: {e}")
+        return []
+
+SKILL_KEYWORDS = load_skill_keywords()
+
+
+SIMILARITY_MODEL_NAME = 'all-MiniLM-L6-v2'
+SIMILARITY_MODEL_DIM = 384
+
+
+# --- Loaders (heavy imports stay inside so importing this module is free) ---
+def _load_nlp():
+    # Which spaCy components get loaded is decided by settings.NLP_PROFILE, see api/nlp_profile.py
+    from .nlp_profile import load_nlp
+    return load_nlp()
+
+def _load_similarity_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SIMILARITY_MODEL_NAME)
+
+def _load_grammar():
+    # A pool of LanguageTool workers behind a deadline, see api/grammar.py
+    from .grammar import load_grammar_checker
+    return load_grammar_checker()
+
+
+registry = ModelRegistry()
+
+
+# --- Sharing loaded models between forked workers ---
+def preload_shared(names=None):
+    """Loads models in a server master that is about to fork its workers (gunicorn preload_app).
+
+    Workers then read the master's model weights copy-on-write instead of each loading a
+    private copy. gc.freeze() parks everything loaded so far outside the collector, so the
+    workers' collections don't touch (and thereby copy) the pages holding those objects.
+    """
+    import gc
+    status = registry.warm(names)
+    gc.collect()
+    gc.freeze()
+    return status
+
+
+def _model_samples(field):
+    return lambda: [({"model": name}, info[field]) for name, info in registry.status().items() if info[field] is not None]
+
+metrics.gauge('ai_model_memory_bytes', 'RSS growth measured while each model loaded.', function=_model_samples("memory_bytes"))
+metrics.gauge('ai_model_load_seconds', 'How long each model took to load.', function=_model_samples("load_seconds"))
+metrics.gauge('ai_model_ready', 'Whether each model is loaded (1) or not (0).',
+              function=lambda: [({"model": name}, int(registry.is_ready(name))) for name in registry.names()])
+metrics.gauge('process_resident_memory_bytes', 'Resident memory of this worker process.', function=_rss_bytes)
+metrics.gauge('process_unique_memory_bytes', 'Memory of this worker process not shared with any other process.', function=_uss_bytes)
+
+registry.register("nlp", _load_nlp)
+registry.register("similarity", _load_similarity_model)
+registry.register("grammar", _load_grammar)
+
+# No analysis runs without these; the others only drop a part of the report (grammar scoring)
+REQUIRED_MODELS = ("nlp", "similarity")
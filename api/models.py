@@ -2,6 +2,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .file_store import get_resume_storage
+
 # --- Ensure this class definition exists and is spelled correctly ---
 class Resume(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -19,8 +21,8 @@ class Resume(models.Model):
 class Analysis(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     job_role = models.CharField(max_length=255)
-    # We'll upload files to a 'uploads/resumes/' folder
-    resume_file = models.FileField(upload_to='uploads/resumes/')
+    # We'll upload files to a 'uploads/resumes/' folder, one copy per distinct file (api/file_store.py)
+    resume_file = models.FileField(upload_to='uploads/resumes/', storage=get_resume_storage)
     
     # Store the scores separately for easy querying/charts later
     ats_score_general = models.IntegerField()
@@ -31,5 +33,96 @@ class Analysis(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # History pages walk (user, created_at, id) newest first; trends group by role within a user
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='analysis_user_created_idx'),
+            models.Index(fields=['user', 'job_role', 'created_at'], name='analysis_user_role_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.job_role} ({self.created_at.strftime('%Y-%m-%d')})"
+
+# --- Background analysis jobs (DB-backed queue, see api/jobs.py) ---
+class AnalysisJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    job_role = models.CharField(max_length=255)
+    job_description = models.TextField(blank=True, default='')
+    resume_file = models.FileField(upload_to='uploads/resumes/', storage=get_resume_storage)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    error = models.TextField(blank=True, default='')
+
+    # Set once the job finishes; the report itself lives on the Analysis row
+    analysis = models.ForeignKey(Analysis, null=True, blank=True, on_delete=models.SET_NULL)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Job {self.pk} - {self.job_role} ({self.status})"
+
+
+# --- Stored embeddings (vectors live in an array file, see api/embedding_store.py) ---
+class EmbeddingRecord(models.Model):
+    KIND_RESUME = 'resume'
+    KIND_JD = 'jd'
+    KIND_CHOICES = [(KIND_RESUME, 'Resume'), (KIND_JD, 'Job Description')]
+
+    text_hash = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_RESUME)
+    # Row index into the model/kind array file
+    row = models.IntegerField()
+    quantized = models.BooleanField(default=False)
+
+    resume = models.ForeignKey(Resume, null=True, blank=True, on_delete=models.SET_NULL, related_name='embeddings')
+    analysis = models.ForeignKey(Analysis, null=True, blank=True, on_delete=models.SET_NULL, related_name='embeddings')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['text_hash', 'model_name', 'kind'], name='unique_embedding_per_model')]
+        indexes = [models.Index(fields=['model_name', 'kind', 'row'])]
+
+    def __str__(self):
+        return f"{self.kind} embedding {self.text_hash[:12]} ({self.model_name})"
+
+# --- Cached role keywords (see api/role_keywords.py) ---
+class RoleKeywords(models.Model):
+    # Normalized role (lower-cased, single-spaced) so "Data Scientist " and "data scientist" share a row
+    role_key = models.CharField(max_length=255, unique=True)
+    job_role = models.CharField(max_length=255)
+    keywords = models.JSONField()
+    source = models.CharField(max_length=20)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.job_role} ({len(self.keywords)} keywords, {self.source})"
+
+
+# --- Stored upload files (content-addressed, see api/file_store.py) ---
+class StoredFile(models.Model):
+    # Storage name, i.e. the content hash, and how many Analysis/AnalysisJob rows point at it
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    compressed = models.BooleanField(default=False)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f"{self.user.username} - {self.job_role} ({self.created_at.strftime('%Y-%m-%d')})"
\ No newline at end of file
+        return f"{self.name} ({self.refcount} refs)"
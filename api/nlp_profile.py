@@ -0,0 +1,104 @@
+# api/nlp_profile.py
+"""How the spaCy side of the analyzer is built (settings.NLP_PROFILE).
+
+The analyzer only ever reads doc.ents, so the tagger, parser and lemmatizer are dead weight:
+
+- "full":  the whole model plus the SKILL EntityRuler (the original setup).
+- "ner":   the model without the components nothing reads, plus the SKILL EntityRuler.
+- "ruler": the SKILL EntityRuler alone on a blank English pipeline; the statistical NER
+           only runs for texts where the ruler found no SKILL entity (NLP_NER_FALLBACK).
+"""
+from django.conf import settings
+
+from .metrics import metrics
+from .model_registry import SKILL_KEYWORDS
+
+PROFILES = ('full', 'ner', 'ruler')
+# Components of the en_core_web_* pipelines that never touch doc.ents
+UNUSED_COMPONENTS = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
+
+ner_fallback_total = metrics.counter('nlp_ner_fallback_total', 'Texts the SKILL ruler found nothing in, so statistical NER ran.')
+
+
+def _add_skill_ruler(nlp, before=None):
+    if SKILL_KEYWORDS and "entity_ruler" not in nlp.pipe_names:
+        ruler = nlp.add_pipe("entity_ruler", before=before, config={"phrase_matcher_attr": "LOWER"})
+        ruler.add_patterns([{"label": "SKILL", "pattern": skill} for skill in SKILL_KEYWORDS])
+    return nlp
+
+
+def _uses_static_vectors(config):
+    if isinstance(config, dict):
+        if config.get("include_static_vectors"): return True
+        return any(_uses_static_vectors(v) for v in config.values())
+    return False
+
+
+def load_ner_pipeline(model_name, drop_vectors=False):
+    """model_name with only what NER needs loaded."""
+    import spacy
+    nlp = spacy.load(model_name, exclude=UNUSED_COMPONENTS)
+    # The shared tok2vec only feeds the excluded components unless NER listens to it
+    if "tok2vec" in nlp.pipe_names and "ner" not in nlp.get_pipe("tok2vec").listening_components:
+        nlp.disable_pipe("tok2vec")
+    if drop_vectors:
+        if _uses_static_vectors(nlp.config.interpolate()):
+            print(f"NLP: keeping the word vectors of {model_name}, its NER uses them as features")
+        else:
+            nlp.vocab.reset_vectors(width=0)
+    return nlp
+
+
+class SkillNLP:
+    """EntityRuler first, statistical NER only for texts without a SKILL entity.
+
+    Behaves like a spaCy pipeline for the analyzer's purposes: calling it or pipe() yields
+    docs whose .ents carry SKILL entities, or the NER's ORG/PRODUCT/LANGUAGE fallbacks.
+    """
+
+    def __init__(self, ruler_nlp, ner_nlp=None):
+        self.ruler_nlp = ruler_nlp
+        self.ner_nlp = ner_nlp
+
+    @property
+    def pipe_names(self):
+        return self.ruler_nlp.pipe_names + ([f"fallback:{n}" for n in self.ner_nlp.pipe_names] if self.ner_nlp else [])
+
+    def _needs_fallback(self, doc):
+        return self.ner_nlp is not None and not any(ent.label_ == "SKILL" for ent in doc.ents)
+
+    def __call__(self, text):
+        doc = self.ruler_nlp(text)
+        if not self._needs_fallback(doc): return doc
+        ner_fallback_total.inc()
+        return self.ner_nlp(text)
+
+    def pipe(self, texts, batch_size=16, n_process=1):
+        # The ruler pass is cheap, so it runs over everything first; NER docs are then pulled
+        # lazily, in order, from one (possibly multi-process) pipe over just the fallbacks
+        texts = list(texts)
+        docs = list(self.ruler_nlp.pipe(texts, batch_size=batch_size))
+        fallback = [i for i, doc in enumerate(docs) if self._needs_fallback(doc)]
+        ner_fallback_total.inc(len(fallback))
+        ner_docs = iter(self.ner_nlp.pipe((texts[i] for i in fallback), batch_size=batch_size, n_process=n_process)) if fallback else iter(())
+        fallback = set(fallback)
+        for i, doc in enumerate(docs):
+            yield next(ner_docs) if i in fallback else doc
+
+
+def load_nlp():
+    import spacy
+    profile = getattr(settings, 'NLP_PROFILE', 'ruler')
+    model_name = getattr(settings, 'NLP_MODEL', 'en_core_web_lg')
+    drop_vectors = getattr(settings, 'NLP_DROP_VECTORS', False)
+    if profile not in PROFILES:
+        raise ValueError(f"NLP_PROFILE must be one of {', '.join(PROFILES)}, not '{profile}'")
+
+    if profile == 'full':
+        return _add_skill_ruler(spacy.load(model_name), before="ner")
+    if profile == 'ner':
+        return _add_skill_ruler(load_ner_pipeline(model_name, drop_vectors), before="ner")
+
+    ruler_nlp = _add_skill_ruler(spacy.blank("en"))
+    ner_nlp = load_ner_pipeline(model_name, drop_vectors) if getattr(settings, 'NLP_NER_FALLBACK', True) else None
+    return SkillNLP(ruler_nlp, ner_nlp)
@@ -0,0 +1,188 @@
+# api/pdf_extraction.py
+import io
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import PyPDF2
+from django.conf import settings
+
+from .metrics import metrics
+
+page_seconds = metrics.histogram('pdf_page_extract_seconds', 'Time spent extracting text from one PDF page.')
+pdf_truncated = metrics.counter('pdf_extract_truncated_total', 'PDF extractions cut short by a budget, by reason.')
+
+
+class PdfTooLarge(Exception):
+    pass
+
+
+class PdfExtraction:
+    def __init__(self):
+        self.pages = {}             # page index -> text
+        self.page_seconds = {}      # page index -> seconds
+        self.page_count = 0
+        self.stopped_reason = None  # None, 'enough_text', 'max_pages' or 'time_budget'
+
+    @property
+    def text(self):
+        parts = [self.pages[i] for i in sorted(self.pages) if self.pages[i]]
+        return "\n".join(parts) + "\n" if parts else None
+
+    @property
+    def char_count(self):
+        return sum(len(t) for t in self.pages.values() if t)
+
+
+def _limits():
+    return {
+        "max_bytes": getattr(settings, 'PDF_MAX_BYTES', 10 * 1024 * 1024),
+        "max_pages": getattr(settings, 'PDF_MAX_PAGES', 20),
+        "time_budget": getattr(settings, 'PDF_TIME_BUDGET', 10.0),
+        "target_chars": getattr(settings, 'PDF_TARGET_CHARS', 50000),
+        "parallel_min_pages": getattr(settings, 'PDF_PARALLEL_MIN_PAGES', 8),
+        "workers": getattr(settings, 'PDF_WORKERS', 4),
+        "pages_per_task": getattr(settings, 'PDF_PAGES_PER_TASK', 2),
+    }
+
+
+class _MappedPdf:
+    """A read-only mmap of a PDF on disk; PyPDF2 reads it like a stream without copying it."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self.map
+
+    def __exit__(self, *exc):
+        self.map.close()
+        self._file.close()
+
+
+def _extract_pages(reader, indices, deadline):
+    out = []
+    for i in indices:
+        if time.monotonic() > deadline: break
+        started = time.perf_counter()
+        try:
+            text = reader.pages[i].extract_text()
+        except Exception as e:
+            print(f"PDF Error on page {i}: {e}")
+            text = None
+        out.append((i, text, time.perf_counter() - started))
+    return out
+
+
+def _extract_page_range(path, indices, deadline):
+    # Runs in a worker process; each worker maps the file itself instead of receiving its bytes
+    with _MappedPdf(path) as data:
+        return _extract_pages(PyPDF2.PdfReader(data), indices, deadline)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_page_pool(workers):
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def _recycle_pool(pool):
+    """Drops a pool whose workers are stuck past the budget; the next extraction starts a fresh one.
+
+    A running range can't be cancelled, so its processes are terminated, otherwise a few hostile
+    PDFs would hold every slot. Ranges of other extractions on the same pool fail with it and
+    are treated like ranges that ran out of time.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool: _pool = None
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def _record(result, pages):
+    for i, text, seconds in pages:
+        result.pages[i] = text
+        result.page_seconds[i] = seconds
+        page_seconds.observe(seconds)
+
+
+def extract_pdf(source, parallel=True):
+    """Extracts text from a PDF given as bytes or as a path on disk.
+
+    Pages are read in order until the text target, page cap or time budget is hit.
+    PDFs on disk with enough pages are split into page ranges for a process pool, one
+    wave of ranges at a time, so the early stop still applies; a wave is only waited on
+    for what is left of the budget.
+    """
+    limits = _limits()
+    size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+    if limits["max_bytes"] and size > limits["max_bytes"]:
+        raise PdfTooLarge(f"PDF is larger than {limits['max_bytes']} bytes.")
+
+    result = PdfExtraction()
+    deadline = time.monotonic() + limits["time_budget"]
+
+    def run(data):
+        reader = PyPDF2.PdfReader(data)
+        result.page_count = len(reader.pages)
+        wanted = min(result.page_count, limits["max_pages"]) if limits["max_pages"] else result.page_count
+        use_pool = parallel and not isinstance(source, (bytes, bytearray)) and wanted >= limits["parallel_min_pages"]
+        if use_pool:
+            workers = limits["workers"]
+            pool = get_page_pool(workers)
+            chunk = max(1, limits["pages_per_task"])
+            ranges = [list(range(s, min(s + chunk, wanted))) for s in range(0, wanted, chunk)]
+            for w in range(0, len(ranges), workers):
+                futures = [pool.submit(_extract_page_range, source, r, deadline) for r in ranges[w:w + workers]]
+                done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+                lost = [f for f in done if f.cancelled() or f.exception() is not None]
+                for future in futures:
+                    if future in done and future not in lost: _record(result, future.result())
+                if not_done or lost:
+                    # A page still being read when the budget ran out: keep what arrived, give up on the rest
+                    if not_done: _recycle_pool(pool)
+                    result.stopped_reason = 'time_budget'
+                    return
+                if _stopped(result, wanted, deadline, limits): return
+        else:
+            for i in range(wanted):
+                _record(result, _extract_pages(reader, [i], deadline))
+                if _stopped(result, wanted, deadline, limits): return
+        if wanted < result.page_count:
+            result.stopped_reason = 'max_pages'
+
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            run(io.BytesIO(source))
+        else:
+            with _MappedPdf(source) as data:
+                run(data)
+    except Exception as e:
+        print(f"PDF Error: {e}")
+    if result.stopped_reason:
+        pdf_truncated.inc(reason=result.stopped_reason)
+    return result
+
+
+def _stopped(result, wanted, deadline, limits):
+    if len(result.pages) >= wanted:
+        return False
+    if limits["target_chars"] and result.char_count >= limits["target_chars"]:
+        result.stopped_reason = 'enough_text'
+        return True
+    if time.monotonic() > deadline:
+        result.stopped_reason = 'time_budget'
+        return True
+    return False
@@ -0,0 +1,462 @@
+# api/pipeline.py
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from .analysis_cache import content_hash, file_content_hash, get_analysis_cache
+from .contact import extract_contact_info
+from .docx_extraction import DocxTooLarge, extract_docx
+from .embedding_batcher import embedding_version, get_embedding_batcher
+from .embedding_store import get_embedding_store
+from .metrics import metrics
+from .model_registry import registry
+from .models import EmbeddingRecord
+from .pdf_extraction import PdfTooLarge, extract_pdf
+from .role_fit import get_role_profiles, rank_roles, role_fit_report_key
+from .role_keywords import FALLBACK_ROLE_SKILLS, FallbackKeywords, fallback_keywords, get_role_keyword_service
+from .skill_matcher import SkillMatcher
+from .stage_graph import Stage, StageGraph, StageTimeout
+
+
+class AnalysisError(Exception):
+    """Raised by the pipeline for failures that map onto an HTTP error response."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# --- Text Extraction ---
+def extract_text_from_pdf(file_obj):
+    # Kept for callers holding a file object; the pipeline goes through extract_pdf()
+    data = file_obj if isinstance(file_obj, (bytes, bytearray, str)) else file_obj.read()
+    try:
+        return extract_pdf(data).text
+    except PdfTooLarge as e:
+        print(f"PDF Error: {e}")
+        return None
+
+def extract_text_from_docx(file_obj):
+    # Streamed from the zip in reading order, python-docx only as a fallback; see api/docx_extraction.py
+    try:
+        return extract_docx(file_obj)
+    except DocxTooLarge as e:
+        print(f"DOCX Error: {e}")
+        return None
+
+def upload_source(uploaded_file):
+    """The temp path for uploads Django already spooled to disk, the bytes otherwise."""
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return uploaded_file.temporary_file_path()
+    return uploaded_file.read()
+
+def source_hash(source):
+    if isinstance(source, (bytes, bytearray)):
+        return content_hash(source)
+    return file_content_hash(source)
+
+def extract_text(source, file_name, parallel=True):
+    """source is the file's bytes or a path to it on disk."""
+    try:
+        if file_name.lower().endswith('.pdf'):
+            resume_text = extract_pdf(source, parallel=parallel).text
+        elif file_name.lower().endswith('.docx'):
+            resume_text = extract_docx(source)
+        else: raise AnalysisError("Invalid file type", 400)
+    except AnalysisError:
+        raise
+    except (PdfTooLarge, DocxTooLarge) as e:
+        raise AnalysisError(str(e), 413)
+    except Exception as e:
+        raise AnalysisError(f"File error: {e}", 500)
+    if not resume_text or not resume_text.strip():
+        raise AnalysisError("Empty file", 400)
+    return resume_text
+
+
+# --- NLP Stages ---
+def extract_resume_skills(nlp, resume_text):
+    try:
+        return skills_from_doc(nlp(resume_text))
+    except Exception:
+        return []
+
+def skills_from_doc(doc):
+    try:
+        return skills_from_groups(*entity_groups(doc))
+    except Exception:
+        return []
+
+def entity_groups(doc):
+    """(SKILL entities, short ORG/PRODUCT/LANGUAGE entities) of a doc, as sets of stripped text."""
+    skills, others = set(), set()
+    for ent in doc.ents:
+        if ent.label_ == "SKILL": skills.add(ent.text.strip())
+        elif ent.label_ in ["ORG", "PRODUCT", "LANGUAGE"] and len(ent.text.split()) < 4: others.add(ent.text.strip())
+    return skills, others
+
+def skills_from_groups(skills, others):
+    # The ORG/PRODUCT/LANGUAGE entities only count when no SKILL entity was found at all
+    return sorted(set(s.capitalize() for s in (skills or others)))
+
+def extract_jd_keywords(nlp, job_description):
+    jd_keywords = set()
+    jd_doc = nlp(job_description)
+    for ent in jd_doc.ents:
+        if ent.label_ in ["SKILL", "ORG", "PRODUCT", "LANGUAGE"]: jd_keywords.add(ent.text.lower())
+    return sorted(jd_keywords)
+
+def check_grammar(grammar, resume_text):
+    # Whole text, sentence-cached, bounded by GRAMMAR_DEADLINE; None means "score without grammar"
+    return grammar.check(resume_text)
+
+def generate_role_keywords(job_role):
+    # Cached per role (memory, then DB) with one upstream call per role; see api/role_keywords.py.
+    # A FallbackKeywords answer means the backend failed and the report is degraded
+    return get_role_keyword_service().lookup(job_role)
+
+def encode_text(similarity_model, text):
+    # Batched with concurrent requests and chunk-pooled past the model's window, see api/embedding_batcher.py
+    return get_embedding_batcher(similarity_model).encode(text)
+
+def cosine_similarity(a, b):
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / denom if denom else 0.0
+
+
+# --- Scoring ---
+def quality_score_for(resume_text, contact, resume_skills_list, grammar_errors):
+    quality_feedback = []
+    quality_score = 0
+    sections = ['experience', 'education', 'skills', 'projects']
+    found_sections = sum(1 for s in sections if re.search(r'\b'+s+r'\b', resume_text, re.IGNORECASE))
+    quality_score += (found_sections * 10)
+
+    if contact["email"] and contact["phone"]: quality_score += 10
+    elif contact["email"] or contact["phone"]: quality_score += 5; quality_feedback.append("Contact info incomplete.")
+    else: quality_feedback.append("Missing contact info.")
+
+    if len(resume_skills_list) >= 5: quality_score += 10
+
+    if grammar_errors is not None:
+        # The whole resume is checked, so count issues per 2000 characters (the old checked window)
+        errors_per_window = len(grammar_errors) * 2000 / max(len(resume_text), 2000)
+        quality_score += max(0, 20 - round(errors_per_window))
+        if grammar_errors: quality_feedback.append(f"Found {len(grammar_errors)} potential grammar issues.")
+    quality_score = min(100, quality_score + 10)
+    return quality_score, quality_feedback
+
+# Shares of the JD score: semantic similarity, JD keyword match, resume quality
+JD_SCORE_WEIGHTS = (0.5, 0.3, 0.2)
+
+def build_report(job_role, contact, resume_skills_list, quality_score, quality_feedback,
+                 role_keywords, jd_keywords=None, semantic=None):
+    matcher = SkillMatcher(resume_skills_list)
+
+    # B. Role-Based Analysis
+    role_matching_skills, role_missing_skills = matcher.match(role_keywords)
+    role_match_pct = (len(role_matching_skills) / len(role_keywords)) * 100 if role_keywords else 0
+    ats_score_role = round((quality_score * 0.3) + (role_match_pct * 0.7)) # 70% Skills, 30% Quality
+
+    # C. JD-Based Analysis
+    ats_score_jd = None
+    jd_matching_skills, jd_missing_skills = [], []
+    if jd_keywords is not None and semantic is not None:
+        jd_matching_skills, jd_missing_skills = matcher.match(jd_keywords)
+        jd_match_pct = (len(jd_matching_skills) / len(jd_keywords)) * 100 if jd_keywords else 0
+        semantic_weight, match_weight, quality_weight = JD_SCORE_WEIGHTS
+        ats_score_jd = round((semantic * semantic_weight) + (jd_match_pct * match_weight) + (quality_score * quality_weight))
+        ats_score_jd = max(0, min(100, ats_score_jd))
+
+    # Report
+    summary_message = f"Analysis for {job_role}. Role Match: {ats_score_role}%."
+    if ats_score_jd: summary_message += f" JD Match: {ats_score_jd}%."
+
+    return {
+        "success": True,
+        "job_role_selected": job_role,
+        "name": contact["name"],
+        "email": contact["email"],
+        "phone": contact["phone"],
+        "resume_skills": resume_skills_list,
+        # Separated Lists
+        "role_matching_skills": sorted(list(set(role_matching_skills))),
+        "role_missing_skills": sorted(list(set(role_missing_skills))),
+        "jd_matching_skills": sorted(list(set(jd_matching_skills))),
+        "jd_missing_skills": sorted(list(set(jd_missing_skills))),
+        # Scores
+        "ats_score_general": ats_score_role, # Mapped for frontend compatibility
+        "ats_score_role": ats_score_role,
+        "ats_score_jd": ats_score_jd,
+        "analysis_summary": summary_message,
+        "quality_feedback": quality_feedback
+    }
+
+
+# --- Full Analysis ---
+degraded_total = metrics.counter('analysis_degraded_total', 'Reports built without a part (grammar, role_keywords, jd, embedding) or with its fallback.')
+
+DEFAULT_STAGE_TIMEOUTS = {
+    "text": 30, "entities": 20, "grammar": 10, "embedding": 20,
+    "role_keywords": 15, "jd_entities": 10, "jd_embedding": 20,
+}
+
+_executors = None
+_executors_lock = threading.Lock()
+
+def stage_executors():
+    """(cpu, io) thread pools the analysis stages run on. spaCy and the encoder spend most of
+    their time in native code, so CPU stages overlap on threads too."""
+    global _executors
+    if _executors is None:
+        with _executors_lock:
+            if _executors is None:
+                _executors = (
+                    ThreadPoolExecutor(max_workers=getattr(settings, 'ANALYSIS_CPU_WORKERS', 4), thread_name_prefix='analysis-cpu'),
+                    ThreadPoolExecutor(max_workers=getattr(settings, 'ANALYSIS_IO_WORKERS', 8), thread_name_prefix='analysis-io'),
+                )
+    return _executors
+
+
+class AnalysisProgress:
+    """Turns finished stages into partial results for streaming: contact details as soon as
+    the text is extracted, then skills, the role match, grammar and the JD match, each as
+    soon as the stages it needs are in. emit(event, data) is called once per event."""
+
+    def __init__(self, emit, job_role, jd_key):
+        self.emit = emit
+        self.job_role = job_role
+        self.jd_key = jd_key
+        self.results = {}
+        self.sent = set()
+
+    def __call__(self, name, result):
+        r = self.results
+        r[name] = result
+        if name == "text":
+            self._send("contact", extract_contact_info(result))
+        elif name == "entities":
+            self._send("skills", {"resume_skills": result})
+        elif name == "grammar":
+            self._send("grammar", {"checked": result is not None, "grammar_issues": len(result) if result is not None else None})
+        if "entities" in r and "role_keywords" in r and "role_match" not in self.sent:
+            keywords = r["role_keywords"] or fallback_keywords(self.job_role)
+            matching, missing = SkillMatcher(r["entities"]).match(keywords)
+            self._send("role_match", {
+                "job_role_selected": self.job_role,
+                "role_match_pct": round(len(matching) / len(keywords) * 100) if keywords else 0,
+                "role_matching_skills": sorted(set(matching)),
+                "role_missing_skills": sorted(set(missing)),
+            })
+        if self.jd_key and "jd_match" not in self.sent and all(n in r for n in ("entities", "jd_entities", "jd_embedding", "embedding")):
+            data = {"semantic_score": None, "jd_matching_skills": [], "jd_missing_skills": []}
+            if all(r[n] is not None for n in ("jd_entities", "jd_embedding", "embedding")):
+                matching, missing = SkillMatcher(r["entities"]).match(r["jd_entities"])
+                data = {"semantic_score": round(cosine_similarity(r["embedding"], r["jd_embedding"]) * 100, 1),
+                        "jd_matching_skills": sorted(set(matching)), "jd_missing_skills": sorted(set(missing))}
+            self._send("jd_match", data)
+
+    def _send(self, event, data):
+        if event in self.sent: return
+        self.sent.add(event)
+        self.emit(event, data)
+
+
+async def run_analysis_async(source, file_name, job_role, job_description='', cache=None, timings=None, on_event=None):
+    """Runs every stage for one upload (bytes or a path on disk) as a dependency graph:
+    role keywords and the JD stages start at once, and entities, grammar and the resume
+    embedding start as soon as the text is extracted. Each stage has its own timeout
+    (ANALYSIS_STAGE_TIMEOUTS); only text extraction and entities are required, the rest
+    degrade to a report without that part.
+
+    Returns (report, cache_hits, keys); keys holds the file/text/JD hashes so callers can
+    link the stored embeddings to the Analysis row they create. timings, if given, is
+    filled with each stage's start offset, duration and status. on_event, if given, gets
+    partial results as the stages finish (see AnalysisProgress).
+
+    Each stage is cached on the hash of what it actually depends on: the file bytes for
+    text/entities/grammar/resume embedding, the JD for its keywords and embedding, and
+    all three (with the embedding version and score weights) for the final report. A report
+    that had to degrade is not cached, so the next upload of the file gets another try.
+    """
+    cache = cache or get_analysis_cache()
+    _, io_pool = stage_executors()
+    loop = asyncio.get_running_loop()
+    hits = {}
+    job_description = job_description or ''
+    file_key = await loop.run_in_executor(io_pool, source_hash, source)
+    jd_key = content_hash(job_description.strip()) if job_description.strip() else None
+    report_key = content_hash(file_key, job_role, jd_key, embedding_version(), repr(JD_SCORE_WEIGHTS))
+
+    keys = {"file": file_key, "text": None, "jd": jd_key}
+
+    report = await loop.run_in_executor(io_pool, cache.get, "report", report_key)
+    hits["report"] = report is not None
+    if report is not None:
+        # The text hash still links the new Analysis row to the stored embedding
+        text = await loop.run_in_executor(io_pool, cache.get, "text", file_key)
+        if text: keys["text"] = content_hash(text)
+        return report, hits, keys
+
+    nlp, similarity_model, grammar = await loop.run_in_executor(
+        io_pool, lambda: (registry.get("nlp"), registry.get("similarity"), registry.get("grammar")))
+    if not nlp or not similarity_model:
+        raise AnalysisError("AI models failed to load.", 503)
+
+    stages = resume_stages(source, file_name, file_key, keys, (nlp, similarity_model, grammar), cache, hits)
+    stages += context_stages(job_role, job_description, jd_key, nlp, similarity_model, cache, hits)
+
+    try:
+        results = await StageGraph(stages).run(timings, AnalysisProgress(on_event, job_role, jd_key) if on_event else None)
+    except StageTimeout as e:
+        raise AnalysisError(f"Analysis timed out ({e.stage}).", 504)
+
+    report, degraded = assemble_report(job_role, results["text"], results, grammar is not None, jd_key)
+    if not degraded: await loop.run_in_executor(io_pool, cache.set, "report", report_key, report)
+    return report, hits, keys
+
+
+def stage_timeouts():
+    return {**DEFAULT_STAGE_TIMEOUTS, **getattr(settings, 'ANALYSIS_STAGE_TIMEOUTS', {})}
+
+def resume_stages(source, file_name, file_key, keys, models, cache, hits):
+    """The stages that only depend on the upload: text, entities, grammar and the embedding, which
+    runs with or without a JD so every saved Analysis can be found by semantic search."""
+    nlp, similarity_model, grammar = models
+    cpu, io_pool = stage_executors()
+    timeouts = stage_timeouts()
+    store = get_embedding_store()
+
+    def resume_embedding(resume_text):
+        keys["text"] = content_hash(resume_text)
+        return cache.get_or_compute("embedding", file_key, lambda: store.get_or_encode(
+            keys["text"], lambda: encode_text(similarity_model, resume_text)), hits)
+
+    return [
+        # PDF pages fan out to their own process pool, so extraction only waits here
+        Stage("text", lambda: cache.get_or_compute("text", file_key, lambda: extract_text(source, file_name), hits),
+              executor=io_pool, timeout=timeouts["text"]),
+        Stage("entities", lambda text: cache.get_or_compute("entities", file_key, lambda: extract_resume_skills(nlp, text), hits),
+              deps=["text"], executor=cpu, timeout=timeouts["entities"]),
+        # Grammar is skipped, not fatal, if LanguageTool is unavailable or misses its deadline
+        Stage("grammar", lambda text: cache.get_or_compute("grammar", file_key, lambda: check_grammar(grammar, text), hits) if grammar else None,
+              deps=["text"], executor=io_pool, timeout=timeouts["grammar"], required=False),
+        Stage("embedding", resume_embedding, deps=["text"], executor=cpu, timeout=timeouts["embedding"], required=False, db=True),
+    ]
+
+def context_stages(job_role, job_description, jd_key, nlp, similarity_model, cache, hits):
+    """The stages that don't depend on the resume: role keywords and, with a JD, its keywords and embedding."""
+    cpu, io_pool = stage_executors()
+    timeouts = stage_timeouts()
+    store = get_embedding_store()
+    stages = [
+        Stage("role_keywords", lambda: generate_role_keywords(job_role),
+              executor=io_pool, timeout=timeouts["role_keywords"], required=False, db=True),
+    ]
+    if jd_key:
+        stages += [
+            Stage("jd_entities", lambda: cache.get_or_compute("jd_entities", jd_key, lambda: extract_jd_keywords(nlp, job_description), hits),
+                  executor=cpu, timeout=timeouts["jd_entities"], required=False),
+            Stage("jd_embedding", lambda: cache.get_or_compute("jd_embedding", jd_key, lambda: store.get_or_encode(
+                      jd_key, lambda: encode_text(similarity_model, job_description), kind=EmbeddingRecord.KIND_JD), hits),
+                  executor=cpu, timeout=timeouts["jd_embedding"], required=False, db=True),
+        ]
+    return stages
+
+def assemble_report(job_role, resume_text, results, grammar_enabled, jd_key):
+    """(report, degraded parts) from a graph's results (entities, grammar, role_keywords and,
+    with a JD, jd_entities, jd_embedding and embedding); every degraded part is counted."""
+    contact = extract_contact_info(resume_text)
+    quality_score, quality_feedback = quality_score_for(resume_text, contact, results["entities"], results["grammar"])
+    degraded = []
+    if grammar_enabled and results["grammar"] is None: degraded.append('grammar')
+    role_keywords = results["role_keywords"]
+    if not role_keywords or isinstance(role_keywords, FallbackKeywords):
+        degraded.append('role_keywords')
+        role_keywords = role_keywords or fallback_keywords(job_role)
+    jd_keywords = semantic = None
+    if jd_key and all(results[name] is not None for name in ("jd_entities", "jd_embedding", "embedding")):
+        jd_keywords = results["jd_entities"]
+        semantic = cosine_similarity(results["embedding"], results["jd_embedding"]) * 100
+    elif jd_key:
+        degraded.append('jd')
+    for part in degraded: degraded_total.inc(part=part)
+    report = build_report(job_role, contact, results["entities"], quality_score, quality_feedback,
+                          role_keywords, jd_keywords, semantic)
+    return report, degraded
+
+
+def run_analysis(source, file_name, job_role, job_description='', cache=None, timings=None, on_event=None):
+    """Blocking entry point for views, job workers and commands; see run_analysis_async."""
+    return async_to_sync(run_analysis_async)(source, file_name, job_role, job_description, cache, timings, on_event)
+
+
+# --- Best-fit Role ---
+async def run_role_fit_async(source, file_name, cache=None, timings=None):
+    """Scores the upload against every role in the catalog (see api/role_fit.py) instead of
+    one job_role. Runs the same text/entities/grammar/embedding stages as run_analysis_async,
+    so an upload analyzed either way shares their cache entries.
+
+    Returns (report, cache_hits, keys); the report lists every role, best fit first. Like
+    run_analysis_async, a report missing grammar or the embedding is not cached.
+    """
+    cache = cache or get_analysis_cache()
+    _, io_pool = stage_executors()
+    loop = asyncio.get_running_loop()
+    hits = {}
+    file_key = await loop.run_in_executor(io_pool, source_hash, source)
+    keys = {"file": file_key, "text": None, "jd": None}
+
+    nlp, similarity_model, grammar = await loop.run_in_executor(
+        io_pool, lambda: (registry.get("nlp"), registry.get("similarity"), registry.get("grammar")))
+    if not nlp or not similarity_model:
+        raise AnalysisError("AI models failed to load.", 503)
+    batcher = get_embedding_batcher(similarity_model)
+    profiles = await loop.run_in_executor(io_pool, get_role_profiles, batcher.encode_many, cache)
+
+    report_key = role_fit_report_key(file_key, profiles)
+    report = await loop.run_in_executor(io_pool, cache.get, "role_fit", report_key)
+    hits["role_fit"] = report is not None
+    if report is not None:
+        return report, hits, keys
+
+    stages = resume_stages(source, file_name, file_key, keys, (nlp, similarity_model, grammar), cache, hits)
+    try:
+        results = await StageGraph(stages).run(timings)
+    except StageTimeout as e:
+        raise AnalysisError(f"Analysis timed out ({e.stage}).", 504)
+
+    resume_text = results["text"]
+    contact = extract_contact_info(resume_text)
+    quality_score, quality_feedback = quality_score_for(resume_text, contact, results["entities"], results["grammar"])
+    degraded = []
+    if grammar is not None and results["grammar"] is None: degraded.append('grammar')
+    if results["embedding"] is None: degraded.append('embedding')
+    for part in degraded: degraded_total.inc(part=part)
+    roles = rank_roles(profiles, results["entities"], results["embedding"], quality_score)
+    report = {
+        "success": True,
+        "mode": "best_fit",
+        "name": contact["name"],
+        "email": contact["email"],
+        "phone": contact["phone"],
+        "resume_skills": results["entities"],
+        "quality_score": quality_score,
+        "quality_feedback": quality_feedback,
+        "best_fit_role": roles[0]["job_role"] if roles else None,
+        "roles": roles,
+        "analysis_summary": f"Best fit: {roles[0]['job_role']} ({roles[0]['fit_score']})." if roles else "No roles to compare.",
+    }
+    if not degraded: await loop.run_in_executor(io_pool, cache.set, "role_fit", report_key, report)
+    return report, hits, keys
+
+
+def run_role_fit(source, file_name, cache=None, timings=None):
+    """Blocking entry point for views; see run_role_fit_async."""
+    return async_to_sync(run_role_fit_async)(source, file_name, cache, timings)
@@ -0,0 +1,44 @@
+# api/resume_data.py
+# Helpers for the builder's Resume.resume_data JSON (personalInfo, summary, experience, ...)
+
+SECTION_ORDER = ['personalInfo', 'summary', 'experience', 'education', 'projects', 'skills']
+# Keys that never carry resume text (images and their antd upload fileList entries, UI state)
+SKIP_KEYS = {'avatar', 'image', 'photo', 'imageUrl', 'thumbUrl', 'originFileObj', 'fileList',
+             'id', 'key', 'uid', 'currentlyWorking'}
+
+
+def _flatten(value, out):
+    if isinstance(value, str):
+        value = value.strip()
+        if value and not value.startswith(('data:', 'blob:')): out.append(value)
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            if k not in SKIP_KEYS: _flatten(v, out)
+    elif isinstance(value, (list, tuple)):
+        for v in value: _flatten(v, out)
+
+
+def resume_data_sections(resume_data):
+    """{section: text} in reading order; unknown top-level keys follow the known ones."""
+    if not isinstance(resume_data, dict): return {}
+    keys = [k for k in SECTION_ORDER if k in resume_data]
+    keys += [k for k in resume_data if k not in SECTION_ORDER and k not in SKIP_KEYS]
+    sections = {}
+    for key in keys:
+        parts = []
+        _flatten(resume_data[key], parts)
+        if parts: sections[key] = "\n".join(parts)
+    return sections
+
+
+def resume_data_text(resume_data):
+    return "\n".join(resume_data_sections(resume_data).values())
+
+
+def resume_data_skills(resume_data):
+    skills = resume_data.get('skills') if isinstance(resume_data, dict) else None
+    out = []
+    for item in skills or []:
+        name = item.get('name') if isinstance(item, dict) else item
+        if isinstance(name, str) and name.strip(): out.append(name.strip())
+    return out
@@ -0,0 +1,163 @@
+# api/role_fit.py
+"""Scores one resume against every known role at once.
+
+The role catalog is the curated roles of FALLBACK_ROLE_SKILLS (plus ROLE_FIT_EXTRA_ROLES), with
+their skills refreshed from the keyword sets cached in the RoleKeywords table. Other cached rows
+come from roles users typed in and never join the catalog. From it, RoleProfiles builds:
+
+- a sparse role x skill matrix whose rows are 1/len(role skills) on the role's skills, so
+  multiplying it by the resume's 0/1 skill-coverage vector gives every role's match share
+- a matrix of normalized role-profile embeddings ("<role>: <skills>"), so multiplying it by
+  the normalized resume embedding gives every role's cosine similarity
+
+Profiles are keyed on a hash of the catalog and the embedding version (model and pooling)
+and only rebuilt when that changes; the built matrices are also kept in the analysis cache so
+other workers don't encode them again. Reports built from them are keyed on that version and
+the semantic weight.
+"""
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from scipy import sparse
+
+from .analysis_cache import content_hash, get_analysis_cache
+from .embedding_batcher import embedding_version
+from .metrics import metrics
+from .models import RoleKeywords
+from .role_keywords import FALLBACK_ROLE_SKILLS, normalize_role
+from .skill_matcher import SkillMatcher, normalize_skill
+
+profile_builds_total = metrics.counter('role_fit_profile_builds_total', 'Role profile matrices built, by whether they were encoded or loaded from the analysis cache.')
+
+
+def catalog_roles():
+    """{role key: role name} of the roles best fit ranks: the built-in ones and ROLE_FIT_EXTRA_ROLES."""
+    roles = {normalize_role(role): role for role in FALLBACK_ROLE_SKILLS}
+    for role in getattr(settings, 'ROLE_FIT_EXTRA_ROLES', []):
+        roles.setdefault(normalize_role(role), role)
+    return roles
+
+
+def role_catalog():
+    """{role name: sorted normalized skills}: the catalog roles, with cached keyword sets replacing
+    their built-in skills. An extra role only joins once it has a cached keyword set."""
+    names = catalog_roles()
+    roles = {key: (names[key], FALLBACK_ROLE_SKILLS[name]) for key, name in names.items() if name in FALLBACK_ROLE_SKILLS}
+    for row in RoleKeywords.objects.filter(role_key__in=list(names)).values('role_key', 'keywords'):
+        roles[row['role_key']] = (names[row['role_key']], row['keywords'])
+    catalog = {}
+    for name, skills in roles.values():
+        skills = sorted({normalize_skill(s) for s in skills if s and s.strip()})
+        if skills: catalog[name] = skills
+    return dict(sorted(catalog.items()))
+
+
+class RoleProfiles:
+    """The matrices one catalog version scores against."""
+
+    def __init__(self, catalog, vectors, version):
+        self.version = version
+        self.roles = list(catalog)
+        self.skills = sorted({s for skills in catalog.values() for s in skills})
+        column = {s: i for i, s in enumerate(self.skills)}
+        rows, cols, weights = [], [], []
+        for r, skills in enumerate(catalog.values()):
+            rows += [r] * len(skills)
+            cols += [column[s] for s in skills]
+            weights += [1.0 / len(skills)] * len(skills)
+        self.role_skills = sparse.csr_matrix((np.asarray(weights, dtype=np.float32), (rows, cols)),
+                                             shape=(len(self.roles), len(self.skills)))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.role_vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def score(self, resume_skills, resume_embedding=None):
+        """(coverage, matched skill mask, similarity): one value per role for coverage (0-1) and
+        similarity (cosine, or None without an embedding)."""
+        covered = np.zeros(len(self.skills), dtype=np.float32)
+        covered[list(SkillMatcher(resume_skills).matched_indices(self.skills))] = 1.0
+        coverage = self.role_skills @ covered
+        similarity = None
+        if resume_embedding is not None and len(self.role_vectors):
+            query = np.asarray(resume_embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(query))
+            if norm: similarity = self.role_vectors @ (query / norm)
+        return coverage, covered.astype(bool), similarity
+
+    def skills_of(self, role_index):
+        row = self.role_skills.getrow(role_index)
+        return row.indices
+
+
+def profile_text(role, skills):
+    return f"{role}: {', '.join(skills)}"
+
+
+def _build(catalog, version, encode_many):
+    texts = [profile_text(role, skills) for role, skills in catalog.items()]
+    vectors = np.asarray(encode_many(texts), dtype=np.float32).reshape(len(texts), -1) if texts else np.zeros((0, 0), dtype=np.float32)
+    profile_builds_total.inc(source='encoded')
+    return RoleProfiles(catalog, vectors, version)
+
+
+_profiles = None
+_signature = None
+_profiles_lock = threading.Lock()
+
+def get_role_profiles(encode_many, cache=None):
+    """The profiles for the current catalog. A cheap (count, last update) query on the catalog's
+    RoleKeywords rows decides whether it needs re-reading; the matrices are rebuilt only when its hash changes."""
+    global _profiles, _signature
+    roles = catalog_roles()
+    rows = RoleKeywords.objects.filter(role_key__in=list(roles))
+    signature = (tuple(sorted(roles)),) + tuple(rows.aggregate(n=Count('id'), updated=Max('updated_at')).values())
+    if _profiles is not None and signature == _signature:
+        return _profiles
+    with _profiles_lock:
+        if _profiles is not None and signature == _signature:
+            return _profiles
+        catalog = role_catalog()
+        version = content_hash(embedding_version(), *(profile_text(role, skills) for role, skills in catalog.items()))
+        if _profiles is None or _profiles.version != version:
+            cache = cache or get_analysis_cache()
+            profiles = cache.get("role_profiles", version)
+            if profiles is None:
+                profiles = _build(catalog, version, encode_many)
+                cache.set("role_profiles", version, profiles)
+            else:
+                profile_builds_total.inc(source='cache')
+            _profiles = profiles
+        _signature = signature
+        return _profiles
+
+
+def semantic_weight():
+    return getattr(settings, 'ROLE_FIT_SEMANTIC_WEIGHT', 0.3)
+
+
+def role_fit_report_key(file_key, profiles):
+    """Cache key of a best-fit report: everything its scores depend on besides the resume."""
+    return content_hash(file_key, profiles.version, f"{semantic_weight():g}")
+
+
+def rank_roles(profiles, resume_skills, resume_embedding, quality_score):
+    """Every role, best fit first. fit_score blends skill coverage with embedding similarity
+    (ROLE_FIT_SEMANTIC_WEIGHT); ats_score_role is the score a single-role analysis would give."""
+    weight = semantic_weight()
+    coverage, covered, similarity = profiles.score(resume_skills, resume_embedding)
+    match_pct = coverage * 100
+    fit = match_pct if similarity is None else match_pct * (1 - weight) + np.clip(similarity, 0, 1) * 100 * weight
+    ranked = []
+    for i in np.argsort(-fit, kind='stable'):
+        skills = profiles.skills_of(i)
+        ranked.append({
+            "job_role": profiles.roles[i],
+            "fit_score": round(float(fit[i]), 1),
+            "role_match_pct": round(float(match_pct[i])),
+            "semantic_score": round(float(similarity[i]) * 100, 1) if similarity is not None else None,
+            "ats_score_role": round((quality_score * 0.3) + (float(match_pct[i]) * 0.7)),
+            "role_matching_skills": [profiles.skills[s].capitalize() for s in skills if covered[s]],
+            "role_missing_skills": [profiles.skills[s].capitalize() for s in skills if not covered[s]],
+        })
+    return ranked
@@ -0,0 +1,235 @@
+# api/role_keywords.py
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .analysis_cache import MISS, LocMemBackend
+from .metrics import metrics
+from .models import RoleKeywords
+
+# Fallback skills in case AI fails or key is missing
+FALLBACK_ROLE_SKILLS = {
+    "Software Engineer": ["Python", "Java", "C++", "SQL", "Git", "Data Structures", "Algorithms", "System Design"],
+    "Frontend Developer": ["HTML", "CSS", "JavaScript", "React", "Angular", "Vue", "TypeScript", "Redux", "Responsive Design"],
+    "Backend Developer": ["Node.js", "Python", "Java", "Django", "Flask", "Spring Boot", "SQL", "NoSQL", "API Design"],
+    "Full Stack Developer": ["HTML", "CSS", "JavaScript", "React", "Node.js", "Python", "SQL", "MongoDB", "Git", "AWS"],
+    "Data Scientist": ["Python", "R", "SQL", "Machine Learning", "Pandas", "NumPy", "Scikit-learn", "TensorFlow", "Data Visualization"],
+    "Machine Learning Engineer": ["Python", "TensorFlow", "PyTorch", "Deep Learning", "NLP", "Computer Vision", "MLOps", "SQL"],
+    "DevOps Engineer": ["Linux", "AWS", "Azure", "Docker", "Kubernetes", "Jenkins", "Terraform", "CI/CD", "Bash Scripting"],
+    "Project Manager": ["Agile", "Scrum", "JIRA", "Communication", "Risk Management", "Leadership", "Planning", "Stakeholder Management"],
+    "UI/UX Designer": ["Figma", "Adobe XD", "Sketch", "Prototyping", "User Research", "Wireframing", "Usability Testing", "Visual Design"],
+    "QA Engineer": ["Selenium", "Java", "Python", "Test Automation", "Manual Testing", "JIRA", "SQL", "API Testing"],
+    "Business Analyst": ["SQL", "Excel", "Tableau", "Power BI", "Data Analysis", "Requirements Gathering", "Communication", "Documentation"]
+}
+DEFAULT_ROLE_SKILLS = ["communication", "teamwork", "problem solving"]
+MAX_ROLE_LENGTH = 255
+
+ROLE_KEYWORD_PROMPT = "List top 20 technical skills and keywords for a '{job_role}' resume. Return ONLY comma-separated words. Do not include the job title itself."
+
+lookups_total = metrics.counter('role_keywords_lookups_total', 'Role keyword lookups, by where the answer came from.')
+upstream_seconds = metrics.histogram('role_keywords_upstream_seconds', 'Time spent generating role keywords upstream.')
+
+
+def normalize_role(job_role):
+    # Cut to the RoleKeywords.role_key column; no real role name comes near it
+    return re.sub(r'\s+', ' ', (job_role or '').strip()).lower()[:MAX_ROLE_LENGTH]
+
+
+def parse_keywords(text, job_role):
+    keywords = set()
+    for item in re.split(r'[,\n\r•*-]+', text or ''):
+        clean = item.strip().lower().replace('skills', '').replace(job_role.lower(), '')
+        if len(clean) > 1: keywords.add(clean)
+    return keywords
+
+
+def fallback_keywords(job_role):
+    skills = FALLBACK_ROLE_SKILLS.get(job_role)
+    if skills is None:
+        key = normalize_role(job_role)
+        skills = next((v for k, v in FALLBACK_ROLE_SKILLS.items() if normalize_role(k) == key), DEFAULT_ROLE_SKILLS)
+    return {sk.lower() for sk in skills}
+
+
+# --- Backends ---
+class GeminiBackend:
+    """Asks Gemini for the role's keywords; the configured client is created once and reused."""
+    name = 'gemini'
+
+    def __init__(self, api_key=None, model_name='gemini-pro', timeout=10):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.timeout = timeout
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, job_role):
+        if not self.api_key: return set()
+        resp = self._client().generate_content(ROLE_KEYWORD_PROMPT.format(job_role=job_role),
+                                               request_options={"timeout": self.timeout})
+        return parse_keywords(resp.text, job_role)
+
+
+class StubBackend:
+    """Offline stand-in for Gemini (local development, benchmarks): answers from a fixed table."""
+    name = 'stub'
+
+    def __init__(self, table=None, delay=0.0, **kwargs):
+        self.table = table
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, job_role):
+        self.calls += 1
+        if self.delay: time.sleep(self.delay)
+        if self.table is not None:
+            return {k.lower() for k in self.table.get(job_role, [])}
+        return fallback_keywords(job_role)
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# --- Service ---
+class FallbackKeywords(frozenset):
+    """Keywords served because the backend couldn't answer: a stale row or the built-in list."""
+
+
+class RoleKeywordService:
+    """Role -> keyword set, from (in order) a per-process LRU, the RoleKeywords table, then the
+    backend. Concurrent misses for one role share a single backend call.
+
+    Backend answers are persisted for `ttl` seconds. When the backend fails, a stale row is
+    served if there is one, otherwise the built-in fallback list; either way that answer is
+    only remembered in memory for `fallback_ttl` so the backend is retried soon.
+    """
+
+    def __init__(self, backend, ttl=30 * 86400, fallback_ttl=300, max_entries=256):
+        self.backend = backend
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self._memory = LocMemBackend(max_entries=max_entries)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_role, refresh=False):
+        return set(self.lookup(job_role, refresh))
+
+    def lookup(self, job_role, refresh=False):
+        """The role's keywords as a frozenset, a FallbackKeywords one when the backend failed."""
+        key = normalize_role(job_role)
+        if not refresh:
+            cached = self._memory.get(key)
+            if cached is not MISS:
+                lookups_total.inc(source='memory')
+                return cached
+        return self._single_flight(key, lambda: self._load(job_role, key, refresh))
+
+    def _single_flight(self, key, load):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader: flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None: raise flight.error
+            lookups_total.inc(source='shared')
+            return flight.value
+        try:
+            flight.value = load()
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock: self._flights.pop(key, None)
+            flight.done.set()
+
+    def _load(self, job_role, key, refresh=False):
+        row = RoleKeywords.objects.filter(role_key=key).first()
+        if row is not None and not refresh:
+            age = (timezone.now() - row.updated_at).total_seconds()
+            if age < self.ttl:
+                lookups_total.inc(source='db')
+                self._memory.set(key, frozenset(row.keywords), self.ttl - age)
+                return frozenset(row.keywords)
+
+        started = time.perf_counter()
+        try:
+            keywords = self.backend.generate(job_role)
+        except Exception as e:
+            print(f"Role keyword generation error for '{job_role}': {e}")
+            keywords = None
+        finally:
+            upstream_seconds.observe(time.perf_counter() - started, backend=self.backend.name)
+
+        if keywords:
+            lookups_total.inc(source=self.backend.name)
+            self._save_row(key, job_role, keywords)
+            self._memory.set(key, frozenset(keywords), self.ttl)
+            return frozenset(keywords)
+
+        if row is not None:
+            lookups_total.inc(source='stale')
+            keywords = FallbackKeywords(row.keywords)
+        else:
+            lookups_total.inc(source='fallback')
+            keywords = FallbackKeywords(fallback_keywords(job_role))
+        self._memory.set(key, keywords, self.fallback_ttl)
+        return keywords
+
+    def _save_row(self, key, job_role, keywords):
+        fields = {"job_role": job_role.strip()[:MAX_ROLE_LENGTH], "keywords": sorted(keywords), "source": self.backend.name}
+        try:
+            with transaction.atomic():
+                RoleKeywords.objects.update_or_create(role_key=key, defaults=fields)
+        except IntegrityError:
+            # Another process inserted the row between our read and insert; ours is as fresh, so update theirs
+            row = RoleKeywords.objects.filter(role_key=key).first()
+            if row is None: return
+            for name, value in fields.items(): setattr(row, name, value)
+            row.save()
+
+    def clear_memory(self):
+        self._memory.clear()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_role_keyword_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                backend = BACKENDS[getattr(settings, 'ROLE_KEYWORDS_BACKEND', 'gemini')](
+                    api_key=getattr(settings, 'GEMINI_API_KEY', None),
+                    timeout=getattr(settings, 'ROLE_KEYWORDS_TIMEOUT', 10))
+                _service = RoleKeywordService(backend,
+                                              ttl=getattr(settings, 'ROLE_KEYWORDS_TTL', 30 * 86400),
+                                              fallback_ttl=getattr(settings, 'ROLE_KEYWORDS_FALLBACK_TTL', 300),
+                                              max_entries=getattr(settings, 'ROLE_KEYWORDS_MEMORY_ENTRIES', 256))
+    return _service
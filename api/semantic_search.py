@@ -0,0 +1,221 @@
+# api/semantic_search.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .analysis_cache import content_hash, get_analysis_cache
+from .embedding_store import get_embedding_store
+from .model_registry import registry
+from .models import EmbeddingRecord, Resume
+from .pipeline import AnalysisError, encode_text, extract_jd_keywords, extract_text
+from .resume_data import resume_data_skills, resume_data_text
+from .skill_matcher import SkillMatcher
+from .vector_index import BruteForceIndex, IVFIndex
+
+# Records are usually linked to their Resume/Analysis a moment after they are stored
+PENDING_LINK_WINDOW = timedelta(minutes=10)
+
+
+class ResumeSearchIndex:
+    """In-process vector index over every stored resume embedding that belongs to a Resume
+    or an Analysis.
+
+    It catches up with the embedding table incrementally (new record ids since the last
+    refresh), so vectors written by other processes show up without a rebuild.
+    """
+
+    def __init__(self, store, approximate=False, ivf_min_vectors=20000, nlist=256, nprobe=8):
+        self.store = store
+        self.approximate = approximate
+        self.ivf_min_vectors = ivf_min_vectors
+        self.index = IVFIndex(store.dim, nlist=nlist, nprobe=nprobe) if approximate else BruteForceIndex(store.dim)
+        self._trained_at = 0
+        self._owners = {}        # record id -> user id
+        self._by_owner = {}      # user id -> {record ids}
+        self._pending = {}       # unlinked record id -> created_at
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+    def _records(self):
+        return EmbeddingRecord.objects.filter(model_name=self.store.model_name, kind=EmbeddingRecord.KIND_RESUME,
+                                              quantized=self.store.quantize)
+
+    def _add_rows(self, rows):
+        if not rows: return
+        vectors = self.store._file(EmbeddingRecord.KIND_RESUME).matrix([r['row'] for r in rows])
+        for r, vector in zip(rows, vectors):
+            owner = r['resume__user_id'] or r['analysis__user_id']
+            if owner is None:
+                if r['created_at'] > timezone.now() - PENDING_LINK_WINDOW:
+                    self._pending[r['id']] = r['created_at']
+                continue
+            self._pending.pop(r['id'], None)
+            self.add(r['id'], vector, owner)
+
+    def refresh(self):
+        fields = ('id', 'row', 'created_at', 'resume__user_id', 'analysis__user_id')
+        with self._lock:
+            new = list(self._records().filter(id__gt=self._last_id).order_by('id').values(*fields))
+            if new: self._last_id = new[-1]['id']
+            pending = list(self._records().filter(id__in=list(self._pending)).values(*fields)) if self._pending else []
+            cutoff = timezone.now() - PENDING_LINK_WINDOW
+            self._pending = {k: v for k, v in self._pending.items() if v > cutoff}
+            self._add_rows(new + pending)
+            if self.approximate and len(self.index) >= self.ivf_min_vectors and len(self.index) >= 2 * self._trained_at:
+                # (Re)train whenever the corpus has doubled since the last training
+                self.index.train()
+                self._trained_at = len(self.index)
+
+    def add(self, record_id, vector, owner_id):
+        with self._lock:
+            self.index.add(record_id, vector)
+            self._owners[record_id] = owner_id
+            self._by_owner.setdefault(owner_id, set()).add(record_id)
+
+    def remove(self, record_id):
+        with self._lock:
+            self.index.remove(record_id)
+            owner = self._owners.pop(record_id, None)
+            if owner is not None: self._by_owner.get(owner, set()).discard(record_id)
+
+    def search(self, query, k, owner_id=None):
+        self.refresh()
+        allowed = None
+        if owner_id is not None:
+            allowed = set(self._by_owner.get(owner_id, ()))
+        return self.index.search(query, k, allowed)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_search_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ResumeSearchIndex(get_embedding_store(),
+                                           approximate=getattr(settings, 'SEARCH_INDEX_APPROXIMATE', False),
+                                           ivf_min_vectors=getattr(settings, 'SEARCH_INDEX_IVF_MIN_VECTORS', 20000),
+                                           nlist=getattr(settings, 'SEARCH_INDEX_IVF_NLIST', 256),
+                                           nprobe=getattr(settings, 'SEARCH_INDEX_IVF_NPROBE', 8))
+    return _index
+
+
+# --- Keeping builder resumes indexed ---
+_indexer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='resume-indexer')
+
+def index_resume(resume_id):
+    """Embeds a builder Resume's current content and swaps it into the search index."""
+    try:
+        resume = Resume.objects.filter(pk=resume_id).first()
+        text = resume_data_text(resume.resume_data) if resume else ''
+        similarity_model = registry.get("similarity")
+        if not text or not similarity_model: return
+        store = get_embedding_store()
+        text_hash = content_hash(text)
+        vector = store.get_or_encode(text_hash, lambda: encode_text(similarity_model, text))
+        store.link(text_hash, resume=resume)
+        record = store._records(EmbeddingRecord.KIND_RESUME).filter(text_hash=text_hash).only('id').first()
+        # Older versions of this resume stop being search results
+        stale = list(EmbeddingRecord.objects.filter(resume=resume).exclude(pk=record.pk).values_list('pk', flat=True))
+        EmbeddingRecord.objects.filter(pk__in=stale).update(resume=None)
+        index = get_search_index()
+        for pk in stale: index.remove(pk)
+        index.add(record.pk, vector, resume.user_id)
+    except Exception as e:
+        print(f"Resume indexing error: {e}")
+    finally:
+        close_old_connections()
+
+def index_resume_in_background(resume_id):
+    _indexer.submit(index_resume, resume_id)
+
+def index_analysis(analysis):
+    """Embeds a stored Analysis's resume file and adds it to the search index, for rows saved
+    before they were indexed on upload; returns whether it was indexed."""
+    similarity_model = registry.get("similarity")
+    if not similarity_model: return False
+    try:
+        try:
+            source = analysis.resume_file.path
+        except NotImplementedError:
+            with analysis.resume_file.open('rb') as f:
+                source = f.read()
+        text = extract_text(source, analysis.resume_file.name)
+    except (AnalysisError, OSError) as e:
+        print(f"Analysis {analysis.pk} indexing error: {getattr(e, 'message', e)}")
+        return False
+    store = get_embedding_store()
+    text_hash = content_hash(text)
+    vector = store.get_or_encode(text_hash, lambda: encode_text(similarity_model, text))
+    store.link(text_hash, analysis=analysis)
+    record = store._records(EmbeddingRecord.KIND_RESUME).filter(text_hash=text_hash).only('id').first()
+    get_search_index().add(record.pk, vector, analysis.user_id)
+    return True
+
+def unindex_resume(resume):
+    index = get_search_index()
+    for pk in EmbeddingRecord.objects.filter(resume=resume).values_list('pk', flat=True):
+        index.remove(pk)
+
+
+# --- Search ---
+def search_resumes(query_vector, jd_keywords, k=10, owner_id=None):
+    """Top-k stored resumes for a JD: cosine similarity from the vector index, re-ranked
+    with skill overlap against the JD keywords."""
+    started = time.perf_counter()
+    semantic_weight = getattr(settings, 'SEARCH_SEMANTIC_WEIGHT', 0.7)
+    hits = get_search_index().search(query_vector, k * getattr(settings, 'SEARCH_CANDIDATE_FACTOR', 5), owner_id)
+    records = EmbeddingRecord.objects.filter(pk__in=[h[0] for h in hits]).select_related('resume', 'analysis')
+    records = {r.pk: r for r in records}
+
+    results, seen = [], set()
+    for record_id, cosine in hits:
+        record = records.get(record_id)
+        # Skip records that were unlinked (edited/deleted) after the index last saw them
+        if record is None or (record.resume_id is None and record.analysis_id is None): continue
+        if record.resume_id:
+            key, user_id, title = ('resume', record.resume_id), record.resume.user_id, record.resume.title
+            skills = resume_data_skills(record.resume.resume_data)
+        else:
+            key, user_id, title = ('analysis', record.analysis_id), record.analysis.user_id, record.analysis.job_role
+            skills = (record.analysis.analysis_result or {}).get('resume_skills', [])
+        if key in seen or (owner_id is not None and user_id != owner_id): continue
+        seen.add(key)
+        matching, _ = SkillMatcher(skills).match(jd_keywords) if jd_keywords else ([], [])
+        overlap = len(matching) / len(jd_keywords) if jd_keywords else 0.0
+        results.append({
+            "resume_id": record.resume_id,
+            "analysis_id": record.analysis_id,
+            "title": title,
+            "user_id": user_id,
+            "semantic_score": round(cosine * 100, 2),
+            "skill_overlap": round(overlap * 100, 2),
+            "matching_skills": sorted(set(matching)),
+            "score": round((semantic_weight * cosine + (1 - semantic_weight) * overlap) * 100, 2),
+        })
+    results.sort(key=lambda r: r["score"], reverse=True)
+    return results[:k], round((time.perf_counter() - started) * 1000, 2)
+
+
+def search_for_job_description(job_description, k=10, owner_id=None, cache=None):
+    """Encodes the JD and pulls its keywords through the same caches run_analysis uses,
+    then searches. Returns (results, search_ms, cache_hits)."""
+    nlp = registry.get("nlp")
+    similarity_model = registry.get("similarity")
+    if not nlp or not similarity_model:
+        raise AnalysisError("AI models failed to load.", 503)
+    cache = cache or get_analysis_cache()
+    hits = {}
+    jd_key = content_hash(job_description.strip())
+    jd_keywords = cache.get_or_compute("jd_entities", jd_key, lambda: extract_jd_keywords(nlp, job_description), hits)
+    query = cache.get_or_compute("jd_embedding", jd_key, lambda: get_embedding_store().get_or_encode(
+        jd_key, lambda: encode_text(similarity_model, job_description), kind=EmbeddingRecord.KIND_JD), hits)
+    results, search_ms = search_resumes(query, jd_keywords, k, owner_id)
+    return results, search_ms, hits
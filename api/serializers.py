@@ -1,7 +1,7 @@
 # api/serializers.py
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Resume # Make sure Resume model is imported
+from .models import Resume, AnalysisJob # Make sure Resume model is imported
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,4 +34,16 @@ class ResumeSerializer(serializers.ModelSerializer):
         # Include all fields from the Resume model
         fields = ['id', 'user', 'title', 'resume_data', 'created_at', 'updated_at']
         # User field should not be directly editable through the API, it's set automatically
-        read_only_fields = ['user']
\ No newline at end of file
+        read_only_fields = ['user']
+
+# --- Analysis Job Serializer ---
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    result = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'status', 'job_role', 'error', 'analysis', 'result', 'created_at', 'started_at', 'finished_at']
+
+    def get_result(self, obj):
+        # The report is only present once the job is done
+        return obj.analysis.analysis_result if obj.analysis_id else None
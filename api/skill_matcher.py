@@ -0,0 +1,146 @@
+# api/skill_matcher.py
+import re
+from collections import deque
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789+#')
+
+# Common spellings that should count as the same skill; keys and values are already normalized
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "k8s": "kubernetes",
+    "golang": "go",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "cv": "computer vision",
+    "gcp": "google cloud",
+    "amazon web services": "aws",
+    "ci cd": "ci/cd",
+    "ci-cd": "ci/cd",
+    "powerbi": "power bi",
+    "c plus plus": "c++",
+}
+
+# Short forms the aliases produce only match inside another skill as a whole word ("go" is in
+# "go microservices" but not in "django" or "mongodb"). Every other skill keeps the plain
+# substring containment matching has always used, so "sql" still covers "mysql".
+WORD_BOUNDED_SKILLS = frozenset(v for v in SKILL_ALIASES.values() if len(v) < 4)
+
+
+def normalize_skill(text):
+    collapsed = _WHITESPACE_RE.sub(' ', text.strip().lower())
+    return SKILL_ALIASES.get(collapsed, collapsed)
+
+
+def is_word_bounded(skill):
+    return skill in WORD_BOUNDED_SKILLS
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton: one pass over a text finds every pattern inside it.
+    Patterns whose index is in bounded only count where they stand as a whole word."""
+
+    def __init__(self, patterns, bounded=()):
+        self.patterns = list(patterns)
+        self.bounded = frozenset(bounded)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        for idx, pattern in enumerate(self.patterns):
+            if not pattern: continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                node = nxt
+            self._out[node].add(idx)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def _hits(self, text):
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for idx in self._out[node]:
+                if idx not in self.bounded or self._whole_word(text, end + 1 - len(self.patterns[idx]), end + 1):
+                    yield idx
+
+    @staticmethod
+    def _whole_word(text, start, end):
+        return (start == 0 or text[start - 1] not in _WORD_CHARS) and (end == len(text) or text[end] not in _WORD_CHARS)
+
+    def contains_any(self, text):
+        return next(self._hits(text), None) is not None
+
+    def find_all(self, text):
+        """Indices of every pattern that occurs somewhere in text."""
+        return set(self._hits(text))
+
+
+class SkillMatcher:
+    """Matches target keywords (role or JD) against one resume's skills.
+
+    A target counts as matched when it equals a resume skill, is contained in one, or
+    contains one, after normalization and aliasing; the short forms in WORD_BOUNDED_SKILLS are
+    only contained as whole words. Containment is answered with two Aho-Corasick passes instead of comparing every
+    target with every skill.
+    """
+
+    def __init__(self, resume_skills):
+        self.skills = sorted({normalize_skill(s) for s in resume_skills if s and s.strip()})
+        self._skill_set = set(self.skills)
+        self._skill_automaton = AhoCorasick(self.skills, [i for i, s in enumerate(self.skills) if is_word_bounded(s)])
+
+    def match(self, targets):
+        targets = list(targets)
+        matched = self.matched_indices(targets)
+        matching = [targets[i].capitalize() for i in range(len(targets)) if i in matched]
+        missing = [targets[i].capitalize() for i in range(len(targets)) if i not in matched]
+        return matching, missing
+
+    def matched_indices(self, targets):
+        """Positions in targets that the resume's skills cover."""
+        normalized = [normalize_skill(t) for t in targets]
+        matched = set()
+        for i, t in enumerate(normalized):
+            # Exact hit, or some resume skill occurs inside the target
+            if t in self._skill_set or self._skill_automaton.contains_any(t):
+                matched.add(i)
+        remaining = [i for i in range(len(targets)) if i not in matched]
+        if remaining and self.skills:
+            # The target occurs inside some resume skill
+            patterns = [normalized[i] for i in remaining]
+            automaton = AhoCorasick(patterns, [k for k, p in enumerate(patterns) if is_word_bounded(p)])
+            for skill in self.skills:
+                for k in automaton.find_all(skill):
+                    matched.add(remaining[k])
+        return matched
@@ -0,0 +1,121 @@
+# api/stage_graph.py
+import asyncio
+import functools
+import time
+
+from django.db import close_old_connections
+
+from .metrics import metrics
+
+stage_seconds = metrics.histogram('analysis_stage_seconds', 'Time spent in each analysis stage, by stage and status.')
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage, timeout):
+        super().__init__(f"Stage '{stage}' timed out after {timeout}s")
+        self.stage = stage
+        self.timeout = timeout
+
+
+def record_stage(timings, name, origin, started, status='ok'):
+    """Adds one stage to a timings dict (offsets from origin) and to the stage histogram."""
+    elapsed = time.perf_counter() - started
+    stage_seconds.observe(elapsed, stage=name, status=status)
+    timings[name] = {
+        "start_ms": round((started - origin) * 1000, 2),
+        "ms": round(elapsed * 1000, 2),
+        "status": status,
+    }
+
+
+class Stage:
+    """One node of the graph. fn receives the results of deps, in order.
+
+    With an executor, fn is a plain function run on that executor; without one it must be a
+    coroutine function. A stage that is not required resolves to default when it fails or
+    times out, and its dependents carry on with that value.
+    """
+
+    def __init__(self, name, fn, deps=(), executor=None, timeout=None, required=True, default=None, db=False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.executor = executor
+        self.timeout = timeout
+        self.required = required
+        self.default = default
+        self.db = db
+
+
+def _call_in_thread(fn, args, db):
+    try:
+        return fn(*args)
+    finally:
+        # Executor threads outlive requests, so they never see request_finished
+        if db: close_old_connections()
+
+
+class StageGraph:
+    """Runs stages as soon as their dependencies resolve, so independent stages overlap.
+
+    Timeouts only stop the wait: a stage already running in an executor thread finishes in
+    the background and its result is dropped.
+    """
+
+    def __init__(self, stages):
+        self.stages = []
+        names = set()
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in names]
+            if missing: raise ValueError(f"Stage '{stage.name}' depends on undefined stages {missing}")
+            names.add(stage.name)
+            self.stages.append(stage)
+
+    async def run(self, timings=None, on_done=None):
+        """{stage name: result}; timings (if given) gets {name: {start_ms, ms, status}}.
+
+        on_done(name, result) is called on the event loop as each stage resolves, with the
+        default for a stage that failed or timed out, so callers can act on partial results.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        timings = timings if timings is not None else {}
+        tasks = {}
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.ensure_future(
+                self._run_stage(loop, stage, [tasks[d] for d in stage.deps], started, timings, on_done))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values(): task.cancel()
+            raise
+        return dict(zip(tasks, results))
+
+    async def _run_stage(self, loop, stage, dep_tasks, graph_started, timings, on_done=None):
+        args = [await task for task in dep_tasks]
+        stage_started = time.perf_counter()
+        status = 'ok'
+        try:
+            if stage.executor is not None:
+                call = loop.run_in_executor(stage.executor, functools.partial(_call_in_thread, stage.fn, args, stage.db))
+            else:
+                call = stage.fn(*args)
+            result = await asyncio.wait_for(call, stage.timeout)
+        except asyncio.TimeoutError:
+            status = 'timeout'
+            if stage.required: raise StageTimeout(stage.name, stage.timeout)
+            print(f"Stage '{stage.name}' timed out after {stage.timeout}s")
+            result = stage.default
+        except Exception as e:
+            status = 'error'
+            if stage.required: raise
+            print(f"Stage '{stage.name}' failed: {e}")
+            result = stage.default
+        finally:
+            record_stage(timings, stage.name, graph_started, stage_started, status)
+        if on_done is not None:
+            try:
+                on_done(stage.name, result)
+            except Exception as e:
+                print(f"Stage '{stage.name}' listener failed: {e}")
+        return result
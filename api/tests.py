@@ -1,3 +1,1277 @@
-from django.test import TestCase
+import gc
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import PyPDF2
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, close_old_connections
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks import bench_contact, bench_pipeline, compare, corpus, stubs
+
+from . import (analysis_cache, authentication, batch, embedding_store, enhancement, file_store, grammar, jobs,
+               model_registry, nlp_profile, pdf_extraction, role_fit, role_keywords, semantic_search)
+from .analysis_cache import AnalysisCache, FileBackend, LocMemBackend
+from .batch import collect_batch_files, run_batch_analysis, stream_ndjson
+from .builder_analysis import analyze_resume_data
+from .contact import extract_contact_info
+from .docx_extraction import extract_docx_streaming
+from .embedding_batcher import EmbeddingBatcher, embedding_version
+from .embedding_store import EmbeddingStore, _ArrayFile
+from .jobs import claim_next_job, expire_stale_jobs, run_job
+from .management.commands import run_analysis_worker
+from .metrics import MetricsRegistry, SnapshotDirectory, render_prometheus
+from .model_registry import ModelRegistry, registry
+from .models import Analysis, AnalysisJob, Resume, RoleKeywords, StoredFile
+from .nlp_profile import SkillNLP
+from .pipeline import AnalysisError, run_analysis, run_role_fit
+from .resume_data import resume_data_sections
+from .role_fit import get_role_profiles, role_catalog, role_fit_report_key
+from .role_keywords import FALLBACK_ROLE_SKILLS
+from .semantic_search import search_for_job_description
+from .skill_matcher import SkillMatcher
+from .views import save_analysis
+
+
+class FakeTool:
+    """A LanguageTool stand-in; a hanging one blocks in check() until it is closed."""
+
+    def __init__(self, hang=False):
+        self.hang = hang
+        self.closed = threading.Event()
+
+    def check(self, text):
+        if self.hang and not self.closed.wait(10): raise AssertionError("Hung tool was never closed.")
+        if self.closed.is_set(): raise RuntimeError("LanguageTool server stopped.")
+        return []
+
+    def close(self):
+        self.closed.set()
+
+
+class MediaRootMixin:
+    """Points MEDIA_ROOT at a temporary directory and a fresh resume storage for each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+        file_store._storage = None
+
+    def tearDown(self):
+        self.media_override.disable()
+        file_store._storage = None
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().tearDown()
+
+
+# --- Content-addressed storage (api/file_store.py) ---
+class StubModelsMixin:
+    """Runs the pipeline on the benchmark stand-ins (benchmarks/stubs.py) instead of the real models."""
+    grammar_latency = 0.0
+    role_latency = 0.0
+
+    def setUp(self):
+        super().setUp()
+        loaders, service = dict(registry._loaders), role_keywords._service
+        stubs.install(grammar_latency=self.grammar_latency, role_latency=self.role_latency)
+
+        def restore():
+            registry._loaders.update(loaders)
+            registry.reset()
+            role_keywords._service = service
+        self.addCleanup(restore)
+
+
+class IsolatedStoresMixin:
+    """A temporary embedding store, an empty analysis cache and an empty search index for each test."""
+
+    def setUp(self):
+        super().setUp()
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        for patch in (mock.patch.object(embedding_store, '_store', EmbeddingStore(location)),
+                      mock.patch.object(analysis_cache, '_cache', AnalysisCache(LocMemBackend())),
+                      mock.patch.object(semantic_search, '_index', None)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+RESUME_TEXT = ("Jane Doe\njane@example.com\n+1 555 123 4567\nExperience\nBuilt Python and Django services on AWS.\n"
+               "Education\nBSc Computer Science\nSkills\nPython, SQL, Docker, React, Git")
+
+
+def resume_docx(text=RESUME_TEXT):
+    return docx_bytes(''.join(f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in text.split('\n')))
+
+
+class StoredFileTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='files')
+
+    def analysis(self, data=b'resume bytes', name='resume.pdf'):
+        return Analysis.objects.create(user=self.user, job_role='Engineer', ats_score_general=50,
+                                       resume_file=ContentFile(data, name=name), analysis_result={})
+
+    def test_same_content_is_stored_once(self):
+        first, second = self.analysis(name='A.PDF'), self.analysis(name='b.pdf')
+        self.assertEqual(first.resume_file.name, second.resume_file.name)
+        self.assertEqual(StoredFile.objects.get(name=first.resume_file.name).refcount, 2)
+
+    def test_last_release_deletes_file(self):
+        first, second = self.analysis(), self.analysis()
+        name = first.resume_file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(file_store.get_resume_storage().exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(file_store.get_resume_storage().exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_save_after_release_keeps_file(self):
+        # The release commits, then a save of the same bytes lands before its deferred delete runs
+        first = self.analysis()
+        name = first.resume_file.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            first.delete()
+        second = self.analysis()
+        for callback in callbacks: callback()
+        self.assertTrue(file_store.get_resume_storage().exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 1)
+        self.assertEqual(second.resume_file.open('rb').read(), b'resume bytes')
+
+
+# The refcount updates serialize on row locks; sqlite has none and locks the whole table instead
+@skipUnlessDBFeature('has_select_for_update')
+class StoredFileConcurrencyTests(MediaRootMixin, TransactionTestCase):
+    def test_concurrent_save_and_release(self):
+        user = User.objects.create(username='race')
+        storage = file_store.get_resume_storage()
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_old_connections()
+
+        for _ in range(10):
+            old = Analysis.objects.create(user=user, job_role='Engineer', ats_score_general=50,
+                                          resume_file=ContentFile(b'same', name='r.pdf'), analysis_result={})
+            created = []
+            threads = [
+                threading.Thread(target=run, args=(old.delete,)),
+                threading.Thread(target=run, args=(lambda: created.append(Analysis.objects.create(
+                    user=user, job_role='Engineer', ats_score_general=50,
+                    resume_file=ContentFile(b'same', name='r.pdf'), analysis_result={})),)),
+            ]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            self.assertEqual(errors, [])
+            name = created[0].resume_file.name
+            self.assertTrue(storage.exists(name))
+            self.assertEqual(StoredFile.objects.get(name=name).refcount, 1)
+            created[0].delete()
+            self.assertFalse(storage.exists(name))
+
+
+# --- Background jobs (api/jobs.py) ---
+class JobLeaseTests(MediaRootMixin, TestCase):
+    def job(self, **fields):
+        user, _ = User.objects.get_or_create(username='jobs')
+        return AnalysisJob.objects.create(user=user, job_role='Engineer', resume_file=ContentFile(b'job', name='j.pdf'), **fields)
+
+    @override_settings(ANALYSIS_JOB_LEASE_SECONDS=60)
+    def test_expired_running_job_is_failed(self):
+        stale = self.job(status=AnalysisJob.STATUS_RUNNING, started_at=timezone.now() - timedelta(seconds=120))
+        live = self.job(status=AnalysisJob.STATUS_RUNNING, started_at=timezone.now())
+        queued = self.job()
+        self.assertEqual(claim_next_job().pk, queued.pk)
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(stale.status, AnalysisJob.STATUS_FAILED)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(live.status, AnalysisJob.STATUS_RUNNING)
+
+    def run_claimed(self, job, expire=False):
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        report = {"ats_score_role": 70, "ats_score_jd": None}
+
+        def analyze(*args):
+            # The lease runs out while the analysis is still going
+            if expire:
+                AnalysisJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=120))
+                expire_stale_jobs()
+            return report, {}, {"file": "f", "text": None, "jd": None}
+
+        with mock.patch.object(jobs, 'run_analysis', analyze), mock.patch.object(jobs.jobs_finished, 'inc') as finished:
+            run_job(claimed)
+        job.refresh_from_db()
+        return finished
+
+    def test_finished_job_records_its_analysis(self):
+        job = self.job()
+        finished = self.run_claimed(job)
+        self.assertEqual(job.status, AnalysisJob.STATUS_DONE)
+        self.assertEqual(job.analysis.ats_score_general, 70)
+        finished.assert_called_once_with(status=AnalysisJob.STATUS_DONE)
+
+    @override_settings(ANALYSIS_JOB_LEASE_SECONDS=60)
+    def test_late_result_does_not_overwrite_an_expired_job(self):
+        job = self.job()
+        finished = self.run_claimed(job, expire=True)
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIsNone(job.analysis)
+        self.assertFalse(Analysis.objects.exists())
+        finished.assert_called_once_with(1, status='expired')
+
+    @override_settings(ANALYSIS_JOB_WORKERS=5, ANALYSIS_JOB_POLL_INTERVAL=0.5)
+    def test_worker_command_defaults_come_from_settings(self):
+        options = run_analysis_worker.Command().create_parser('manage.py', 'run_analysis_worker').parse_args([])
+        self.assertEqual((options.workers, options.poll_interval), (5, 0.5))
+
+
+# --- Bullet enhancement (api/enhancement.py) ---
+class RecordingBackend(enhancement.StubBackend):
+    """StubBackend that keeps every batch it was sent; answers None for batches when unparsable is set."""
+
+    def __init__(self, unparsable=False, **kwargs):
+        super().__init__(**kwargs)
+        self.unparsable = unparsable
+        self.batches = []
+
+    def rewrite(self, texts, instruction):
+        self.batches.append(list(texts))
+        if self.unparsable and len(texts) > 1:
+            self.calls += 1
+            return [None] * len(texts)
+        return super().rewrite(texts, instruction)
+
+
+class BulletEnhancerTests(TestCase):
+    def enhancer(self, backend=None, **kwargs):
+        self.backend = backend or RecordingBackend()
+        return enhancement.BulletEnhancer(self.backend, cache=AnalysisCache(LocMemBackend()), **kwargs)
+
+    def results(self, events):
+        events = list(events)
+        return {e["index"]: e for e in events if e["type"] == "bullet"}, events[-1]
+
+    def test_pack_respects_size_and_char_limits(self):
+        enhancer = self.enhancer(batch_size=3, batch_max_chars=10)
+        self.assertEqual(list(enhancer._pack(['a', 'b', 'c', 'd'])), [['a', 'b', 'c'], ['d']])
+        self.assertEqual(list(enhancer._pack(['aaaaaa', 'bbbbbb', 'c'])), [['aaaaaa'], ['bbbbbb', 'c']])
+        # A single oversized bullet still goes on its own
+        self.assertEqual(list(enhancer._pack(['x' * 20, 'y'])), [['x' * 20], ['y']])
+
+    def test_bullets_are_batched(self):
+        enhancer = self.enhancer(batch_size=2)
+        results, done = self.results(enhancer.enhance(['built apis', 'led a team', 'wrote docs']))
+        self.assertEqual([len(b) for b in self.backend.batches], [2, 1])
+        self.assertEqual(results[2]["enhanced_text"], 'Wrote docs.')
+        self.assertEqual(done["upstream_calls"], 2)
+
+    def test_equal_bullets_are_rewritten_once(self):
+        enhancer = self.enhancer()
+        results, done = self.results(enhancer.enhance(['built apis', '  - built   apis', 'Built APIs']))
+        self.assertEqual(self.backend.batches, [['built apis', 'Built APIs']])
+        self.assertEqual(results[1]["enhanced_text"], results[0]["enhanced_text"])
+        self.assertEqual(done["distinct"], 2)
+
+    def test_second_call_is_served_from_cache(self):
+        enhancer = self.enhancer()
+        list(enhancer.enhance(['built apis']))
+        results, done = self.results(enhancer.enhance(['built apis', 'led a team']))
+        self.assertTrue(results[0]["cached"])
+        self.assertFalse(results[1]["cached"])
+        self.assertEqual(self.backend.batches, [['built apis'], ['led a team']])
+        self.assertEqual(done["cached"], 1)
+
+    def test_unparsable_batch_is_retried_one_bullet_per_call(self):
+        enhancer = self.enhancer(RecordingBackend(unparsable=True))
+        results, done = self.results(enhancer.enhance(['built apis', 'led a team']))
+        self.assertEqual(self.backend.batches, [['built apis', 'led a team'], ['built apis'], ['led a team']])
+        self.assertEqual({r["enhanced_text"] for r in results.values()}, {'Built apis.', 'Led a team.'})
+        self.assertEqual(done["upstream_calls"], 3)
+
+    def test_parse_batch_answer(self):
+        self.assertEqual(enhancement.parse_batch_answer('```json\n["a", "b"]\n```', 2), ['a', 'b'])
+        self.assertIsNone(enhancement.parse_batch_answer('["a"]', 2))
+        self.assertIsNone(enhancement.parse_batch_answer('1. a\n2. b', 2))
+
+    def test_multiline_bullet_reaches_backend_unflattened(self):
+        enhancer = self.enhancer()
+        list(enhancer.enhance(['- Built X\n- Led team of 5']))
+        self.assertEqual(self.backend.batches, [['- Built X\n- Led team of 5']])
+
+
+@override_settings(ENHANCE_BACKEND='stub')
+class EnhanceViewTests(TestCase):
+    def setUp(self):
+        enhancement._enhancer = None
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='enhance'))
+
+    def tearDown(self):
+        enhancement._enhancer = None
+
+    def test_bullets_stream_as_ndjson(self):
+        response = self.client.post('/api/enhance/', {'bullets': ['built apis', '', 'built apis']}, format='json')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        events = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        bullets = {e["index"]: e for e in events if e["type"] == "bullet"}
+        self.assertEqual(bullets[0]["enhanced_text"], 'Built apis.')
+        self.assertEqual(bullets[2]["enhanced_text"], 'Built apis.')
+        self.assertIn("error", bullets[1])
+        self.assertEqual(events[-1]["type"], "done")
+
+    def test_single_text_keeps_json_response(self):
+        response = self.client.post('/api/enhance/', {'text': 'built apis'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['enhanced_text'].startswith('Built apis'))
+
+    def test_rejects_non_list_bullets(self):
+        self.assertEqual(self.client.post('/api/enhance/', {'bullets': 'x'}, format='json').status_code, 400)
+
+    def test_rejects_non_string_text_and_bullets(self):
+        for body in ({'text': 42}, {'text': ['built apis']}, {'text': {'a': 1}}, {'bullets': ['ok', None]},
+                     {'bullets': [1, 2]}, {'text': 'built apis', 'prompt_override': 3}):
+            response = self.client.post('/api/enhance/', body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+
+
+# --- Role keywords (api/role_keywords.py) ---
+class FailingBackend(role_keywords.StubBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.failing = True
+
+    def generate(self, job_role):
+        self.calls += 1
+        if self.failing: raise RuntimeError("upstream down")
+        return {"python", "sql"}
+
+
+class RoleKeywordServiceTests(TestCase):
+    def test_fallback_expires_and_backend_is_retried(self):
+        backend = FailingBackend()
+        service = role_keywords.RoleKeywordService(backend, fallback_ttl=0.2)
+        self.assertEqual(service.get('Data Scientist'), role_keywords.fallback_keywords('Data Scientist'))
+        service.get('Data Scientist')
+        self.assertEqual(backend.calls, 1)  # the fallback is remembered for a while
+        backend.failing = False
+        time.sleep(0.3)
+        self.assertEqual(service.get('Data Scientist'), {"python", "sql"})
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(RoleKeywords.objects.get(role_key='data scientist').source, 'stub')
+
+    def test_stale_row_is_served_when_backend_fails(self):
+        RoleKeywords.objects.create(role_key='data scientist', job_role='Data Scientist', keywords=['r'], source='stub')
+        service = role_keywords.RoleKeywordService(FailingBackend(), ttl=0)
+        self.assertEqual(service.get('Data Scientist'), {'r'})
+
+    def test_long_role_is_truncated(self):
+        service = role_keywords.RoleKeywordService(role_keywords.StubBackend())
+        service.get('x' * 400)
+        row = RoleKeywords.objects.get()
+        self.assertEqual(len(row.role_key), role_keywords.MAX_ROLE_LENGTH)
+        self.assertEqual(len(row.job_role), role_keywords.MAX_ROLE_LENGTH)
+
+    def test_row_inserted_concurrently_is_updated(self):
+        # The row appears between the lookup and the insert, which then hits the unique role_key
+        RoleKeywords.objects.create(role_key='data scientist', job_role='Data Scientist', keywords=['old'], source='gemini')
+        service = role_keywords.RoleKeywordService(role_keywords.StubBackend(table={'Data Scientist': ['Python']}))
+        with mock.patch.object(RoleKeywords.objects, 'update_or_create', side_effect=IntegrityError):
+            self.assertEqual(service.get('Data Scientist', refresh=True), {'python'})
+        row = RoleKeywords.objects.get(role_key='data scientist')
+        self.assertEqual((row.keywords, row.source), (['python'], 'stub'))
+
+
+class RoleKeywordSingleFlightTests(TransactionTestCase):
+    def test_concurrent_misses_share_one_upstream_call(self):
+        backend = role_keywords.StubBackend(delay=0.3)
+        service = role_keywords.RoleKeywordService(backend)
+        results = []
+
+        def lookup():
+            try:
+                results.append(service.get('Data Scientist'))
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r == role_keywords.fallback_keywords('Data Scientist') for r in results))
+
+
+# --- Builder resume_data (api/resume_data.py) ---
+BUILDER_PAYLOAD = {
+    "personalInfo": {
+        "name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 123 4567", "location": "Berlin",
+        "profession": "Backend Developer", "linkedin": "https://linkedin.com/in/janedoe", "website": "",
+        "imageUrl": [{"uid": "rc-upload-1700000000000-2", "name": "portrait_2024.png", "status": "done",
+                      "lastModified": 1700000000000, "percent": 100, "type": "image/png", "size": 48213,
+                      "url": "https://cdn.example.com/u/portrait_2024.png",
+                      "thumbUrl": "data:image/png;base64,iVBORw0KGgo", "originFileObj": {"uid": "rc-upload-1700000000000-2"}}],
+    },
+    "summary": "Backend developer with six years of Python.",
+    "experience": [{"title": "Engineer", "company": "Acme", "startDate": "2019-01", "currentlyWorking": True,
+                    "description": "Built Django APIs"}],
+    "education": [], "skills": [{"name": "Python"}, {"name": "SQL"}], "projects": [],
+}
+
+
+class ResumeDataTests(TestCase):
+    def test_image_upload_is_not_resume_text(self):
+        personal = resume_data_sections(BUILDER_PAYLOAD)["personalInfo"]
+        self.assertEqual(personal.splitlines(), ["Jane Doe", "jane@example.com", "+1 555 123 4567", "Berlin",
+                                                 "Backend Developer", "https://linkedin.com/in/janedoe"])
+
+    def test_changing_the_image_leaves_sections_unchanged(self):
+        changed = json.loads(json.dumps(BUILDER_PAYLOAD))
+        changed["personalInfo"]["imageUrl"][0].update(name="new.jpg", status="uploading", url="blob:http://localhost/1")
+        self.assertEqual(resume_data_sections(changed), resume_data_sections(BUILDER_PAYLOAD))
+
+
+class GrammarPoolTests(TestCase):
+    def test_hung_tool_is_replaced_after_a_timed_out_check(self):
+        tools = [FakeTool(hang=True), FakeTool()]
+        checker = grammar.GrammarChecker(lambda: tools.pop(0), workers=1, deadline=0.2)
+        hung = checker._pool._idle.queue[0]
+
+        self.assertIsNone(checker.check("This one hangs."))
+        self.assertTrue(hung.closed.wait(1))
+        self.assertEqual(checker.check("This one is checked by a fresh tool."), [])
+        self.assertEqual(tools, [])
+
+    def test_checkout_gives_up_when_no_tool_frees_up(self):
+        pool = grammar._ToolPool(FakeTool, 1)
+        pool.acquire()
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.1)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_slow_tool_is_discarded_instead_of_released(self):
+        pool = grammar._ToolPool(FakeTool, 1)
+        tool = pool.acquire()
+        pool.discard(tool)
+        self.assertTrue(tool.closed.is_set())
+        self.assertIsNot(pool.acquire(timeout=0.1), tool)
+
+
+class SkillMatcherTests(TestCase):
+    def test_short_skills_do_not_match_inside_longer_words(self):
+        matching, missing = SkillMatcher(['Django', 'MongoDB']).match(['Go', 'golang'])
+        self.assertEqual(matching, [])
+        self.assertEqual(missing, ['Go', 'Golang'])
+
+        matching, _ = SkillMatcher(['Go']).match(['Django'])
+        self.assertEqual(matching, [])
+
+    def test_short_skills_match_as_whole_words(self):
+        matching, _ = SkillMatcher(['Go microservices', 'C++']).match(['golang', 'C++', 'Vue'])
+        self.assertEqual(matching, ['Golang', 'C++'])
+
+    def test_other_short_skills_keep_matching_by_containment(self):
+        matching, _ = SkillMatcher(['MySQL', 'PostgreSQL']).match(['SQL'])
+        self.assertEqual(matching, ['Sql'])
+        matching, _ = SkillMatcher(['SQL']).match(['MySQL', 'PostgreSQL'])
+        self.assertEqual(matching, ['Mysql', 'Postgresql'])
+
+    def test_parity_with_the_original_containment_match(self):
+        def original(skills, targets):
+            # The matching the views did before SkillMatcher, verbatim
+            resume_lower = set(s.lower() for s in skills)
+            return {t.capitalize() for t in targets
+                    if t in resume_lower or any(t in s for s in resume_lower) or any(s in t for s in resume_lower)}
+
+        targets = ["sql", "mysql", "python", "django", "go", "golang", "react", "node", "node.js", "js", "javascript",
+                   "aws", "kubernetes", "k8s", "c++", "c", "java", "ml", "machine learning", "html", "css", "mongo",
+                   "postgres", "git", "github", "r", "excel", "powerbi", "tensorflow", "tf", "vue", "spring"]
+        # Every difference comes from the aliases: "go" (from golang) no longer matches inside
+        # another word, and an alias is compared as the skill it stands for ("js" as "javascript",
+        # so it is contained in "java" and "javascript" the way "javascript" itself always was)
+        corpus = [
+            (["Python", "MySQL", "Django", "Docker"], {"Go"}, set()),
+            (["PostgreSQL", "React Native", "Node.js", "AWS Lambda"], {"Js"}, set()),
+            (["Java", "Spring Boot", "Kubernetes", "Go microservices"], set(), {"Golang", "Js", "K8s"}),
+            (["C++", "C#", "Machine Learning", "TensorFlow", "HTML"], set(), {"Tf"}),
+            (["JavaScript", "TypeScript", "Vue", "MongoDB", "Git"], {"Go"}, {"Js"}),
+            (["R", "SQL Server", "Excel", "Tableau", "Power BI"], set(), {"Js", "K8s", "Ml", "Tf"}),
+        ]
+        for skills, dropped, added in corpus:
+            matching, _ = SkillMatcher(skills).match(targets)
+            before = original(skills, targets)
+            self.assertEqual((before - set(matching), set(matching) - before), (dropped, added), skills)
+
+    def test_longer_skills_still_match_by_containment(self):
+        matching, missing = SkillMatcher(['React Native', 'scikit learn']).match(['React', 'sklearn', 'Vue'])
+        self.assertEqual(matching, ['React', 'Sklearn'])
+        self.assertEqual(missing, ['Vue'])
+
+
+
+class ContactExtractionTests(TestCase):
+    def test_matches_the_inline_extraction_it_replaced(self):
+        texts = [
+            bench_contact.synthetic_resume(3),
+            "Jane Doe\nEmail: jane.doe @ example.com\nPhone: +44 20 7946 0958",
+            "Jane Doe\nJaneDoe jane@ex ample.com",
+            "Summary\nJohn Smith\ncontact:john.smith@mail.co.uk tel 555-123-4567 ext",
+            "Experience only\nno contact details here",
+        ]
+        for text in texts:
+            self.assertEqual(extract_contact_info(text), bench_contact.legacy_extract_contact_info(text), text)
+
+    def test_split_address_and_formatted_phone(self):
+        contact = extract_contact_info("Jane Q Doe\njane.doe@exa mple.com\n+1 555 010 2030")
+        self.assertEqual(contact, {"name": "Jane Q Doe", "email": "jane.doe@example.com", "phone": "555 010 2030"})
+
+    def test_pathological_inputs_stay_fast(self):
+        for text in ("Name\n" + "a" * 200000, "Name\n" + "x@" * 50000, "Name\n" + "5 word " * 40000 + "5551234567"):
+            started = time.perf_counter()
+            extract_contact_info(text)
+            self.assertLess(time.perf_counter() - started, 1.0)
+
+
+class ArrayFileTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+    def test_append_drops_a_partial_trailing_row(self):
+        store = _ArrayFile(os.path.join(self.location, 'vectors.int8'), 4, quantized=True)
+        self.assertEqual(store.append([1, 2, 3, 4]), 0)
+        with open(store.path, 'ab') as f: f.write(b'\x01\x02')  # a writer that died mid-row
+
+        self.assertEqual(store.rows(), 1)
+        self.assertEqual(store.append([4, 3, 2, 1]), 1)
+        self.assertEqual(os.path.getsize(store.path), 2 * store.row_bytes)
+        self.assertEqual(os.path.getsize(store.scales_path), 2 * 4)
+        self.assertTrue(np.allclose(store.read(1), [4, 3, 2, 1], atol=0.05))
+
+    def test_a_row_without_its_scale_is_not_read_and_is_overwritten(self):
+        store = _ArrayFile(os.path.join(self.location, 'vectors.int8'), 4, quantized=True)
+        store.append([1, 2, 3, 4])
+        with open(store.path, 'ab') as f: f.write(b'\x7f' * store.row_bytes)  # died before its scale
+
+        self.assertEqual(store.rows(), 1)
+        self.assertEqual(len(store.matrix()), 1)
+        self.assertEqual(store.append([2, 2, 2, 2]), 1)
+        self.assertTrue(np.allclose(store.matrix(), [[1, 2, 3, 4], [2, 2, 2, 2]], atol=0.05))
+
+
+class EmbeddingVersionTests(TestCase):
+    def test_chunk_size_changes_the_store_and_cache_keys(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        backend = LocMemBackend()
+        with override_settings(EMBEDDING_CHUNK_WORDS=0):
+            store = EmbeddingStore(location)
+            AnalysisCache(backend, stage_versions={'embedding': embedding_version()}).set('embedding', 'k', [1.0])
+        with override_settings(EMBEDDING_CHUNK_WORDS=64):
+            self.assertNotEqual(EmbeddingStore(location).model_name, store.model_name)
+            self.assertIsNone(AnalysisCache(backend, stage_versions={'embedding': embedding_version()}).get('embedding', 'k'))
+
+
+class MetricsTests(TestCase):
+    def test_endpoints_are_staff_only_by_default(self):
+        client = APIClient()
+        self.assertIn(client.get('/metrics').status_code, (401, 403))
+        self.assertIn(client.get('/api/analyze/metrics/').status_code, (401, 403))
+
+        client.force_authenticate(User.objects.create_user('member', password='pw'))
+        self.assertEqual(client.get('/metrics').status_code, 403)
+
+        client.force_authenticate(User.objects.create_user('ops', password='pw', is_staff=True))
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('worker="', response.content.decode())
+
+    @override_settings(METRICS_PUBLIC=True)
+    def test_metrics_public_opens_them(self):
+        self.assertEqual(APIClient().get('/api/analyze/metrics/').status_code, 200)
+
+    def test_snapshot_directory_reports_every_live_worker(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        registry = MetricsRegistry()
+        registry.counter('jobs_total', 'Jobs.').inc(3)
+        other = {'jobs_total': {'type': 'counter', 'help': 'Jobs.', 'samples': [{'labels': {}, 'value': 4}]}}
+        with open(os.path.join(location, '1.json'), 'w') as f: json.dump(other, f)  # pid 1 is always alive
+        with open(os.path.join(location, '999999999.json'), 'w') as f: json.dump(other, f)
+
+        snapshots = SnapshotDirectory(location, registry=registry).collect()
+        self.assertEqual(set(snapshots), {'1', str(os.getpid())})
+        self.assertFalse(os.path.exists(os.path.join(location, '999999999.json')))
+        text = render_prometheus(snapshots)
+        self.assertEqual(text.count('# TYPE jobs_total counter'), 1)
+        self.assertIn('jobs_total{worker="1"} 4', text)
+        self.assertIn(f'jobs_total{{worker="{os.getpid()}"}} 3', text)
+
+
+class PdfExtractionTests(TestCase):
+    @override_settings(PDF_TIME_BUDGET=0.3, PDF_PARALLEL_MIN_PAGES=2, PDF_PAGES_PER_TASK=1, PDF_WORKERS=2)
+    def test_a_hung_page_range_does_not_outlast_the_budget(self):
+        path = blank_pdf(self, 4)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def extract_page_range(path, indices, deadline):
+            if indices == [1]: release.wait(10)  # a page the parser never finishes
+            return [(i, f"page {i}", 0.0) for i in indices]
+
+        pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown, wait=False)
+        with mock.patch.object(pdf_extraction, 'get_page_pool', return_value=pool), \
+                mock.patch.object(pdf_extraction, '_extract_page_range', extract_page_range):
+            started = time.monotonic()
+            result = pdf_extraction.extract_pdf(path)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(result.stopped_reason, 'time_budget')
+        self.assertEqual(result.pages, {0: "page 0"})
+
+    @override_settings(PDF_TIME_BUDGET=0.5, PDF_PARALLEL_MIN_PAGES=2, PDF_PAGES_PER_TASK=1, PDF_WORKERS=2)
+    def test_a_pool_wedged_by_a_slow_range_is_replaced(self):
+        path = blank_pdf(self, 4)
+        self.addCleanup(setattr, pdf_extraction, '_pool', None)
+        recycled, recycle = [], pdf_extraction._recycle_pool
+
+        def record(pool):
+            recycled.append((pool, list(pool._processes.values())))
+            recycle(pool)
+
+        with mock.patch.object(pdf_extraction, '_extract_page_range', slow_page_range), \
+                mock.patch.object(pdf_extraction, '_recycle_pool', record):
+            started = time.monotonic()
+            result = pdf_extraction.extract_pdf(path)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(result.stopped_reason, 'time_budget')
+        self.assertEqual(result.pages, {0: "page 0"})
+        (pool, processes), = recycled
+        self.assertIsNot(pdf_extraction.get_page_pool(2), pool)
+        for process in processes:
+            process.join(5)
+            self.assertFalse(process.is_alive())
+
+
+def blank_pdf(test, pages):
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location, ignore_errors=True)
+    path = os.path.join(location, 'resume.pdf')
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages): writer.add_blank_page(width=200, height=200)
+    with open(path, 'wb') as f: writer.write(f)
+    return path
+
+
+def slow_page_range(path, indices, deadline):
+    # Module level so the page pool's worker processes can unpickle it
+    if indices == [1]: time.sleep(30)
+    return [(i, f"page {i}", 0.0) for i in indices]
+
+
+@override_settings(BATCH_MAX_FILE_BYTES=100, BATCH_MAX_FILES=2)
+class BatchUploadTests(TestCase):
+    def test_uploaded_files_are_held_to_the_per_file_limit(self):
+        files = [SimpleUploadedFile('small.pdf', b'x' * 100), SimpleUploadedFile('big.pdf', b'x' * 101)]
+        with self.assertRaisesMessage(AnalysisError, 'big.pdf is larger than 100 bytes.'):
+            collect_batch_files(files)
+
+    def test_uploaded_files_are_counted_before_they_are_read(self):
+        files = [SimpleUploadedFile(f'{i}.docx', b'x') for i in range(3)]
+        with mock.patch.object(SimpleUploadedFile, 'read', side_effect=AssertionError("read")), \
+                self.assertRaisesMessage(AnalysisError, 'At most 2 resumes per batch.'):
+            collect_batch_files(files)
+        collected = collect_batch_files(files[:2] + [SimpleUploadedFile('notes.txt', b'x')])
+        self.addCleanup(collected.close)
+        self.assertEqual([name for name, _ in collected], ['0.docx', '1.docx'])
+
+    def test_files_are_spooled_to_disk_until_the_batch_closes(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.writestr('zipped.pdf', b'z' * 50)
+            z.writestr('notes.txt', b'skip me')
+        archive.seek(0)
+        collected = collect_batch_files([SimpleUploadedFile('a.docx', b'a' * 10)], SimpleUploadedFile('r.zip', archive.read()))
+        contents = {}
+        for name, path in collected:
+            with open(path, 'rb') as f: contents[name] = f.read()
+        self.assertEqual(contents, {'a.docx': b'a' * 10, 'zipped.pdf': b'z' * 50})
+        collected.close()
+        self.assertFalse(os.path.exists(collected.directory))
+
+
+@override_settings(BATCH_ENCODE_SIZE=1)
+class BatchStreamingTests(StubModelsMixin, IsolatedStoresMixin, TransactionTestCase):
+    def batch(self, count):
+        files = [SimpleUploadedFile(f'{i}.docx', resume_docx(f"{RESUME_TEXT}\nProject {i}")) for i in range(count)]
+        return collect_batch_files(files)
+
+    def test_each_chunk_is_emitted_before_the_next_is_encoded(self):
+        encoded, encode_many = [], EmbeddingBatcher.encode_many
+
+        def record(batcher, texts, batch_size=None):
+            encoded.append(len(texts))
+            return encode_many(batcher, texts, batch_size)
+
+        files = self.batch(3)
+        pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        with mock.patch.object(batch, 'get_extract_pool', return_value=pool), \
+                mock.patch.object(EmbeddingBatcher, 'encode_many', record):
+            events = run_batch_analysis(files, 'Data Scientist', 'Python and SQL')
+            first = next(events)
+            self.assertEqual((first["type"], encoded), ("result", [1]))
+            rest = list(events)
+        self.assertEqual(encoded, [1, 1, 1])
+        self.assertEqual([e["type"] for e in rest], ["result", "result", "ranking"])
+        self.assertEqual(sorted(r["rank"] for r in rest[-1]["results"]), [1, 2, 3])
+        self.assertFalse(os.path.exists(files.directory))
+
+    def test_closing_the_stream_removes_the_spooled_files(self):
+        files = self.batch(2)
+        pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        with mock.patch.object(batch, 'get_extract_pool', return_value=pool):
+            stream = stream_ndjson(run_batch_analysis(files, 'Data Scientist', ''))
+            self.assertEqual(json.loads(next(stream))["type"], "result")
+            stream.close()
+        self.assertFalse(os.path.exists(files.directory))
+
+
+class ReadinessTests(TestCase):
+    def status(self, **states):
+        return {name: {"state": states.get(name, "ready"), "load_seconds": None, "memory_bytes": None, "error": None}
+                for name in ("nlp", "similarity", "grammar")}
+
+    def test_a_missing_optional_model_only_degrades(self):
+        with mock.patch('api.views.registry.status', return_value=self.status(grammar='failed')):
+            response = APIClient().get('/api/analyze/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["ready"], response.data["degraded"]), (True, ["grammar"]))
+
+    def test_a_missing_required_model_is_not_ready(self):
+        with mock.patch('api.views.registry.status', return_value=self.status(similarity='not_loaded')):
+            response = APIClient().get('/api/analyze/')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.data["ready"])
+
+
+class ModelPreloadTests(TestCase):
+    def setUp(self):
+        self.loaded = []
+        self.registry = ModelRegistry()
+        for name in ("nlp", "similarity", "grammar"):
+            self.registry.register(name, lambda name=name: self.loaded.append(name) or name)
+
+    def test_warm_loads_every_model_by_default(self):
+        self.registry.warm()
+        self.assertEqual(self.loaded, ["nlp", "similarity", "grammar"])
+
+    def test_an_empty_preload_list_loads_nothing(self):
+        self.assertEqual({info["state"] for info in self.registry.warm([]).values()}, {"not_loaded"})
+        self.assertEqual(self.loaded, [])
+
+    def test_preload_shared_loads_only_the_listed_models(self):
+        self.addCleanup(gc.unfreeze)
+        with mock.patch.object(model_registry, 'registry', self.registry):
+            status = model_registry.preload_shared(["nlp"])
+        self.assertEqual(self.loaded, ["nlp"])
+        self.assertEqual(status["nlp"]["state"], "ready")
+        self.assertEqual(status["grammar"]["state"], "not_loaded")
+
+
+@override_settings(AUTH_USER_CACHE_TTL=300)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        authentication._user_cache().clear()
+        caches['auth'].clear()
+        self.user = User.objects.create_user('cached', password='pw')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def db_lookups(self):
+        return sum(v for labels, v in authentication.user_lookups_total.samples() if labels == {'source': 'db'})
+
+    def test_a_version_bumped_by_another_worker_drops_the_cached_user(self):
+        self.assertEqual(self.client.get('/api/history/').status_code, 200)
+        # Another worker deactivated the user: no signal here, only the shared version moved
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/history/').status_code, 200)
+        authentication.bump_user_version(str(self.user.pk))
+        self.assertEqual(self.client.get('/api/history/').status_code, 401)
+
+    def test_saving_a_user_bumps_their_version(self):
+        before = authentication.user_version(str(self.user.pk))
+        self.user.is_active = False
+        self.user.save()
+        self.assertGreater(authentication.user_version(str(self.user.pk)), before)
+        self.assertEqual(self.client.get('/api/history/').status_code, 401)
+
+    def test_a_user_loaded_while_the_version_moved_is_not_cached(self):
+        with mock.patch.object(authentication, 'user_version', side_effect=[0, 1]):
+            self.client.get('/api/history/')
+        lookups = self.db_lookups()
+        self.client.get('/api/history/')
+        self.assertEqual(self.db_lookups(), lookups + 1)
+        self.client.get('/api/history/')
+        self.assertEqual(self.db_lookups(), lookups + 1)
+
+    @override_settings(AUTH_USER_VERSION_CACHE='default')
+    def test_users_are_not_cached_behind_a_per_process_version_cache(self):
+        self.client.get('/api/history/')
+        lookups = self.db_lookups()
+        self.client.get('/api/history/')
+        self.assertEqual(self.db_lookups(), lookups + 1)
+
+
+def docx_bytes(body):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w') as archive:
+        archive.writestr('word/document.xml', '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                                              f'<w:body>{body}</w:body></w:document>')
+    return out.getvalue()
+
+
+def cell(text, merge=None, val=None):
+    props = ''
+    if merge: props = f'<w:{merge} w:val="{val}"/>' if val else f'<w:{merge}/>'
+    return f'<w:tc><w:tcPr>{props}</w:tcPr><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc>'
+
+
+class DocxExtractionTests(TestCase):
+    def test_equal_neighbouring_cells_are_kept(self):
+        table = f'<w:tbl><w:tr>{cell("Python")}{cell("Yes")}{cell("Yes")}</w:tr></w:tbl>'
+        self.assertEqual(extract_docx_streaming(docx_bytes(table)), 'Python | Yes | Yes')
+
+    def test_merged_continuation_cells_are_skipped(self):
+        table = ('<w:tbl>'
+                 f'<w:tr>{cell("Skills", "hMerge", "restart")}{cell("Skills", "hMerge")}{cell("Go")}</w:tr>'
+                 f'<w:tr>{cell("Tools", "vMerge", "restart")}{cell("Docker")}</w:tr>'
+                 f'<w:tr>{cell("Tools", "vMerge", "continue")}{cell("Git")}</w:tr>'
+                 '</w:tbl>')
+        self.assertEqual(extract_docx_streaming(docx_bytes(table)), 'Skills | Go\nTools | Docker\nGit')
+
+
+class FreshRoleProfilesMixin:
+    """Builds role profiles from scratch rather than reusing another test's (other encoders, other dims)."""
+
+    def setUp(self):
+        super().setUp()
+        patch = mock.patch.multiple(role_fit, _profiles=None, _signature=None)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+
+class RoleFitKeyTests(FreshRoleProfilesMixin, TestCase):
+    def encode_many(self, texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    def test_profiles_and_reports_follow_the_embedding_version_and_weight(self):
+        cache = AnalysisCache(LocMemBackend())
+        profiles = get_role_profiles(self.encode_many, cache)
+        key = role_fit_report_key('file', profiles)
+        with override_settings(ROLE_FIT_SEMANTIC_WEIGHT=0.5):
+            self.assertNotEqual(role_fit_report_key('file', profiles), key)
+        # Same catalog, so only the embedding version can tell the profiles apart
+        with override_settings(EMBEDDING_CHUNK_WORDS=64), mock.patch.object(role_fit, '_signature', None):
+            self.assertNotEqual(get_role_profiles(self.encode_many, cache).version, profiles.version)
+
+
+class RoleCatalogTests(TestCase):
+    def setUp(self):
+        RoleKeywords.objects.create(role_key='data scientist', job_role='data scientist', keywords=['Python', 'Spark'], source='gemini')
+        RoleKeywords.objects.create(role_key='my secret startup role', job_role='My Secret Startup Role',
+                                    keywords=['Stealth'], source='gemini')
+
+    def test_only_curated_roles_are_ranked(self):
+        catalog = role_catalog()
+        self.assertEqual(set(catalog), set(FALLBACK_ROLE_SKILLS))
+        self.assertEqual(catalog['Data Scientist'], ['python', 'spark'])
+
+    @override_settings(ROLE_FIT_EXTRA_ROLES=['My Secret Startup Role', 'Unknown Role'])
+    def test_allowlisted_roles_join_once_their_keywords_are_cached(self):
+        catalog = role_catalog()
+        self.assertEqual(catalog['My Secret Startup Role'], ['stealth'])
+        self.assertNotIn('Unknown Role', catalog)
+
+
+class RoleFitCacheTests(FreshRoleProfilesMixin, StubModelsMixin, TransactionTestCase):
+    @override_settings(GRAMMAR_DEADLINE=0.05)
+    def test_a_ranking_without_grammar_is_not_cached(self):
+        registry.register("grammar", lambda: grammar.GrammarChecker(lambda: stubs.StubLanguageTool(latency=0.3), deadline=0.05))
+        cache = AnalysisCache(LocMemBackend())
+        report, _, _ = run_role_fit(resume_docx(), 'resume.docx', cache)
+        self.assertEqual(len(report["roles"]), len(FALLBACK_ROLE_SKILLS))
+        _, hits, _ = run_role_fit(resume_docx(), 'resume.docx', cache)
+        self.assertFalse(hits["role_fit"])
+
+
+class ReportCacheTests(StubModelsMixin, TransactionTestCase):
+    def test_a_complete_report_is_cached(self):
+        cache = AnalysisCache(LocMemBackend())
+        report, hits, _ = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', 'Python and SQL', cache)
+        self.assertTrue(report["success"])
+        self.assertFalse(hits["report"])
+        again, hits, _ = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', 'Python and SQL', cache)
+        self.assertTrue(hits["report"])
+        self.assertEqual(again, report)
+
+    @override_settings(GRAMMAR_DEADLINE=0.05)
+    def test_a_report_without_grammar_is_not_cached(self):
+        registry.register("grammar", lambda: grammar.GrammarChecker(lambda: stubs.StubLanguageTool(latency=0.3), deadline=0.05))
+        cache = AnalysisCache(LocMemBackend())
+        run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', cache)
+        _, hits, _ = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', cache)
+        self.assertFalse(hits["report"])
+
+    def test_a_report_on_fallback_role_keywords_is_not_cached(self):
+        role_keywords._service = role_keywords.RoleKeywordService(FailingBackend())
+        cache = AnalysisCache(LocMemBackend())
+        report, _, _ = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', cache)
+        self.assertTrue(report["role_matching_skills"])
+        _, hits, _ = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', cache)
+        self.assertFalse(hits["report"])
+
+    def test_the_report_key_follows_the_embedding_version(self):
+        cache = AnalysisCache(LocMemBackend())
+        run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', 'Python and SQL', cache)
+        with override_settings(EMBEDDING_CHUNK_WORDS=64):
+            _, hits, _ = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', 'Python and SQL', cache)
+        self.assertFalse(hits["report"])
+
+
+BUILDER_DATA = {
+    'personalInfo': {'fullName': 'Jane Doe', 'email': 'jane@example.com'},
+    'experience': [{'title': 'Engineer', 'company': 'Acme', 'description': 'Built Python and Django services on AWS.'}],
+    'skills': ['Python', 'SQL', 'Docker'],
+}
+
+
+class BuilderReportCacheTests(StubModelsMixin, TransactionTestCase):
+    def test_a_complete_builder_report_is_cached(self):
+        cache = AnalysisCache(LocMemBackend())
+        analyze_resume_data('r1', BUILDER_DATA, 'Data Scientist', 'Python and SQL', cache)
+        _, sections = analyze_resume_data('r1', BUILDER_DATA, 'Data Scientist', 'Python and SQL', cache)
+        self.assertTrue(sections["cache"]["report"])
+
+    @override_settings(GRAMMAR_DEADLINE=0.05)
+    def test_a_builder_report_without_grammar_is_not_cached(self):
+        registry.register("grammar", lambda: grammar.GrammarChecker(lambda: stubs.StubLanguageTool(latency=0.3), deadline=0.05))
+        cache = AnalysisCache(LocMemBackend())
+        analyze_resume_data('r1', BUILDER_DATA, 'Data Scientist', '', cache)
+        _, sections = analyze_resume_data('r1', BUILDER_DATA, 'Data Scientist', '', cache)
+        self.assertFalse(sections["cache"]["report"])
+
+    def test_sections_are_reused_by_another_worker_sharing_the_backend(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        analyze_resume_data('r1', BUILDER_DATA, 'Data Scientist', 'Python and SQL', AnalysisCache(FileBackend(location)))
+        edited = {**BUILDER_DATA, 'skills': ['Python', 'SQL', 'Docker', 'Kubernetes']}
+        _, sections = analyze_resume_data('r1', edited, 'Data Scientist', 'Python and SQL', AnalysisCache(FileBackend(location)))
+        self.assertEqual(sections["changed"], ['skills'])
+        for stage in ("section_entities", "section_grammar", "section_embedding"):
+            self.assertEqual(sections["recomputed"][stage], ['skills'], stage)
+
+    def test_section_embeddings_are_versioned(self):
+        with mock.patch.object(analysis_cache, '_cache', None):
+            cache = analysis_cache.get_analysis_cache()
+        self.assertEqual(cache.stage_versions['section_embedding'], embedding_version())
+
+
+class SemanticSearchTests(StubModelsMixin, IsolatedStoresMixin, MediaRootMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='search')
+
+    def search(self):
+        results, _, _ = search_for_job_description("Python Django services on AWS", owner_id=self.user.pk,
+                                                   cache=AnalysisCache(LocMemBackend()))
+        return results
+
+    def test_an_analysis_without_a_job_description_is_searchable(self):
+        report, _, keys = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', AnalysisCache(LocMemBackend()))
+        analysis = save_analysis(self.user, 'Data Scientist', ContentFile(resume_docx(), name='resume.docx'), report, keys)
+        self.assertEqual([r["analysis_id"] for r in self.search()], [analysis.pk])
+
+    def test_an_analysis_served_from_the_report_cache_is_linked_too(self):
+        cache = AnalysisCache(LocMemBackend())
+        run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', cache)
+        report, hits, keys = run_analysis(resume_docx(), 'resume.docx', 'Data Scientist', '', cache)
+        self.assertTrue(hits["report"])
+        analysis = save_analysis(self.user, 'Data Scientist', ContentFile(resume_docx(), name='resume.docx'), report, keys)
+        self.assertTrue(analysis.embeddings.exists())
+
+    def test_backfill_indexes_rows_saved_before_indexing(self):
+        analysis = Analysis.objects.create(user=self.user, job_role='Engineer', ats_score_general=50, analysis_result={},
+                                           resume_file=ContentFile(resume_docx(), name='resume.docx'))
+        resume = Resume.objects.create(user=self.user, title='Builder', resume_data=BUILDER_DATA)
+        self.assertEqual(self.search(), [])
+        out = io.StringIO()
+        call_command('backfill_search_index', stdout=out)
+        self.assertIn("1 builder resumes indexed", out.getvalue())
+        self.assertIn("1 analyses indexed", out.getvalue())
+        found = {(r["resume_id"], r["analysis_id"]) for r in self.search()}
+        self.assertEqual(found, {(resume.pk, None), (None, analysis.pk)})
+
+        call_command('backfill_search_index', stdout=out)
+        self.assertIn("0 analyses indexed", out.getvalue())
+
+
+class StageCacheViewTests(StubModelsMixin, IsolatedStoresMixin, MediaRootMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='stages'))
+
+    def analyze(self, job_role, job_description='Python and SQL'):
+        upload = SimpleUploadedFile('resume.docx', resume_docx())
+        response = self.client.post('/api/analyze/', {'resume_file': upload, 'job_role': job_role,
+                                                      'job_description': job_description})
+        self.assertEqual(response.status_code, 200)
+        return response.data["cache"]
+
+    def test_a_new_role_reuses_the_resume_and_jd_stages(self):
+        first = self.analyze('Data Scientist')
+        self.assertFalse(any(first.values()))
+        second = self.analyze('Backend Developer')
+        self.assertFalse(second["report"])
+        for stage in ("text", "entities", "grammar", "embedding", "jd_entities", "jd_embedding"):
+            self.assertTrue(second[stage], stage)
+        self.assertTrue(self.analyze('Backend Developer')["report"])
+
+    def test_a_new_job_description_reuses_only_the_resume_stages(self):
+        self.analyze('Data Scientist')
+        hits = self.analyze('Data Scientist', 'Go and Kubernetes')
+        self.assertTrue(hits["text"] and hits["entities"] and hits["embedding"])
+        self.assertFalse(hits["jd_entities"] or hits["jd_embedding"] or hits["report"])
+
+
+class BenchmarkTests(StubModelsMixin, IsolatedStoresMixin, TransactionTestCase):
+    def test_the_corpus_is_reproducible_and_every_document_is_distinct(self):
+        first = corpus.build_corpus(sizes=("small",), per_cell=2, seed=7)
+        self.assertEqual(first, corpus.build_corpus(sizes=("small",), per_cell=2, seed=7))
+        self.assertNotEqual(first, corpus.build_corpus(sizes=("small",), per_cell=2, seed=8))
+        self.assertEqual(len({data for *_, data in first}), 4)
+        text = ''.join(page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(first[0][3])).pages)
+        self.assertIn("Ref 7-small-pdf-0", text)
+
+    def test_a_pass_reports_every_stage_and_compare_flags_a_slowdown(self):
+        docs = corpus.build_corpus(sizes=("small",), per_cell=1)
+        wall, rows = bench_pipeline.run_pass(docs, ["Data Scientist"], 2, analysis_cache.get_analysis_cache())
+        base = {"cold": bench_pipeline.report_pass(wall, rows)}
+        self.assertEqual(base["cold"]["end_to_end"]["count"], 2)
+        self.assertEqual(set(base["cold"]["by_document"]), {"pdf/small", "docx/small"})
+        self.assertIn("embedding", base["cold"]["stages"])
+
+        slower = json.loads(json.dumps(base))
+        slower["cold"]["end_to_end"]["p95_ms"] += 1000
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        paths = []
+        for name, result in (("base", base), ("same", base), ("slower", slower)):
+            paths.append(os.path.join(directory, f"{name}.json"))
+            with open(paths[-1], 'w', encoding='utf-8') as f: json.dump(result, f)
+
+        def compare_exit(new):
+            with mock.patch('sys.argv', ['compare.py', paths[0], new]), mock.patch('sys.stdout', io.StringIO()) as out:
+                with self.assertRaises(SystemExit) as exit:
+                    compare.main()
+            return exit.exception.code, out.getvalue()
+        self.assertEqual(compare_exit(paths[1])[0], 0)
+        code, out = compare_exit(paths[2])
+        self.assertEqual(code, 1)
+        self.assertIn("cold/end_to_end/all", out)
+        self.assertIn("1 regression(s)", out)
+
+
+class RecordingNER:
+    """A statistical NER stand-in that tags every text as one ORG and remembers what it saw."""
+    pipe_names = ["ner"]
+
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, text):
+        self.seen.append(text)
+        return SimpleNamespace(ents=[SimpleNamespace(label_="ORG", text=text)])
+
+    def pipe(self, texts, batch_size=16, n_process=1):
+        for text in texts:
+            yield self(text)
+
+
+class SkillNLPTests(TestCase):
+    def setUp(self):
+        self.ner = RecordingNER()
+        self.nlp = SkillNLP(stubs.StubNLP(["python", "sql"]), self.ner)
+
+    def fallbacks(self):
+        return sum(v for _, v in nlp_profile.ner_fallback_total.samples())
+
+    def test_ner_only_runs_for_texts_without_a_skill(self):
+        before = self.fallbacks()
+        self.assertEqual([e.label_ for e in self.nlp("Python and SQL").ents], ["SKILL", "SKILL"])
+        self.assertEqual(self.ner.seen, [])
+        self.assertEqual([e.label_ for e in self.nlp("Acme Corp").ents], ["ORG"])
+        self.assertEqual(self.ner.seen, ["Acme Corp"])
+        self.assertEqual(self.fallbacks() - before, 1)
+        self.assertEqual(self.nlp.pipe_names, ["entity_ruler", "fallback:ner"])
+
+    def test_pipe_keeps_the_input_order(self):
+        texts = ["Acme Corp", "python", "Globex", "sql", "Initech"]
+        docs = list(self.nlp.pipe(texts))
+        self.assertEqual([d.ents[0].label_ for d in docs], ["ORG", "SKILL", "ORG", "SKILL", "ORG"])
+        self.assertEqual([d.ents[0].text for d in docs], ["Acme Corp", "python", "Globex", "sql", "Initech"])
+        self.assertEqual(self.ner.seen, ["Acme Corp", "Globex", "Initech"])
+
+    def test_without_a_fallback_the_ruler_doc_is_returned(self):
+        nlp = SkillNLP(stubs.StubNLP(["python"]))
+        self.assertEqual(nlp("Acme Corp").ents, [])
+        self.assertEqual([list(d.ents) for d in nlp.pipe(["Acme", "Globex"])], [[], []])
+        self.assertEqual(nlp.pipe_names, ["entity_ruler"])
+
+
+class AnalysisStreamTests(StubModelsMixin, IsolatedStoresMixin, MediaRootMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='streamer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Stages that outlive a failed stream still touch the database; drain them before it is flushed
+        pools = (ThreadPoolExecutor(max_workers=2), ThreadPoolExecutor(max_workers=4))
+        patch = mock.patch('api.pipeline._executors', pools)
+        patch.start()
+        self.addCleanup(lambda: [pool.shutdown(wait=True) for pool in pools])
+        self.addCleanup(patch.stop)
+
+    def stream(self, file_name='resume.docx', data=None, **fields):
+        upload = SimpleUploadedFile(file_name, resume_docx() if data is None else data)
+        response = self.client.post('/api/analyze/stream/', {'resume_file': upload, 'job_role': 'Data Scientist', **fields})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = []
+        for block in b''.join(response.streaming_content).decode().strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return events
+
+    def test_partial_results_arrive_before_the_report(self):
+        events = self.stream(job_description='Python and SQL')
+        names = [name for name, _ in events]
+        self.assertEqual(names[0], 'contact')
+        self.assertEqual(names[-1], 'report')
+        self.assertEqual(sorted(names), sorted(['contact', 'skills', 'role_match', 'grammar', 'jd_match', 'report']))
+        self.assertLess(names.index('skills'), names.index('role_match'))
+        self.assertLess(names.index('skills'), names.index('jd_match'))
+
+        partial, report = dict(events[:-1]), events[-1][1]
+        self.assertEqual(partial['contact']['email'], 'jane@example.com')
+        self.assertIn('python', [s.lower() for s in partial['skills']['resume_skills']])
+        self.assertEqual(partial['role_match']['role_matching_skills'], report['role_matching_skills'])
+        self.assertEqual(partial['jd_match']['jd_matching_skills'], report['jd_matching_skills'])
+        self.assertIn('timings', report)
+        self.assertFalse(report['cache']['report'])
+        analysis = Analysis.objects.get(user=self.user)
+        self.assertEqual(analysis.ats_score_jd_match, report['ats_score_jd'])
+
+    def test_without_a_job_description_there_is_no_jd_match(self):
+        names = [name for name, _ in self.stream()]
+        self.assertNotIn('jd_match', names)
+        self.assertEqual(names[-1], 'report')
+
+    def test_an_unreadable_file_ends_the_stream_with_an_error(self):
+        events = self.stream('resume.pdf', b'not a pdf')
+        self.assertEqual(events[-1][0], 'error')
+        self.assertFalse(events[-1][1]['success'])
+        self.assertNotIn('report', [name for name, _ in events])
+        self.assertFalse(Analysis.objects.exists())
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user, other = User.objects.create(username='history'), User.objects.create(username='other')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        # (role, general score, jd score, days ago); two rows share a timestamp to exercise the id tiebreak
+        rows = [("Data Scientist", 60, 50, 40), ("Data Scientist", 70, None, 2), ("Backend Developer", 80, 90, 1),
+                ("Data Scientist", 90, 70, 1), ("Backend Developer", 40, None, 0)]
+        self.ids = []
+        for role, general, jd, days in rows:
+            analysis = Analysis.objects.create(user=self.user, job_role=role, ats_score_general=general,
+                                               ats_score_jd_match=jd, analysis_result={"ats_score_role": general})
+            Analysis.objects.filter(pk=analysis.pk).update(created_at=now - timedelta(days=days))
+            self.ids.append(analysis.pk)
+        self.foreign = Analysis.objects.create(user=other, job_role="Data Scientist", ats_score_general=10,
+                                               analysis_result={}).pk
+
+    def get(self, path, **params):
+        return self.client.get(f'/api/history/{path}', params)
+
+    def test_pages_walk_every_analysis_once_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            response = self.get('', limit=2, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            self.assertNotIn("analysis_result", response.data["results"][0])
+            seen += [row["id"] for row in response.data["results"]]
+            cursor = response.data["next_cursor"]
+            if not cursor: break
+        self.assertEqual(seen, [self.ids[4], self.ids[3], self.ids[2], self.ids[1], self.ids[0]])
+        roles = [row["id"] for row in self.get('', job_role="Backend Developer").data["results"]]
+        self.assertEqual(roles, [self.ids[4], self.ids[2]])
+
+    def test_bad_parameters_are_rejected(self):
+        self.assertEqual(self.get('', cursor='not-a-cursor').status_code, 400)
+        self.assertEqual(self.get('', limit='many').status_code, 400)
+        self.assertEqual(self.get('bulk/', ids='1,x').status_code, 400)
+        self.assertEqual(self.get('trends/', bucket='year').status_code, 400)
+
+    def test_bulk_returns_reports_in_request_order_and_only_the_users_own(self):
+        response = self.get('bulk/', ids=f"{self.ids[3]},{self.foreign},{self.ids[0]}")
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.ids[3], self.ids[0]])
+        self.assertEqual(response.data["results"][0]["analysis_result"], {"ats_score_role": 90})
+        self.assertEqual(response.data["missing"], [self.foreign])
+
+    def test_trends_aggregate_per_role_and_bucket(self):
+        roles = {r["job_role"]: r for r in self.get('trends/', bucket='day').data["roles"]}
+        scientist = roles["Data Scientist"]
+        self.assertEqual((scientist["count"], scientist["best_score"], scientist["worst_score"]), (3, 90, 60))
+        self.assertAlmostEqual(scientist["avg_score"], 220 / 3)
+        self.assertAlmostEqual(scientist["avg_jd_score"], 60)
+        self.assertEqual([p["count"] for p in scientist["series"]], [1, 1, 1])
+        self.assertEqual(roles["Backend Developer"]["count"], 2)
+
+        recent = {r["job_role"]: r for r in self.get('trends/', bucket='month', days=30).data["roles"]}
+        self.assertEqual(recent["Data Scientist"]["count"], 2)
+        self.assertEqual(recent["Data Scientist"]["worst_score"], 70)
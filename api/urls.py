@@ -6,7 +6,15 @@ from .views import (
     RegisterView,
     EnhanceWithAIView,
     ResumeViewSet,
-    ResumeAnalysisView # Make sure this is imported
+    ResumeAnalysisView, # Make sure this is imported
+    ResumeAnalysisStreamView,
+    AnalysisJobStatusView,
+    BatchAnalysisView,
+    AnalyzerMetricsView,
+    SemanticSearchView,
+    AnalysisHistoryView,
+    AnalysisBulkView,
+    AnalysisTrendsView,
 )
 
 router = DefaultRouter()
@@ -19,5 +27,13 @@ urlpatterns = [
     path('enhance/', EnhanceWithAIView.as_view(), name='enhance'),
     # --- Verify this line ---
     path('analyze/', ResumeAnalysisView.as_view(), name='analyze_resume'),
+    path('analyze/stream/', ResumeAnalysisStreamView.as_view(), name='analyze_resume_stream'),
+    path('analyze/<int:job_id>/', AnalysisJobStatusView.as_view(), name='analyze_job_status'),
+    path('analyze/batch/', BatchAnalysisView.as_view(), name='analyze_batch'),
+    path('analyze/metrics/', AnalyzerMetricsView.as_view(), name='analyze_metrics'),
+    path('search/', SemanticSearchView.as_view(), name='semantic_search'),
+    path('history/', AnalysisHistoryView.as_view(), name='analysis_history'),
+    path('history/bulk/', AnalysisBulkView.as_view(), name='analysis_history_bulk'),
+    path('history/trends/', AnalysisTrendsView.as_view(), name='analysis_history_trends'),
     # -----------------------
 ]
\ No newline at end of file
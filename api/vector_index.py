@@ -0,0 +1,165 @@
+# api/vector_index.py
+import threading
+
+import numpy as np
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _top_k(scores, k):
+    if len(scores) <= k:
+        return np.argsort(-scores)
+    idx = np.argpartition(-scores, k)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+class BruteForceIndex:
+    """Exact cosine search: one matrix-vector product over every vector.
+
+    Vectors are kept normalized in a growable array so adds are amortized O(1);
+    removals leave a tombstone that is compacted away once they pile up.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._live = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add(self, item_id, vector):
+        vector = _normalize(vector).reshape(self.dim)
+        with self._lock:
+            pos = self._positions.get(item_id)
+            if pos is not None:
+                self._vectors[pos] = vector
+                return
+            if self._size == len(self._vectors):
+                grow = max(1024, self._size)
+                self._vectors = np.vstack([self._vectors, np.zeros((grow, self.dim), dtype=np.float32)])
+                self._ids = np.concatenate([self._ids, np.zeros(grow, dtype=np.int64)])
+                self._live = np.concatenate([self._live, np.zeros(grow, dtype=bool)])
+            self._vectors[self._size] = vector
+            self._ids[self._size] = item_id
+            self._live[self._size] = True
+            self._positions[item_id] = self._size
+            self._size += 1
+
+    def remove(self, item_id):
+        with self._lock:
+            pos = self._positions.pop(item_id, None)
+            if pos is None: return
+            self._live[pos] = False
+            if self._size > 1024 and len(self._positions) < self._size // 2:
+                self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self._live[:self._size])
+        self._vectors = self._vectors[keep].copy()
+        self._ids = self._ids[keep].copy()
+        self._live = np.ones(len(keep), dtype=bool)
+        self._size = len(keep)
+        self._positions = {int(i): p for p, i in enumerate(self._ids)}
+
+    def vectors(self):
+        with self._lock:
+            live = self._live[:self._size]
+            return self._ids[:self._size][live], self._vectors[:self._size][live]
+
+    def search(self, query, k, allowed=None):
+        """[(item_id, cosine)] for the k closest vectors; allowed is an optional set of ids."""
+        query = _normalize(query).reshape(self.dim)
+        with self._lock:
+            ids = self._ids[:self._size]
+            if allowed is not None:
+                positions = (self._positions.get(i) for i in allowed)
+                candidates = np.fromiter((p for p in positions if p is not None), dtype=np.int64)
+                scores = self._vectors[candidates] @ query
+            else:
+                # Score the contiguous block (no gather copy) and push tombstones to the bottom
+                candidates = np.arange(self._size)
+                scores = self._vectors[:self._size] @ query
+                scores[~self._live[:self._size]] = -np.inf
+        order = _top_k(scores, k)
+        return [(int(ids[candidates[i]]), float(scores[i])) for i in order if scores[i] > -np.inf]
+
+
+class IVFIndex:
+    """Approximate search for large corpora: vectors are bucketed by nearest k-means centroid
+    and a query only scores the vectors in its nprobe closest buckets.
+
+    New vectors go straight into their nearest bucket; call train() again when the
+    corpus has changed a lot.
+    """
+
+    def __init__(self, dim, nlist=256, nprobe=8, seed=0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self._flat = BruteForceIndex(dim)
+        self._centroids = None
+        self._lists = []
+        self._assignment = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._flat)
+
+    def train(self, iterations=10):
+        ids, vectors = self._flat.vectors()
+        if len(ids) == 0: return
+        nlist = min(self.nlist, len(ids))
+        centroids = vectors[self._rng.choice(len(ids), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.maximum(counts, 1)[:, None])
+            centroids = _normalize(centroids)
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        with self._lock:
+            self._centroids = centroids
+            self._lists = [set() for _ in range(nlist)]
+            self._assignment = {}
+            for item_id, bucket in zip(ids.tolist(), assign.tolist()):
+                self._lists[bucket].add(item_id)
+                self._assignment[item_id] = bucket
+
+    def add(self, item_id, vector):
+        self._flat.add(item_id, vector)
+        with self._lock:
+            if self._centroids is None: return
+            old = self._assignment.pop(item_id, None)
+            if old is not None: self._lists[old].discard(item_id)
+            bucket = int(np.argmax(self._centroids @ _normalize(vector).reshape(self.dim)))
+            self._lists[bucket].add(item_id)
+            self._assignment[item_id] = bucket
+
+    def remove(self, item_id):
+        self._flat.remove(item_id)
+        with self._lock:
+            bucket = self._assignment.pop(item_id, None)
+            if bucket is not None: self._lists[bucket].discard(item_id)
+
+    def search(self, query, k, allowed=None):
+        if self._centroids is None:
+            return self._flat.search(query, k, allowed)
+        query_n = _normalize(query).reshape(self.dim)
+        with self._lock:
+            probes = _top_k(self._centroids @ query_n, self.nprobe)
+            candidates = set().union(*(self._lists[p] for p in probes))
+        if allowed is not None:
+            candidates &= set(allowed)
+        return self._flat.search(query, k, candidates)
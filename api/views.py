@@ -1,94 +1,42 @@
 # backend/api/views.py
-import io
-import re
-import spacy
-from spacy.pipeline import EntityRuler
-from sentence_transformers import SentenceTransformer, util
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, AllowAny, BasePermission
 from rest_framework.parsers import MultiPartParser, FormParser
-import PyPDF2
-from docx import Document
 from django.conf import settings
-import google.generativeai as genai
-from .models import Resume, Analysis
-from .serializers import UserSerializer, ResumeSerializer
-from django.contrib.auth.models import User
-import language_tool_python
+from django.db import close_old_connections
 import json
-import os
-
-# --- Load Models and Skills ---
-nlp = None
-similarity_model = None
-lang_tool = None
-SKILL_KEYWORDS = []
-
-# Fallback skills in case AI fails or key is missing
-FALLBACK_ROLE_SKILLS = {
-    "Software Engineer": ["Python", "Java", "C++", "SQL", "Git", "Data Structures", "Algorithms", "System Design"],
-    "Frontend Developer": ["HTML", "CSS", "JavaScript", "React", "Angular", "Vue", "TypeScript", "Redux", "Responsive Design"],
-    "Backend Developer": ["Node.js", "Python", "Java", "Django", "Flask", "Spring Boot", "SQL", "NoSQL", "API Design"],
-    "Full Stack Developer": ["HTML", "CSS", "JavaScript", "React", "Node.js", "Python", "SQL", "MongoDB", "Git", "AWS"],
-    "Data Scientist": ["Python", "R", "SQL", "Machine Learning", "Pandas", "NumPy", "Scikit-learn", "TensorFlow", "Data Visualization"],
-    "Machine Learning Engineer": ["Python", "TensorFlow", "PyTorch", "Deep Learning", "NLP", "Computer Vision", "MLOps", "SQL"],
-    "DevOps Engineer": ["Linux", "AWS", "Azure", "Docker", "Kubernetes", "Jenkins", "Terraform", "CI/CD", "Bash Scripting"],
-    "Project Manager": ["Agile", "Scrum", "JIRA", "Communication", "Risk Management", "Leadership", "Planning", "Stakeholder Management"],
-    "UI/UX Designer": ["Figma", "Adobe XD", "Sketch", "Prototyping", "User Research", "Wireframing", "Usability Testing", "Visual Design"],
-    "QA Engineer": ["Selenium", "Java", "Python", "Test Automation", "Manual Testing", "JIRA", "SQL", "API Testing"],
-    "Business Analyst": ["SQL", "Excel", "Tableau", "Power BI", "Data Analysis", "Requirements Gathering", "Communication", "Documentation"]
-}
-
-try:
-    skills_file_path = os.path.join(os.path.dirname(__file__), 'skills.json')
-    if os.path.exists(skills_file_path):
-        with open(skills_file_path, 'r', encoding='utf-8') as f:
-            SKILL_KEYWORDS = json.load(f)
-    
-    nlp = spacy.load("en_core_web_lg")
-
-    if SKILL_KEYWORDS:
-        patterns = [{"label": "SKILL", "pattern": skill} for skill in SKILL_KEYWORDS]
-        if "entity_ruler" not in nlp.pipe_names:
-            ruler = nlp.add_pipe("entity_ruler", before="ner", config={"phrase_matcher_attr": "LOWER"})
-            ruler.add_patterns(patterns)
-    
-    similarity_model = SentenceTransformer('all-MiniLM-L6-v2')
-    lang_tool = language_tool_python.LanguageTool('en-US')
-    print("AI Models loaded successfully.")
-
-except Exception as e:
-    print(f"Error loading AI models: {e}")
-    nlp = None
-
-# --- Helpers ---
-def extract_text_from_pdf(file_obj):
-    text = ""
-    try:
-        pdf_reader = PyPDF2.PdfReader(file_obj)
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text: text += page_text + "\n"
-    except Exception as e:
-        print(f"PDF Error: {e}")
-    return text if text else None
+import queue
+import threading
+import time
+from django.http import HttpResponse, StreamingHttpResponse
+from .models import Resume, Analysis, AnalysisJob
+from .serializers import UserSerializer, ResumeSerializer, AnalysisJobSerializer
+from .model_registry import registry, REQUIRED_MODELS, SKILL_KEYWORDS
+from .pipeline import (
+    FALLBACK_ROLE_SKILLS,
+    AnalysisError,
+    extract_text_from_pdf,
+    extract_text_from_docx,
+    run_analysis,
+    run_role_fit,
+    upload_source,
+)
+from .builder_analysis import analyze_resume_data
+from .batch import collect_batch_files, run_batch_analysis, stream_ndjson
+from .embedding_store import get_embedding_store
+from .enhancement import get_bullet_enhancer, normalize_bullet
+from .history import BUCKETS as HISTORY_BUCKETS, InvalidCursor, analyses_by_id, history_page, score_trends
+from .jobs import QueueFull, enqueue_analysis
+from .metrics import render_prometheus, server_timing_header, worker_snapshots
+from .stage_graph import record_stage
+from .semantic_search import index_resume_in_background, search_for_job_description, unindex_resume
+from django.contrib.auth.models import User
 
-def extract_text_from_docx(file_obj):
-    try:
-        doc = Document(file_obj)
-        full_text = []
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = [cell.text.strip() for cell in row.cells if cell.text.strip()]
-                if row_text: full_text.append(" | ".join(row_text))
-        for para in doc.paragraphs:
-            if para.text.strip(): full_text.append(para.text.strip())
-        return "\n".join(full_text)
-    except Exception as e:
-        print(f"DOCX Error: {e}")
-        return None
+# Models are loaded lazily through the registry (see api/model_registry.py) and the analysis
+# stages live in api/pipeline.py, so importing this module stays cheap.
 
 # --- Views ---
 class HelloApiView(APIView):
@@ -107,303 +55,313 @@ class RegisterView(APIView):
 class EnhanceWithAIView(APIView):
     permission_classes = [IsAuthenticated]
     def post(self, request):
+        # 'text' rewrites one bullet and answers with JSON; 'bullets' rewrites a list and streams
+        # one NDJSON line per bullet as it is ready (see api/enhancement.py)
         text_to_enhance = request.data.get('text')
-        prompt_override = request.data.get('prompt_override')
-        if not text_to_enhance: return Response({'error': 'No text'}, status=400)
-        try:
-            if not settings.GEMINI_API_KEY: return Response({'error': 'No API Key'}, status=500)
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-pro')
-            prompt = prompt_override if prompt_override else f"Rewrite this resume bullet point to be professional: \"{text_to_enhance}\""
-            response = model.generate_content(prompt)
-            return Response({'enhanced_text': response.text}, status=200)
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
+        bullets = request.data.get('bullets')
+        instruction = request.data.get('prompt_override')
+        if text_to_enhance is not None and not isinstance(text_to_enhance, str):
+            return Response({'error': 'text must be a string'}, status=400)
+        if bullets is not None and (not isinstance(bullets, list) or not all(isinstance(b, str) for b in bullets)):
+            return Response({'error': 'bullets must be a list of strings'}, status=400)
+        if instruction is not None and not isinstance(instruction, str):
+            return Response({'error': 'prompt_override must be a string'}, status=400)
+        if not normalize_bullet(text_to_enhance) and not bullets: return Response({'error': 'No text'}, status=400)
+        max_bullets = getattr(settings, 'ENHANCE_MAX_BULLETS', 100)
+        if bullets and len(bullets) > max_bullets:
+            return Response({'error': f'At most {max_bullets} bullets per request'}, status=400)
+        enhancer = get_bullet_enhancer()
+        if not enhancer.available: return Response({'error': 'No API Key'}, status=500)
+        if bullets:
+            return StreamingHttpResponse(stream_ndjson(enhancer.enhance(bullets, instruction)), content_type='application/x-ndjson')
+        event = next(enhancer.enhance([text_to_enhance], instruction))
+        if "error" in event: return Response({'error': event["error"]}, status=500)
+        return Response({'enhanced_text': event["enhanced_text"], 'cached': event["cached"]}, status=200)
 
 class ResumeViewSet(viewsets.ModelViewSet):
     serializer_class = ResumeSerializer
     permission_classes = [IsAuthenticated]
     def get_queryset(self): return Resume.objects.filter(user=self.request.user).order_by('-updated_at')
-    def perform_create(self, serializer): serializer.save(user=self.request.user)
+    def perform_create(self, serializer): index_resume_in_background(serializer.save(user=self.request.user).pk)
+    def perform_update(self, serializer): index_resume_in_background(serializer.save().pk)
+    def perform_destroy(self, instance):
+        unindex_resume(instance)
+        instance.delete()
+
+    @action(detail=True, methods=['post'])
+    def analyze(self, request, pk=None):
+        # Live scoring from the builder: the saved resume_data, or the unsaved draft if one is sent
+        resume = self.get_object()
+        job_role = request.data.get('job_role')
+        if not job_role: return Response({"success": False, "error": "Missing job role."}, status=400)
+        resume_data = request.data.get('resume_data') or resume.resume_data
+        timings = {}
+        try:
+            report, sections = analyze_resume_data(resume.pk, resume_data, job_role,
+                                                   request.data.get('job_description', ''), timings=timings)
+        except AnalysisError as e:
+            return Response({"success": False, "error": e.message}, status=e.status)
+        response = Response({**report, "sections": sections, "timings": timings}, status=200)
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = server_timing_header(timings)
+        return response
 
 class ResumeAnalysisView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
-    def post(self, request, *args, **kwargs):
-        if not nlp or not similarity_model:
-             return Response({"success": False, "error": "AI models failed to load."}, status=503)
+    def get_permissions(self):
+        # GET is the readiness probe and must work without a token
+        if self.request.method == 'GET': return [AllowAny()]
+        return super().get_permissions()
+
+    def get(self, request, *args, **kwargs):
+        # Ready once the required models are loaded; an optional one that isn't only degrades reports
+        models = registry.status()
+        ready = all(models[name]["state"] == "ready" for name in REQUIRED_MODELS)
+        degraded = [name for name, m in models.items() if name not in REQUIRED_MODELS and m["state"] != "ready"]
+        return Response({"ready": ready, "degraded": degraded, "models": models}, status=200 if ready else 503)
 
+    def post(self, request, *args, **kwargs):
         resume_file = request.FILES.get('resume_file')
         job_role = request.data.get('job_role')
         job_description = request.data.get('job_description', '')
 
+        # Best-fit mode: no job_role, every known role is scored and ranked instead
+        if request.data.get('mode') == 'best_fit':
+            return self.best_fit(request, resume_file)
+
         if not resume_file or not job_role:
             return Response({"success": False, "error": "Missing file or job role."}, status=400)
 
-        # 1. Extract Text
-        try:
-            file_stream = io.BytesIO(resume_file.read())
-            if resume_file.name.lower().endswith('.pdf'):
-                resume_text = extract_text_from_pdf(file_stream)
-            elif resume_file.name.lower().endswith('.docx'):
-                resume_text = extract_text_from_docx(file_stream)
-            else: return Response({"success": False, "error": "Invalid file type"}, status=400)
-            
-            if not resume_text or not resume_text.strip():
-                return Response({"success": False, "error": "Empty file"}, status=400)
-        except Exception as e:
-            return Response({"success": False, "error": f"File error: {e}"}, status=500)
-
-       # --- Basic Info Extraction ---
-
-        extracted_email = None
-
-        extracted_phone = None
-
-        extracted_name = None
+        # Async mode: queue the work and hand back a job id to poll at analyze/<id>/
+        if str(request.data.get('async', '')).lower() in ('1', 'true', 'yes'):
+            if not resume_file.name.lower().endswith(('.pdf', '.docx')):
+                return Response({"success": False, "error": "Invalid file type"}, status=400)
+            try:
+                job = enqueue_analysis(request.user, resume_file, job_role, job_description)
+            except QueueFull as e:
+                return Response({"success": False, "error": str(e)}, status=503)
+            return Response({"success": True, "job_id": job.pk, "status": job.status}, status=202)
 
+        request_started = time.perf_counter()
+        timings, pipeline_timings = {}, {}
         try:
+            started = time.perf_counter()
+            source = upload_source(resume_file)
+            record_stage(timings, "upload", request_started, started)
+            started = time.perf_counter()
+            report, cache_hits, keys = run_analysis(source, resume_file.name, job_role, job_description, timings=pipeline_timings)
+            # Graph stage offsets are relative to the pipeline start; shift them onto the request's clock
+            offset_ms = round((started - request_started) * 1000, 2)
+            timings.update({name: {**t, "start_ms": round(t["start_ms"] + offset_ms, 2)} for name, t in pipeline_timings.items()})
+            record_stage(timings, "pipeline", request_started, started)
+        except AnalysisError as e:
+            return Response({"success": False, "error": e.message}, status=e.status)
+
+        started = time.perf_counter()
+        status = 'ok' if save_analysis(request.user, job_role, resume_file, report, keys) else 'error'
+        record_stage(timings, "db_write", request_started, started, status)
+        record_stage(timings, "total", request_started, request_started)
+
+        response = Response({**report, "cache": cache_hits, "timings": timings}, status=200)
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = server_timing_header(timings)
+        return response
+
+    def best_fit(self, request, resume_file):
+        if not resume_file:
+            return Response({"success": False, "error": "Missing file."}, status=400)
+        request_started = time.perf_counter()
+        timings = {}
+        try:
+            source = upload_source(resume_file)
+            record_stage(timings, "upload", request_started, request_started)
+            started = time.perf_counter()
+            report, cache_hits, _ = run_role_fit(source, resume_file.name)
+            record_stage(timings, "pipeline", request_started, started)
+        except AnalysisError as e:
+            return Response({"success": False, "error": e.message}, status=e.status)
+        record_stage(timings, "total", request_started, request_started)
+
+        # Nothing is saved: the ranking is a comparison, not an analysis for one role
+        response = Response({**report, "cache": cache_hits, "timings": timings}, status=200)
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = server_timing_header(timings)
+        return response
+
+
+def save_analysis(user, job_role, resume_file, report, keys):
+    try:
+        analysis = Analysis.objects.create(user=user, job_role=job_role, resume_file=resume_file, ats_score_general=report["ats_score_role"], ats_score_jd_match=report["ats_score_jd"], analysis_result=report)
+        if keys["text"]: get_embedding_store().link(keys["text"], analysis=analysis)
+        return analysis
+    except Exception as e:
+        print(f"DB Save Error: {e}")
+        return None
 
-            # 1. Find Name
-
-            for line in resume_text.split('\n'):
-
-                line = line.strip()
-
-                if line and '@' not in line and not re.search(r'\d{5,}', line) and len(line.split()) < 5:
-
-                    if not re.search(r'(experience|education|skills|projects|summary|profile)', line, re.IGNORECASE):
-
-                        extracted_name = line
-
-                        break
-
-            
-
-            # 2. Find Email
-
-            email_pattern_clean = r'(?<=[^a-zA-Z0-9])([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'
-
-            emails_clean = re.findall(email_pattern_clean, resume_text, re.IGNORECASE)
-
-            
-
-            if emails_clean:
-
-                extracted_email = emails_clean[0]
-
-            else:
-
-                email_pattern_merged = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'
-
-                text_for_email = re.sub(r'[\s\|]+', '', resume_text)
-
-                emails_merged = re.findall(email_pattern_merged, text_for_email, re.IGNORECASE)
-
-                
-
-                if emails_merged:
-
-                    potential_email = emails_merged[0]
-
-                    if extracted_name:
-
-                        name_no_space = re.sub(r'\s+', '', extracted_name).lower()
-
-                        if potential_email.lower().startswith(name_no_space):
-
-                             email_part = potential_email[len(name_no_space):]
-
-                             if re.fullmatch(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email_part, re.IGNORECASE):
-
-                                 extracted_email = email_part
-
-                             else:
-
-                                 extracted_email = potential_email
-
-                        else:
-
-                             extracted_email = potential_email
-
-                    else:
-
-                        extracted_email = potential_email
-
-            
-
-            # 3. Find Phone
-
-            text_no_space = re.sub(r'\s+', '', resume_text)
-
-            phone_pattern_strict = r'(\+?\d{9,15})\b'
-
-            phone_match = re.search(phone_pattern_strict, text_no_space)
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-            if phone_match:
+class ResumeAnalysisStreamView(APIView):
+    """analyze/ as Server-Sent Events: contact, skills, role_match, grammar and jd_match
+    events as the stages behind them finish, then the full report (or an error)."""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
 
-                digits = phone_match.group(0).replace('+', '')[-10:]
+    def post(self, request, *args, **kwargs):
+        resume_file = request.FILES.get('resume_file')
+        job_role = request.data.get('job_role')
+        job_description = request.data.get('job_description', '')
+        if not resume_file or not job_role:
+            return Response({"success": False, "error": "Missing file or job role."}, status=400)
 
-                original_phone_pattern = r'[\D]*'.join(digits)
+        # The analysis runs on its own thread and hands events to the response through a queue;
+        # the upload stays open until the stream ends, because Django closes it with the response
+        events, user = queue.Queue(), request.user
+        def analyze():
+            request_started, timings = time.perf_counter(), {}
+            try:
+                report, cache_hits, keys = run_analysis(upload_source(resume_file), resume_file.name, job_role, job_description,
+                                                        timings=timings, on_event=lambda event, data: events.put((event, data)))
+                started = time.perf_counter()
+                status = 'ok' if save_analysis(user, job_role, resume_file, report, keys) else 'error'
+                record_stage(timings, "db_write", request_started, started, status)
+                record_stage(timings, "total", request_started, request_started)
+                events.put(("report", {**report, "cache": cache_hits, "timings": timings}))
+            except AnalysisError as e:
+                events.put(("error", {"success": False, "error": e.message, "status": e.status}))
+            except Exception as e:
+                print(f"Streaming analysis error: {e}")
+                events.put(("error", {"success": False, "error": "Analysis failed.", "status": 500}))
+            finally:
+                close_old_connections()
+                events.put(None)
+        threading.Thread(target=analyze, name='analysis-stream', daemon=True).start()
+
+        def stream():
+            while True:
+                item = events.get()
+                if item is None: return
+                yield sse_event(*item)
+
+        response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx would otherwise hold events back until the end
+        return response
+
+
+class BatchAnalysisView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
 
-                original_match = re.search(original_phone_pattern, resume_text)
+    def post(self, request, *args, **kwargs):
+        job_role = request.data.get('job_role')
+        job_description = request.data.get('job_description', '')
+        files = request.FILES.getlist('resume_files')
+        zip_file = request.FILES.get('resume_zip')
 
-                if original_match:
+        if (not files and not zip_file) or not job_role:
+            return Response({"success": False, "error": "Missing files or job role."}, status=400)
 
-                    extracted_phone = original_match.group(0).strip()
+        try:
+            events = run_batch_analysis(collect_batch_files(files, zip_file), job_role, job_description)
+        except AnalysisError as e:
+            return Response({"success": False, "error": e.message}, status=e.status)
 
-                else:
+        # One JSON object per line: a "result" per resume as it is scored, then the "ranking"
+        return StreamingHttpResponse(stream_ndjson(events), content_type='application/x-ndjson')
 
-                    phone_pattern_orig = r'(\(?\+?\d{1,3}\)?[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+class AnalysisJobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
 
-                    phones_orig = re.findall(phone_pattern_orig, resume_text)
+    def get(self, request, job_id, *args, **kwargs):
+        job = AnalysisJob.objects.select_related('analysis').filter(pk=job_id, user=request.user).first()
+        if job is None: return Response({"success": False, "error": "Job not found."}, status=404)
+        return Response(AnalysisJobSerializer(job).data, status=200)
 
-                    for phone in phones_orig:
+class CanReadMetrics(BasePermission):
+    # Staff only, unless METRICS_PUBLIC opens them (e.g. to a scraper on a private network)
+    def has_permission(self, request, view):
+        return getattr(settings, 'METRICS_PUBLIC', False) or bool(request.user and request.user.is_staff)
 
-                        phone_str = "".join(phone) if isinstance(phone, tuple) else phone
+class AnalyzerMetricsView(APIView):
+    permission_classes = [CanReadMetrics]
 
-                        digits_only = re.sub(r'\D', '', phone_str)
+    def get(self, request, *args, **kwargs):
+        return Response({"workers": worker_snapshots()}, status=200)
 
-                        if len(digits_only) >= 9:
+class PrometheusMetricsView(APIView):
+    # Scraped by Prometheus at /metrics; the same registries as analyze/metrics/ in the text format
+    permission_classes = [CanReadMetrics]
 
-                            extracted_phone = phone_str.strip()
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-                            break
+def _int_param(request, name, default, low, high):
+    # None when the parameter isn't an integer, so the view can answer 400
+    try:
+        return max(low, min(int(request.query_params.get(name, default)), high))
+    except (TypeError, ValueError):
+        return None
 
-                    if not extracted_phone:
+class AnalysisHistoryView(APIView):
+    """The user's analyses, newest first, without their reports; follow next_cursor for older ones."""
+    permission_classes = [IsAuthenticated]
 
-                        extracted_phone = phone_match.group(0)
+    def get(self, request, *args, **kwargs):
+        limit = _int_param(request, 'limit', getattr(settings, 'HISTORY_PAGE_SIZE', 50), 1, getattr(settings, 'HISTORY_MAX_PAGE_SIZE', 200))
+        if limit is None: return Response({"success": False, "error": "limit must be an integer."}, status=400)
+        try:
+            rows, next_cursor = history_page(request.user, limit, request.query_params.get('cursor'), request.query_params.get('job_role'))
+        except InvalidCursor as e:
+            return Response({"success": False, "error": str(e)}, status=400)
+        return Response({"success": True, "results": rows, "next_cursor": next_cursor}, status=200)
 
-            
+class AnalysisBulkView(APIView):
+    """Full reports for up to HISTORY_MAX_PAGE_SIZE analyses at once: ?ids=3,5,8"""
+    permission_classes = [IsAuthenticated]
 
-        except Exception as e:
+    def get(self, request, *args, **kwargs):
+        try:
+            ids = [int(i) for i in request.query_params.get('ids', '').split(',') if i.strip()]
+        except ValueError:
+            return Response({"success": False, "error": "ids must be a comma-separated list of integers."}, status=400)
+        if not ids or len(ids) > getattr(settings, 'HISTORY_MAX_PAGE_SIZE', 200):
+            return Response({"success": False, "error": f"Pass between 1 and {getattr(settings, 'HISTORY_MAX_PAGE_SIZE', 200)} ids."}, status=400)
+        found = analyses_by_id(request.user, ids)
+        return Response({"success": True, "results": [found[i] for i in ids if i in found],
+                         "missing": [i for i in ids if i not in found]}, status=200)
+
+class AnalysisTrendsView(APIView):
+    """Score statistics per role and per day/week/month bucket, aggregated by the database."""
+    permission_classes = [IsAuthenticated]
 
-            print(f"Regex error: {e}")
+    def get(self, request, *args, **kwargs):
+        bucket = request.query_params.get('bucket', 'week')
+        if bucket not in HISTORY_BUCKETS:
+            return Response({"success": False, "error": f"bucket must be one of {', '.join(HISTORY_BUCKETS)}."}, status=400)
+        days = _int_param(request, 'days', 0, 0, 36500)
+        if days is None: return Response({"success": False, "error": "days must be an integer."}, status=400)
+        roles = score_trends(request.user, bucket, request.query_params.get('job_role'), days or None)
+        return Response({"success": True, "bucket": bucket, "roles": roles}, status=200)
 
-        # -----------------------------------
+class SemanticSearchView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        # 3. Skill Extraction
-        resume_skills_list = []
-        try:
-            doc = nlp(resume_text)
-            unique_skills = set()
-            for ent in doc.ents:
-                if ent.label_ == "SKILL": unique_skills.add(ent.text.strip())
-            if not unique_skills:
-                for ent in doc.ents:
-                    if ent.label_ in ["ORG", "PRODUCT", "LANGUAGE"]:
-                        if len(ent.text.split()) < 4: unique_skills.add(ent.text.strip())
-            resume_skills_list = sorted(list(set(s.capitalize() for s in unique_skills)))
-        except Exception: pass
-
-        # 4. Analysis & Scoring
-        ats_score_role = 0
-        ats_score_jd = None
-        role_matching_skills = []
-        role_missing_skills = []
-        jd_matching_skills = []
-        jd_missing_skills = []
-        quality_feedback = []
-
-        # A. General Quality Logic (Applied to Role Score)
-        quality_score = 0
-        sections = ['experience', 'education', 'skills', 'projects']
-        found_sections = sum(1 for s in sections if re.search(r'\b'+s+r'\b', resume_text, re.IGNORECASE))
-        quality_score += (found_sections * 10)
-        
-        if extracted_email and extracted_phone: quality_score += 10
-        elif extracted_email or extracted_phone: quality_score += 5; quality_feedback.append("Contact info incomplete.")
-        else: quality_feedback.append("Missing contact info.")
-
-        if len(resume_skills_list) >= 5: quality_score += 10
-
-        clean_grammar = re.sub(r'[^a-zA-Z0-9\s.,!?\'"-]', '', resume_text[:2000])
-        errors = lang_tool.check(re.sub(r'\s+', ' ', clean_grammar))
-        real_errors = [e for e in errors if not (e.ruleId == 'MORFOLOGIK_RULE_EN_US' and len(e.context.split()) < 3)]
-        quality_score += max(0, 20 - len(real_errors))
-        if real_errors: quality_feedback.append(f"Found {len(real_errors)} potential grammar issues.")
-        quality_score = min(100, quality_score + 10)
-
-        # B. Role-Based Analysis
-        role_keywords = set()
-        # 1. Try AI
-        if settings.GEMINI_API_KEY:
-            try:
-                model = genai.GenerativeModel('gemini-pro')
-                prompt = f"List top 20 technical skills and keywords for a '{job_role}' resume. Return ONLY comma-separated words. Do not include the job title itself."
-                resp = model.generate_content(prompt)
-                if resp.text:
-                    items = re.split(r'[,\n\r•*-]+', resp.text)
-                    for item in items:
-                        clean = item.strip().lower().replace('skills', '').replace(job_role.lower(), '')
-                        if len(clean) > 1: role_keywords.add(clean)
-            except Exception: pass
-        
-        # 2. Use Fallback if AI failed or returned nothing
-        if not role_keywords:
-             fallback = FALLBACK_ROLE_SKILLS.get(job_role, ["communication", "teamwork", "problem solving"])
-             for sk in fallback: role_keywords.add(sk.lower())
-
-        resume_lower = set(s.lower() for s in resume_skills_list)
-        for target in role_keywords:
-            if target in resume_lower or any(target in s for s in resume_lower) or any(s in target for s in resume_lower):
-                role_matching_skills.append(target.capitalize())
-            else:
-                role_missing_skills.append(target.capitalize())
-        
-        role_match_pct = (len(role_matching_skills) / len(role_keywords)) * 100 if role_keywords else 0
-        ats_score_role = round((quality_score * 0.3) + (role_match_pct * 0.7)) # 70% Skills, 30% Quality
-
-        # C. JD-Based Analysis
-        if job_description.strip():
-            jd_keywords = set()
-            jd_doc = nlp(job_description)
-            for ent in jd_doc.ents:
-                if ent.label_ in ["SKILL", "ORG", "PRODUCT", "LANGUAGE"]: jd_keywords.add(ent.text.lower())
-            
-            for target in jd_keywords:
-                if target in resume_lower or any(target in s for s in resume_lower) or any(s in target for s in resume_lower):
-                    jd_matching_skills.append(target.capitalize())
-                else:
-                    jd_missing_skills.append(target.capitalize())
-
-            jd_match_pct = (len(jd_matching_skills) / len(jd_keywords)) * 100 if jd_keywords else 0
-            
-            emb1 = similarity_model.encode(resume_text, convert_to_tensor=True)
-            emb2 = similarity_model.encode(job_description, convert_to_tensor=True)
-            semantic = util.cos_sim(emb1, emb2).item() * 100
-            
-            ats_score_jd = round((semantic * 0.5) + (jd_match_pct * 0.3) + (quality_score * 0.2))
-            ats_score_jd = max(0, min(100, ats_score_jd))
-
-        # Report
-        summary_message = f"Analysis for {job_role}. Role Match: {ats_score_role}%."
-        if ats_score_jd: summary_message += f" JD Match: {ats_score_jd}%."
-
-        report = {
-            "success": True,
-            "job_role_selected": job_role,
-            "name": extracted_name,
-            "email": extracted_email,
-            "phone": extracted_phone,
-            "resume_skills": resume_skills_list,
-            # Separated Lists
-            "role_matching_skills": sorted(list(set(role_matching_skills))),
-            "role_missing_skills": sorted(list(set(role_missing_skills))),
-            "jd_matching_skills": sorted(list(set(jd_matching_skills))),
-            "jd_missing_skills": sorted(list(set(jd_missing_skills))),
-            # Scores
-            "ats_score_general": ats_score_role, # Mapped for frontend compatibility
-            "ats_score_role": ats_score_role,
-            "ats_score_jd": ats_score_jd,
-            "analysis_summary": summary_message,
-            "quality_feedback": quality_feedback
-        }
-        
+    def post(self, request, *args, **kwargs):
+        job_description = (request.data.get('job_description') or '').strip()
+        if not job_description:
+            return Response({"success": False, "error": "Missing job description."}, status=400)
         try:
-             Analysis.objects.create(user=request.user, job_role=job_role, resume_file=resume_file, ats_score_general=ats_score_role, ats_score_jd_match=ats_score_jd, analysis_result=report)
-        except Exception as e:
-            print(f"DB Save Error: {e}")
+            k = max(1, min(int(request.data.get('k', 10)), getattr(settings, 'SEARCH_MAX_RESULTS', 50)))
+        except (TypeError, ValueError):
+            return Response({"success": False, "error": "k must be an integer."}, status=400)
 
-        return Response(report, status=200)
\ No newline at end of file
+        # Staff search every stored resume; everyone else only their own
+        owner_id = None if request.user.is_staff else request.user.pk
+        try:
+            results, search_ms, cache_hits = search_for_job_description(job_description, k, owner_id)
+        except AnalysisError as e:
+            return Response({"success": False, "error": e.message}, status=e.status)
+        return Response({"success": True, "results": results, "search_ms": search_ms, "cache": cache_hits}, status=200)
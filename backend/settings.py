@@ -23,6 +23,150 @@ load_dotenv(os.path.join(BASE_DIR, '.env'))
 # Get the API key
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# Load the analyzer's AI models when the app starts instead of on the first analysis
+AI_MODELS_WARM_ON_STARTUP = os.getenv('AI_MODELS_WARM_ON_STARTUP', 'false').lower() == 'true'
+
+# Per-stage cache for resume analysis (see api/analysis_cache.py).
+# BACKEND: 'locmem' (per process), 'file' (LOCATION is a directory) or 'django' (LOCATION is a CACHES alias).
+# The default is shared by the workers of one host, so a builder edit re-runs only the changed
+# sections whichever worker serves it; use 'django' with Redis/Memcached across hosts.
+ANALYSIS_CACHE_BACKEND = os.getenv('ANALYSIS_CACHE_BACKEND', 'file')
+ANALYSIS_CACHE = {
+    'BACKEND': ANALYSIS_CACHE_BACKEND,
+    'LOCATION': os.getenv('ANALYSIS_CACHE_LOCATION', 'default' if ANALYSIS_CACHE_BACKEND == 'django' else str(BASE_DIR / 'cache' / 'analysis')),
+    'TTL': int(os.getenv('ANALYSIS_CACHE_TTL', 60 * 60 * 24)),
+    'MAX_ENTRIES': int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 1024)),
+}
+
+# spaCy (api/nlp_profile.py). 'ruler' runs the SKILL EntityRuler alone and NER only for texts
+# without a SKILL match; 'ner' always runs NER; 'full' loads every component of NLP_MODEL.
+# en_core_web_sm is a much smaller NLP_MODEL; NLP_DROP_VECTORS frees the word vectors when
+# the model's NER does not use them.
+NLP_PROFILE = os.getenv('NLP_PROFILE', 'ruler')
+NLP_MODEL = os.getenv('NLP_MODEL', 'en_core_web_lg')
+NLP_NER_FALLBACK = os.getenv('NLP_NER_FALLBACK', 'true').lower() == 'true'
+NLP_DROP_VECTORS = os.getenv('NLP_DROP_VECTORS', 'false').lower() == 'true'
+
+# Analysis stages (api/pipeline.py) run as a dependency graph on two thread pools; per-stage
+# timeouts in seconds override pipeline.DEFAULT_STAGE_TIMEOUTS, e.g. {"role_keywords": 5}.
+ANALYSIS_CPU_WORKERS = int(os.getenv('ANALYSIS_CPU_WORKERS', 4))
+ANALYSIS_IO_WORKERS = int(os.getenv('ANALYSIS_IO_WORKERS', 8))
+ANALYSIS_STAGE_TIMEOUTS = {}
+# Adds a Server-Timing header (per-stage durations) to analyze/ responses, for browser devtools
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'false').lower() == 'true'
+
+# Analysis history API (api/history.py): default and largest page, also the cap on bulk lookups
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', 50))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv('HISTORY_MAX_PAGE_SIZE', 200))
+
+# Background analysis jobs (POST analyze/ with async=true, see api/jobs.py).
+# Set ANALYSIS_JOB_RUN_IN_PROCESS to false when jobs are drained by `manage.py run_analysis_worker` instead.
+ANALYSIS_JOB_WORKERS = int(os.getenv('ANALYSIS_JOB_WORKERS', 2))
+# ANALYSIS_JOB_MAX_QUEUE is a soft cap (concurrent enqueues can overshoot it slightly). A job still
+# running ANALYSIS_JOB_LEASE_SECONDS after it started is failed, since its worker is gone (0 disables).
+ANALYSIS_JOB_MAX_QUEUE = int(os.getenv('ANALYSIS_JOB_MAX_QUEUE', 100))
+ANALYSIS_JOB_LEASE_SECONDS = int(os.getenv('ANALYSIS_JOB_LEASE_SECONDS', 600))
+ANALYSIS_JOB_POLL_INTERVAL = float(os.getenv('ANALYSIS_JOB_POLL_INTERVAL', 2.0))
+ANALYSIS_JOB_RUN_IN_PROCESS = os.getenv('ANALYSIS_JOB_RUN_IN_PROCESS', 'true').lower() == 'true'
+
+# Batch scoring (analyze/batch/). Uploads are spooled to temp files; resumes are encoded, parsed
+# and emitted BATCH_ENCODE_SIZE at a time, in the order their text extraction finishes.
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', 500))
+BATCH_MAX_FILE_BYTES = int(os.getenv('BATCH_MAX_FILE_BYTES', 10 * 1024 * 1024))
+BATCH_EXTRACT_WORKERS = int(os.getenv('BATCH_EXTRACT_WORKERS', 4))
+BATCH_NLP_PROCESSES = int(os.getenv('BATCH_NLP_PROCESSES', 2))
+BATCH_NLP_BATCH_SIZE = int(os.getenv('BATCH_NLP_BATCH_SIZE', 16))
+BATCH_ENCODE_SIZE = int(os.getenv('BATCH_ENCODE_SIZE', 32))
+
+# PDF extraction budgets (api/pdf_extraction.py). Extraction stops at whichever limit is hit first.
+PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', 10 * 1024 * 1024))
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 20))
+PDF_TIME_BUDGET = float(os.getenv('PDF_TIME_BUDGET', 10.0))
+PDF_TARGET_CHARS = int(os.getenv('PDF_TARGET_CHARS', 50000))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 8))
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', 4))
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', 2))
+
+# DOCX extraction limits (api/docx_extraction.py): files over DOCX_MAX_BYTES, or with an XML part
+# inflating past DOCX_MAX_XML_BYTES, are rejected; text stops at DOCX_MAX_CHARS.
+DOCX_MAX_BYTES = int(os.getenv('DOCX_MAX_BYTES', 10 * 1024 * 1024))
+DOCX_MAX_XML_BYTES = int(os.getenv('DOCX_MAX_XML_BYTES', 50 * 1024 * 1024))
+DOCX_MAX_CHARS = int(os.getenv('DOCX_MAX_CHARS', 200000))
+
+# Uploaded resumes are stored once per distinct file (api/file_store.py); optionally gzipped on disk
+RESUME_STORAGE_COMPRESS = os.getenv('RESUME_STORAGE_COMPRESS', 'false').lower() == 'true'
+
+# Persistent embedding store (api/embedding_store.py): vectors in array files, index rows in the DB
+EMBEDDING_STORE_LOCATION = os.getenv('EMBEDDING_STORE_LOCATION', str(BASE_DIR / 'embeddings'))
+EMBEDDING_STORE_QUANTIZE = os.getenv('EMBEDDING_STORE_QUANTIZE', 'false').lower() == 'true'
+
+# Semantic resume search (api/semantic_search.py). Exact search is fine into the tens of
+# thousands of resumes; the approximate (IVF) index only kicks in past SEARCH_INDEX_IVF_MIN_VECTORS.
+# Rows saved before they were indexed are picked up by `manage.py backfill_search_index`.
+SEARCH_INDEX_APPROXIMATE = os.getenv('SEARCH_INDEX_APPROXIMATE', 'false').lower() == 'true'
+SEARCH_INDEX_IVF_MIN_VECTORS = int(os.getenv('SEARCH_INDEX_IVF_MIN_VECTORS', 20000))
+SEARCH_INDEX_IVF_NLIST = int(os.getenv('SEARCH_INDEX_IVF_NLIST', 256))
+SEARCH_INDEX_IVF_NPROBE = int(os.getenv('SEARCH_INDEX_IVF_NPROBE', 8))
+SEARCH_CANDIDATE_FACTOR = int(os.getenv('SEARCH_CANDIDATE_FACTOR', 5))
+SEARCH_SEMANTIC_WEIGHT = float(os.getenv('SEARCH_SEMANTIC_WEIGHT', 0.7))
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', 50))
+
+# Embedding micro-batching (api/embedding_batcher.py): concurrent encodes arriving within
+# EMBEDDING_BATCH_MAX_WAIT_MS share one forward pass of up to EMBEDDING_BATCH_MAX_SIZE texts.
+# Longer texts are embedded as pooled chunks of EMBEDDING_CHUNK_WORDS (0: from the model's window).
+# Stored and cached embeddings are keyed on the chunk size, so changing it re-encodes on demand.
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', 32))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_MAX_WAIT_MS', 5))
+EMBEDDING_CHUNK_WORDS = int(os.getenv('EMBEDDING_CHUNK_WORDS', 0))
+
+# Role keywords (api/role_keywords.py): 'gemini', or 'stub' to answer from the built-in role table offline.
+# Warm every known role with `manage.py warm_role_keywords`.
+ROLE_KEYWORDS_BACKEND = os.getenv('ROLE_KEYWORDS_BACKEND', 'gemini')
+ROLE_KEYWORDS_TTL = int(os.getenv('ROLE_KEYWORDS_TTL', 30 * 86400))
+ROLE_KEYWORDS_FALLBACK_TTL = int(os.getenv('ROLE_KEYWORDS_FALLBACK_TTL', 300))
+ROLE_KEYWORDS_MEMORY_ENTRIES = int(os.getenv('ROLE_KEYWORDS_MEMORY_ENTRIES', 256))
+ROLE_KEYWORDS_TIMEOUT = float(os.getenv('ROLE_KEYWORDS_TIMEOUT', 10))
+
+# Best-fit role ranking (api/role_fit.py, ResumeAnalysisView with mode=best_fit): share of
+# each role's fit score that comes from resume/role-profile embedding similarity, the rest from skill coverage.
+ROLE_FIT_SEMANTIC_WEIGHT = float(os.getenv('ROLE_FIT_SEMANTIC_WEIGHT', 0.3))
+# Roles ranked besides the built-in ones, comma-separated; each joins once its keywords are cached.
+# Roles users type into single-role analyses are never ranked unless listed here.
+ROLE_FIT_EXTRA_ROLES = [role.strip() for role in os.getenv('ROLE_FIT_EXTRA_ROLES', '').split(',') if role.strip()]
+
+# AI bullet enhancement (api/enhancement.py): 'gemini', or 'stub' to rewrite offline. Uncached
+# bullets go upstream ENHANCE_BATCH_SIZE (and at most ENHANCE_BATCH_MAX_CHARS characters) to a call,
+# ENHANCE_MAX_CONCURRENCY calls at a time.
+ENHANCE_BACKEND = os.getenv('ENHANCE_BACKEND', 'gemini')
+ENHANCE_TIMEOUT = float(os.getenv('ENHANCE_TIMEOUT', 30))
+ENHANCE_BATCH_SIZE = int(os.getenv('ENHANCE_BATCH_SIZE', 10))
+ENHANCE_BATCH_MAX_CHARS = int(os.getenv('ENHANCE_BATCH_MAX_CHARS', 6000))
+ENHANCE_MAX_CONCURRENCY = int(os.getenv('ENHANCE_MAX_CONCURRENCY', 4))
+ENHANCE_MAX_BULLETS = int(os.getenv('ENHANCE_MAX_BULLETS', 100))
+
+# Grammar checking (api/grammar.py). Each worker owns a LanguageTool instance; point
+# GRAMMAR_REMOTE_SERVER at a running LanguageTool server to share one JVM between them.
+# A check that misses GRAMMAR_DEADLINE (seconds) is dropped and the resume is scored without grammar.
+GRAMMAR_REMOTE_SERVER = os.getenv('GRAMMAR_REMOTE_SERVER') or None
+GRAMMAR_WORKERS = int(os.getenv('GRAMMAR_WORKERS', 2))
+GRAMMAR_DEADLINE = float(os.getenv('GRAMMAR_DEADLINE', 3.0))
+GRAMMAR_CHUNK_CHARS = int(os.getenv('GRAMMAR_CHUNK_CHARS', 1500))
+GRAMMAR_MAX_CHARS = int(os.getenv('GRAMMAR_MAX_CHARS', 20000))
+GRAMMAR_SENTENCE_CACHE_ENTRIES = int(os.getenv('GRAMMAR_SENTENCE_CACHE_ENTRIES', 20000))
+
+# Models the gunicorn master loads before forking (gunicorn.conf.py) so workers share them
+# copy-on-write. grammar is only included by default with a remote server: a local
+# LanguageTool is a JVM subprocess per checker, which forked workers must not share.
+MODEL_PRELOAD = [name.strip() for name in os.getenv('MODEL_PRELOAD', 'nlp,similarity' + (',grammar' if GRAMMAR_REMOTE_SERVER else '')).split(',') if name.strip()]
+
+# Analyzer metrics (/metrics, api/analyze/metrics/) are staff only unless METRICS_PUBLIC. They
+# are kept per process and every sample carries a worker="<pid>" label; with several gunicorn
+# workers set METRICS_MULTIPROC_DIR (a directory local to the host) so each worker publishes its
+# snapshot there every METRICS_PUBLISH_INTERVAL seconds and any scrape reports all of them.
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'false').lower() == 'true'
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+METRICS_PUBLISH_INTERVAL = float(os.getenv('METRICS_PUBLISH_INTERVAL', 10))
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -148,6 +292,25 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     )
-}
\ No newline at end of file
+}
+
+# Django caches. 'auth' must be shared by every worker (see AUTH_USER_VERSION_CACHE): a directory
+# works for the workers of one host; across hosts point AUTH_CACHE_BACKEND/LOCATION at Redis or Memcached.
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'auth': {
+        'BACKEND': os.getenv('AUTH_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('AUTH_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'auth')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('AUTH_CACHE_MAX_ENTRIES', 100000))},
+    },
+}
+
+# Token users are cached per process for AUTH_USER_CACHE_TTL seconds (0 loads the user on every
+# request). Saving or deleting a user bumps their version in the AUTH_USER_VERSION_CACHE cache
+# alias, checked on every request, so it has to be a cache all workers share. With a per-process
+# one (locmem, dummy) a change in one worker would go unseen by the others, so users aren't cached.
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 30))
+AUTH_USER_CACHE_ENTRIES = int(os.getenv('AUTH_USER_CACHE_ENTRIES', 10000))
+AUTH_USER_VERSION_CACHE = os.getenv('AUTH_USER_VERSION_CACHE', 'auth')
\ No newline at end of file
@@ -21,6 +21,7 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from api.views import PrometheusMetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -32,4 +33,7 @@ urlpatterns = [
     path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # We will create the 'register' endpoint in the 'api' app
+
+    # Prometheus scrape endpoint (analyzer metrics, one worker label per process)
+    path('metrics', PrometheusMetricsView.as_view(), name='prometheus_metrics'),
 ]
@@ -0,0 +1,121 @@
+# benchmarks/bench_contact.py
+"""Micro-benchmark for api/contact.py against the inline regex block it replaced.
+
+Run from the repository root:  python benchmarks/bench_contact.py [--repeat N]
+
+The corpus is the sample resumes under uploads/resumes/ (when PyPDF2/python-docx are
+installed) plus synthetic resumes of increasing size and a few adversarial inputs
+that made the old patterns backtrack.
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api.contact import extract_contact_info  # noqa: E402
+
+
+def legacy_extract_contact_info(resume_text):
+    # Verbatim logic of the block that used to live in ResumeAnalysisView.post
+    extracted_email = extracted_phone = extracted_name = None
+    for line in resume_text.split('\n'):
+        line = line.strip()
+        if line and '@' not in line and not re.search(r'\d{5,}', line) and len(line.split()) < 5:
+            if not re.search(r'(experience|education|skills|projects|summary|profile)', line, re.IGNORECASE):
+                extracted_name = line
+                break
+    emails_clean = re.findall(r'(?<=[^a-zA-Z0-9])([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b', resume_text, re.IGNORECASE)
+    if emails_clean:
+        extracted_email = emails_clean[0]
+    else:
+        text_for_email = re.sub(r'[\s\|]+', '', resume_text)
+        emails_merged = re.findall(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b', text_for_email, re.IGNORECASE)
+        if emails_merged:
+            extracted_email = emails_merged[0]
+            if extracted_name:
+                name_no_space = re.sub(r'\s+', '', extracted_name).lower()
+                if extracted_email.lower().startswith(name_no_space):
+                    email_part = extracted_email[len(name_no_space):]
+                    if re.fullmatch(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email_part, re.IGNORECASE):
+                        extracted_email = email_part
+    text_no_space = re.sub(r'\s+', '', resume_text)
+    phone_match = re.search(r'(\+?\d{9,15})\b', text_no_space)
+    if phone_match:
+        digits = phone_match.group(0).replace('+', '')[-10:]
+        original_match = re.search(r'[\D]*'.join(digits), resume_text)
+        extracted_phone = original_match.group(0).strip() if original_match else phone_match.group(0)
+    return {"name": extracted_name, "email": extracted_email, "phone": extracted_phone}
+
+
+def sample_resumes():
+    folder = os.path.join(ROOT, 'uploads', 'resumes')
+    try:
+        import django
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+        django.setup()
+        from api.pipeline import extract_text_from_docx, extract_text_from_pdf
+    except Exception as e:
+        print(f"Skipping sample resumes: {e}")
+        return []
+    docs = []
+    for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+        with open(os.path.join(folder, name), 'rb') as f:
+            stream = io.BytesIO(f.read())
+        text = extract_text_from_pdf(stream) if name.endswith('.pdf') else extract_text_from_docx(stream)
+        if text: docs.append((name, text))
+    return docs
+
+
+def synthetic_resume(sections):
+    body = ["Jane Q Doe", "jane.doe@example.com | +1 (555) 010-2030 | linkedin.com/in/janedoe", "Summary"]
+    for i in range(sections):
+        body += [f"Experience {i}", "Built data pipelines in Python and SQL, cut latency 40% across 12 services.",
+                 "Led a team of 5 engineers; shipped React and Django features weekly."]
+    return "\n".join(body)
+
+
+def corpus():
+    docs = sample_resumes()
+    docs += [(f"synthetic-{n}", synthetic_resume(n)) for n in (5, 50, 500)]
+    # Inputs that are pathological for the old patterns
+    docs += [
+        ("no-at-long-run", "Name\n" + "a" * 20000),
+        ("many-ats", "Name\n" + "x@" * 5000),
+        ("digit-gaps", "Name\n" + "5 word " * 4000 + "5551234567"),
+    ]
+    return docs
+
+
+def bench(fn, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--skip-legacy', action='store_true', help="Only time the new extractor.")
+    args = parser.parse_args()
+
+    print(f"{'document':<40} {'chars':>8} {'legacy ms':>10} {'new ms':>8}  same")
+    for name, text in corpus():
+        new = bench(extract_contact_info, text, args.repeat) * 1000
+        if args.skip_legacy:
+            print(f"{name[:40]:<40} {len(text):>8} {'-':>10} {new:>8.2f}")
+            continue
+        legacy = bench(legacy_extract_contact_info, text, args.repeat) * 1000
+        same = legacy_extract_contact_info(text) == extract_contact_info(text)
+        print(f"{name[:40]:<40} {len(text):>8} {legacy:>10.2f} {new:>8.2f}  {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_docx.py
+"""Micro-benchmark for the streaming DOCX extractor against the python-docx one it replaced.
+
+Run from the repository root:  python benchmarks/bench_docx.py [--repeat N]
+
+The corpus is the sample resumes under uploads/resumes/, synthetic resumes of increasing
+size (benchmarks/corpus.py) and table-heavy documents with merged cells, where walking
+row.cells in python-docx goes quadratic. Peak memory is measured with tracemalloc.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+
+def table_docx(rows, cols, merged_every=3):
+    """A table-heavy document: every merged_every-th row spans all columns."""
+    from docx import Document
+    document = Document()
+    table = document.add_table(rows=rows, cols=cols)
+    for r in range(rows):
+        if r % merged_every == 0:
+            table.cell(r, 0).merge(table.cell(r, cols - 1))
+            table.cell(r, 0).text = f"Section {r}: Python, SQL and Docker"
+        else:
+            for c in range(cols): table.cell(r, c).text = f"r{r}c{c} React"
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def corpus():
+    from benchmarks.corpus import SIZES, make_docx, resume_lines
+    docs = []
+    folder = os.path.join(ROOT, 'uploads', 'resumes')
+    for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+        if name.endswith('.docx'):
+            with open(os.path.join(folder, name), 'rb') as f: docs.append((name, f.read()))
+            break  # the uploads are copies of the same template
+    rng = random.Random(0)
+    docs += [(f"synthetic-{size}", make_docx(resume_lines(rng, pages, size))) for size, pages in SIZES.items()]
+    docs += [(f"table-{rows}x{cols}", table_docx(rows, cols)) for rows, cols in ((20, 4), (100, 6), (300, 8))]
+    return docs
+
+
+def bench(fn, data, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    text = fn(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    django.setup()
+    from api.docx_extraction import extract_docx, extract_docx_python_docx
+
+    print(f"{'document':<28} {'KB':>6} {'legacy ms':>10} {'new ms':>8} {'legacy MB':>10} {'new MB':>8} {'chars old/new':>15}")
+    for name, data in corpus():
+        legacy, legacy_peak, legacy_text = bench(lambda d: extract_docx_python_docx(io.BytesIO(d)), data, args.repeat)
+        new, new_peak, new_text = bench(extract_docx, data, args.repeat)
+        print(f"{name[:28]:<28} {len(data) / 1024:>6.0f} {legacy * 1000:>10.2f} {new * 1000:>8.2f} "
+              f"{legacy_peak / 2**20:>10.1f} {new_peak / 2**20:>8.1f} {len(legacy_text or ''):>7}/{len(new_text or ''):<7}")
+
+
+if __name__ == '__main__':
+    main()
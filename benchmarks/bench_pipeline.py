@@ -0,0 +1,183 @@
+# benchmarks/bench_pipeline.py
+"""End-to-end and per-stage benchmark of the resume analysis pipeline.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --output benchmarks/results/base.json
+    # ... change something ...
+    python benchmarks/bench_pipeline.py --output benchmarks/results/new.json
+    python benchmarks/compare.py benchmarks/results/base.json benchmarks/results/new.json
+
+The corpus is generated (benchmarks/corpus.py) and, by default, spaCy, the encoder,
+LanguageTool and Gemini are replaced by the stubs in benchmarks/stubs.py; pass
+--backends real to time the actual models. State (DB, embedding store) lives in a temp
+directory, see benchmarks/settings.py.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+import django  # noqa: E402
+import numpy as np  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+JOB_DESCRIPTION = ("We are hiring a backend engineer with Python, Django, SQL and Docker experience "
+                   "to build REST APIs, data pipelines and CI/CD workflows on AWS.")
+
+
+def summarize(seconds):
+    if not seconds: return {"count": 0}
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def peak_rss_bytes():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    from api.model_registry import _rss_bytes
+    return _rss_bytes()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_pass(docs, roles, concurrency, cache):
+    """Analyzes every document once; returns (wall seconds, [(doc, seconds, timings, hits)])."""
+    from api.pipeline import run_analysis
+
+    def one(item):
+        i, (name, size, fmt, data) = item
+        timings = {}
+        started = time.perf_counter()
+        _, hits, _ = run_analysis(data, name, roles[i % len(roles)], JOB_DESCRIPTION, cache=cache, timings=timings)
+        return (name, size, fmt), time.perf_counter() - started, timings, hits
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            rows = list(pool.map(one, enumerate(docs)))
+    else:
+        rows = [one(item) for item in enumerate(docs)]
+    return time.perf_counter() - started, rows
+
+
+def report_pass(wall, rows):
+    by_cell, by_stage, hit_counts = {}, {}, {}
+    for (name, size, fmt), seconds, timings, hits in rows:
+        by_cell.setdefault(f"{fmt}/{size}", []).append(seconds)
+        for stage, t in timings.items():
+            by_stage.setdefault(stage, []).append(t["ms"] / 1000)
+        for stage, hit in hits.items():
+            hit_counts.setdefault(stage, 0)
+            hit_counts[stage] += int(hit)
+    return {
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(len(rows) / wall, 3) if wall else None,
+        "end_to_end": summarize([r[1] for r in rows]),
+        "by_document": {cell: summarize(v) for cell, v in sorted(by_cell.items())},
+        "stages": {stage: summarize(v) for stage, v in sorted(by_stage.items())},
+        "cache_hits": hit_counts,
+    }
+
+
+def print_pass(label, result):
+    e2e = result["end_to_end"]
+    print(f"\n== {label}: {e2e['count']} documents in {result['wall_seconds']}s "
+          f"({result['throughput_per_second']}/s), p50 {e2e['p50_ms']} ms, p95 {e2e['p95_ms']} ms, p99 {e2e['p99_ms']} ms")
+    print(f"{'':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for section in ("by_document", "stages"):
+        for name, s in result[section].items():
+            print(f"{name:<22} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+
+
+def main():
+    from benchmarks.corpus import FORMATS, SIZES, build_corpus
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES), choices=list(SIZES))
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS), choices=list(FORMATS))
+    parser.add_argument('--per-cell', type=int, default=5, help="Documents per size x format (default 5).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--concurrency', type=int, default=1, help="Analyses in flight at once.")
+    parser.add_argument('--backends', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--grammar-latency', type=float, default=0.05, help="Stub LanguageTool round trip, seconds.")
+    parser.add_argument('--role-latency', type=float, default=0.4, help="Stub Gemini round trip, seconds.")
+    parser.add_argument('--no-warm-pass', action='store_true', help="Skip the second, cache-hit pass.")
+    parser.add_argument('--output', help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    from api.analysis_cache import AnalysisCache, LocMemBackend
+    from api.model_registry import registry
+    from api.role_keywords import FALLBACK_ROLE_SKILLS
+    if args.backends == 'stub':
+        from benchmarks import stubs
+        stubs.install(grammar_latency=args.grammar_latency, role_latency=args.role_latency)
+
+    started = time.perf_counter()
+    models = registry.warm()
+    load_seconds = time.perf_counter() - started
+
+    docs = build_corpus(args.sizes, args.formats, args.per_cell, args.seed)
+    print(f"{len(docs)} documents ({', '.join(args.sizes)} x {', '.join(args.formats)}), "
+          f"{args.backends} backends, concurrency {args.concurrency}, models loaded in {load_seconds:.2f}s")
+
+    roles = list(FALLBACK_ROLE_SKILLS)
+    cache = AnalysisCache(LocMemBackend(max_entries=100000))
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "documents": len(docs),
+        },
+        "models": {"load_seconds": round(load_seconds, 3), "status": models},
+    }
+    results["cold"] = report_pass(*run_pass(docs, roles, args.concurrency, cache))
+    print_pass("cold", results["cold"])
+    if not args.no_warm_pass:
+        results["warm"] = report_pass(*run_pass(docs, roles, args.concurrency, cache))
+        print_pass("warm (cache hits)", results["warm"])
+    results["peak_rss_bytes"] = peak_rss_bytes()
+    print(f"\npeak RSS {results['peak_rss_bytes'] / (1024 * 1024):.0f} MB")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/compare.py
+"""Compares two bench_pipeline.py result files and flags regressions.
+
+    python benchmarks/compare.py base.json new.json [--threshold 0.10] [--min-ms 1]
+
+A metric regresses when it is more than --threshold slower (relative) and more than
+--min-ms slower (absolute, so sub-millisecond noise is ignored). Exits 1 when anything
+regressed, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def rows(result):
+    """{(pass, section, name): summary} for every latency summary in a result file."""
+    out = {}
+    for pass_name in ("cold", "warm"):
+        data = result.get(pass_name)
+        if not data: continue
+        out[(pass_name, "end_to_end", "all")] = data["end_to_end"]
+        for section in ("by_document", "stages"):
+            for name, summary in data[section].items():
+                out[(pass_name, section, name)] = summary
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.10, help="Relative slowdown that counts as a regression.")
+    parser.add_argument('--min-ms', type=float, default=1.0, help="Ignore absolute differences below this.")
+    args = parser.parse_args()
+
+    with open(args.base, encoding='utf-8') as f: base = json.load(f)
+    with open(args.new, encoding='utf-8') as f: new = json.load(f)
+
+    base_rows, new_rows = rows(base), rows(new)
+    regressions = 0
+    print(f"{'metric':<40} {'pct':<7} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for key in sorted(set(base_rows) & set(new_rows)):
+        for pct in PERCENTILES:
+            before, after = base_rows[key].get(pct), new_rows[key].get(pct)
+            if before is None or after is None: continue
+            change = (after - before) / before if before else 0.0
+            flag = ''
+            if change > args.threshold and after - before > args.min_ms:
+                flag = '  REGRESSION'
+                regressions += 1
+            elif change < -args.threshold and before - after > args.min_ms:
+                flag = '  faster'
+            print(f"{'/'.join(key):<40} {pct[:3]:<7} {before:>10.2f} {after:>10.2f} {change:>+8.1%}{flag}")
+
+    for label, getter in (("throughput/s (cold)", lambda r: r.get("cold", {}).get("throughput_per_second")),
+                          ("peak RSS MB", lambda r: r.get("peak_rss_bytes") and r["peak_rss_bytes"] / (1024 * 1024)),
+                          ("model load s", lambda r: r.get("models", {}).get("load_seconds"))):
+        before, after = getter(base), getter(new)
+        if before and after:
+            print(f"{label:<40} {'':<7} {before:>10.2f} {after:>10.2f} {(after - before) / before:>+8.1%}")
+
+    print(f"\n{regressions} regression(s) (threshold {args.threshold:.0%}, min {args.min_ms} ms)")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
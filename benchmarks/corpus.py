@@ -0,0 +1,86 @@
+# benchmarks/corpus.py
+"""Deterministic synthetic resumes (PDF and DOCX) for the pipeline benchmarks.
+
+The same seed always yields byte-identical documents, so two benchmark runs see the
+same corpus. Every document carries a unique reference line, so no two share a text
+hash (and a cold run never hits the embedding store).
+"""
+import io
+import random
+
+# Approximate page counts; a page is ~50 lines of text
+SIZES = {"small": 1, "medium": 3, "large": 10, "xlarge": 30}
+FORMATS = ("pdf", "docx")
+
+FIRST_NAMES = ["Jane", "Arjun", "Maria", "Chen", "Fatima", "Lucas", "Aisha", "Tom", "Priya", "Omar"]
+LAST_NAMES = ["Doe", "Sharma", "Garcia", "Wei", "Khan", "Silva", "Bello", "Novak", "Iyer", "Haddad"]
+SKILLS = ["Python", "Java", "SQL", "React", "Django", "Docker", "Kubernetes", "AWS", "Git", "TypeScript",
+          "Pandas", "TensorFlow", "PostgreSQL", "Redis", "Linux", "Terraform", "GraphQL", "Node.js"]
+VERBS = ["Built", "Led", "Designed", "Shipped", "Optimized", "Migrated", "Automated", "Maintained"]
+OBJECTS = ["data pipelines", "REST APIs", "a billing service", "CI/CD workflows", "dashboards",
+           "an ML ranking model", "the search backend", "mobile features"]
+# A few deliberate slips so grammar checking has something to find
+SLIPS = ["Responsible for teh deployment of services.", "Worked with a team of 5 engineer.", "Their was a 30% speedup."]
+
+LINES_PER_PAGE = 50
+
+
+def resume_lines(rng, pages, ref):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{name.split()[0].lower()}.{name.split()[1].lower()}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+             f"Ref {ref}", "Summary",
+             f"Engineer with {rng.randint(2, 15)} years of experience in {', '.join(rng.sample(SKILLS, 3))}.",
+             "Skills", ", ".join(rng.sample(SKILLS, 8)), "Experience"]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)} and {rng.choice(SKILLS)}, "
+                     f"cutting latency {rng.randint(10, 80)}% for {rng.randint(2, 40)} teams.")
+        if rng.random() < 0.05: lines.append(rng.choice(SLIPS))
+    lines += ["Education", "B.Sc. Computer Science"]
+    return lines
+
+
+def make_pdf(lines):
+    """A minimal PDF (Helvetica, one content stream per page) that PyPDF2 extracts verbatim."""
+    def esc(s): return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    for i, page in enumerate(pages):
+        stream = ("BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({esc(l)}) Tj T*" for l in page) + " ET").encode('latin-1', 'replace')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets: out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_docx(lines):
+    from docx import Document
+    document = Document()
+    for line in lines: document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def build_corpus(sizes=tuple(SIZES), formats=FORMATS, per_cell=5, seed=0):
+    """[(file_name, size, format, bytes)], per_cell documents for every size x format."""
+    rng = random.Random(seed)
+    docs = []
+    for size in sizes:
+        for fmt in formats:
+            for i in range(per_cell):
+                ref = f"{seed}-{size}-{fmt}-{i}"
+                lines = resume_lines(rng, SIZES[size], ref)
+                data = make_pdf(lines) if fmt == "pdf" else make_docx(lines)
+                docs.append((f"{ref}.{fmt}", size, fmt, data))
+    return docs
@@ -0,0 +1,22 @@
+# benchmarks/settings.py
+"""Project settings with throwaway state: a fresh SQLite DB, media root and embedding store
+under a temp directory, so benchmark runs neither need MySQL nor see each other's data."""
+import atexit
+import os
+import shutil
+import tempfile
+
+from backend.settings import *  # noqa: F401,F403
+
+BENCH_DIR = os.environ.get('BENCH_STATE_DIR')
+if not BENCH_DIR:
+    BENCH_DIR = tempfile.mkdtemp(prefix='resume-bench-')
+    atexit.register(shutil.rmtree, BENCH_DIR, ignore_errors=True)
+
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(BENCH_DIR, 'db.sqlite3')}}
+MEDIA_ROOT = os.path.join(BENCH_DIR, 'media')
+EMBEDDING_STORE_LOCATION = os.path.join(BENCH_DIR, 'embeddings')
+ANALYSIS_CACHE = {'BACKEND': 'locmem', 'TTL': 3600, 'MAX_ENTRIES': 100000}
+CACHES = {**CACHES, 'auth': {**CACHES['auth'], 'LOCATION': os.path.join(BENCH_DIR, 'cache', 'auth')}}
+AI_MODELS_WARM_ON_STARTUP = False
+ANALYSIS_JOB_RUN_IN_PROCESS = False
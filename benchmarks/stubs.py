@@ -0,0 +1,82 @@
+# benchmarks/stubs.py
+"""Stand-ins for spaCy, the sentence encoder, LanguageTool and Gemini.
+
+They do comparable *kinds* of work (a linear scan for skills, a dense vector per text,
+a fixed per-call latency for the network-bound services) so the benchmark measures the
+pipeline around the models without downloading or running them.
+"""
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from api.model_registry import SIMILARITY_MODEL_DIM, SKILL_KEYWORDS
+from api.skill_matcher import AhoCorasick
+
+
+class StubNLP:
+    """Tags SKILL entities with a case-insensitive keyword automaton, like the EntityRuler."""
+    pipe_names = ["entity_ruler"]
+
+    def __init__(self, keywords=SKILL_KEYWORDS or ("python", "sql", "java", "react", "docker")):
+        self.keywords = [k.lower() for k in keywords]
+        self.matcher = AhoCorasick(self.keywords)
+
+    def __call__(self, text):
+        found = self.matcher.find_all(text.lower())
+        return SimpleNamespace(ents=[SimpleNamespace(label_="SKILL", text=self.keywords[i]) for i in sorted(found)])
+
+    def pipe(self, texts, batch_size=1, n_process=1):
+        for text in texts:
+            yield self(text)
+
+
+class StubEncoder:
+    """Hashed bag-of-words into SIMILARITY_MODEL_DIM floats; deterministic per text."""
+
+    def __init__(self, dim=SIMILARITY_MODEL_DIM):
+        self.dim = dim
+
+    def _encode_one(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            h = zlib.crc32(word.encode('utf-8'))
+            vector[h % self.dim] += 1.0 if h & 1 else -1.0
+        return vector
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+
+class StubLanguageTool:
+    """Answers after a fixed round trip plus a per-character cost, reporting no matches."""
+
+    def __init__(self, latency=0.05, per_char=0.00002):
+        self.latency = latency
+        self.per_char = per_char
+
+    def check(self, text):
+        time.sleep(self.latency + self.per_char * len(text))
+        return []
+
+    def close(self):
+        pass
+
+
+def install(grammar_latency=0.05, role_latency=0.4):
+    """Points the model registry and the role keyword service at the stubs."""
+    from api import role_keywords
+    from api.grammar import GrammarChecker
+    from api.model_registry import registry
+    from django.conf import settings
+
+    registry.register("nlp", StubNLP)
+    registry.register("similarity", StubEncoder)
+    registry.register("grammar", lambda: GrammarChecker(lambda: StubLanguageTool(grammar_latency),
+                                                        workers=getattr(settings, 'GRAMMAR_WORKERS', 2),
+                                                        deadline=getattr(settings, 'GRAMMAR_DEADLINE', 3.0)))
+    registry.reset()
+    role_keywords._service = role_keywords.RoleKeywordService(role_keywords.StubBackend(delay=role_latency))
@@ -3,7 +3,6 @@ import React, { useState, useContext } from 'react';
 import { Layout, Row, Col, Typography, Button, Upload, Input, Form, message, Spin, Card, Progress, Tag, Divider, Select, Statistic, List, Space } from 'antd';
 import { ArrowLeftOutlined, UploadOutlined, ExperimentOutlined } from '@ant-design/icons';
 import { useNavigate } from 'react-router-dom';
-import axios from 'axios';
 import AuthContext from '../context/AuthContext';
 
 const { Header, Content } = Layout;
@@ -17,11 +16,32 @@ const jobRoles = [
     "UI/UX Designer", "QA Engineer", "Business Analyst"
 ];
 
+// Reads the Server-Sent Events of analyze/stream/ from a fetch body (EventSource can't POST files)
+const readEventStream = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = (block.match(/^event: (.*)$/m) || [])[1];
+            const data = (block.match(/^data: (.*)$/m) || [])[1];
+            if (event && data) onEvent(event, JSON.parse(data));
+        }
+    }
+};
+
 const AnalyzerPage = () => {
     const navigate = useNavigate();
     const [form] = Form.useForm();
     const [isLoading, setIsLoading] = useState(false);
     const [report, setReport] = useState(null);
+    const [partial, setPartial] = useState({});
     const [fileList, setFileList] = useState([]);
     const { authTokens } = useContext(AuthContext);
 
@@ -37,6 +57,7 @@ const AnalyzerPage = () => {
 
         setIsLoading(true);
         setReport(null);
+        setPartial({});
 
         const formData = new FormData();
         formData.append('resume_file', fileList[0].originFileObj);
@@ -49,14 +70,26 @@ const AnalyzerPage = () => {
 
         try {
             message.loading({ content: 'Analyzing...', key: 'analyze', duration: 0 });
-            const response = await axios.post('http://127.0.0.1:8000/api/analyze/', formData, { headers });
+            // Partial results arrive as each stage finishes; the last event is the full report or an error
+            const response = await fetch('http://127.0.0.1:8000/api/analyze/stream/', { method: 'POST', body: formData, headers });
+            if (!response.ok) {
+                const body = await response.json().catch(() => ({}));
+                throw new Error(body.error || 'Analysis failed.');
+            }
+            let finalReport = null;
+            let streamError = null;
+            await readEventStream(response, (event, data) => {
+                if (event === 'report') finalReport = data;
+                else if (event === 'error') streamError = data.error;
+                else setPartial(prev => ({ ...prev, [event]: data }));
+            });
             message.destroy('analyze');
 
-            if (response.data && response.data.success) {
-                setReport(response.data);
+            if (finalReport && finalReport.success) {
+                setReport(finalReport);
                 message.success('Analysis Complete!');
             } else {
-                throw new Error(response.data.error || 'Analysis failed.');
+                throw new Error(streamError || 'Analysis failed.');
             }
         } catch (error) {
             message.destroy('analyze');
@@ -117,7 +150,19 @@ const AnalyzerPage = () => {
                     <Col xs={24} md={14} lg={16}>
                         <Card style={{ minHeight: '80vh' }}>
                             <Title level={5}>Analysis Report</Title>
-                            {isLoading && <div style={{ textAlign: 'center', padding: '50px' }}><Spin size="large" tip="Analyzing..." /></div>}
+                            {isLoading && Object.keys(partial).length === 0 && <div style={{ textAlign: 'center', padding: '50px' }}><Spin size="large" tip="Analyzing..." /></div>}
+                            {isLoading && Object.keys(partial).length > 0 && (
+                                <div>
+                                    <Space style={{ marginBottom: '15px' }}><Spin size="small" /><Text type="secondary">Still analyzing, partial results so far:</Text></Space>
+                                    {partial.contact && <Paragraph>Name: {partial.contact.name || '-'} · Email: {partial.contact.email || '-'} · Phone: {partial.contact.phone || '-'}</Paragraph>}
+                                    {partial.skills && (
+                                        <Paragraph>Skills found: <Space wrap size={[4, 8]}>{partial.skills.resume_skills.map(skill => <Tag key={skill}>{skill}</Tag>)}</Space></Paragraph>
+                                    )}
+                                    {partial.role_match && <Statistic title={`Skill match with ${partial.role_match.job_role_selected}`} value={partial.role_match.role_match_pct} suffix="%" />}
+                                    {partial.grammar && <Paragraph>Grammar: {partial.grammar.checked ? `${partial.grammar.grammar_issues} potential issues` : 'not checked'}</Paragraph>}
+                                    {partial.jd_match && partial.jd_match.semantic_score !== null && <Statistic title="Semantic similarity to the JD" value={partial.jd_match.semantic_score} suffix="%" />}
+                                </div>
+                            )}
                             {!isLoading && !report && <div style={{ textAlign: 'center', padding: '50px' }}><Paragraph type="secondary">Report will appear here.</Paragraph></div>}
 
                             {!isLoading && report && (
@@ -0,0 +1,44 @@
+# gunicorn.conf.py
+"""Serves backend.wsgi with the AI models loaded once and shared by every worker.
+
+    gunicorn -c gunicorn.conf.py backend.wsgi
+
+With preload_app the master imports Django and loads settings.MODEL_PRELOAD before forking,
+so the workers map the same model weights copy-on-write instead of each loading a private
+copy. Compare process_unique_memory_bytes on /metrics with and without preloading to see
+how much each worker really costs.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count(), 4)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+# The master does the loading; workers must not start a warm-up thread of their own
+os.environ['AI_MODELS_WARM_ON_STARTUP'] = 'false'
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker is forked
+    from django.conf import settings
+    from django.db import connections
+    from api.model_registry import preload_shared
+
+    # Only load here: running an inference in the master would start torch's thread pool,
+    # which forked children inherit in a broken state
+    status = preload_shared(getattr(settings, 'MODEL_PRELOAD', None))
+    for name, info in status.items():
+        if info["state"] != "not_loaded":
+            server.log.info(f"preloaded model {name}: {info['state']} in {info['load_seconds']}s")
+    # Workers open their own connections; none may be inherited from the master
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    # With METRICS_MULTIPROC_DIR, each worker publishes its own metrics for /metrics to gather
+    from api.metrics import restart_after_fork
+    restart_after_fork()